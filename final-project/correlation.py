@@ -0,0 +1,243 @@
+# Correlation matrices over the full dataset, computed once and persisted.
+#
+# Pearson correlations come from a single streaming pass over the CSV: each chunk is parsed to
+# float32 (values that are not numbers count as missing), shifted by the first chunk's column means
+# (keeps float32 sums well conditioned) and reduced to a few p x p matrix products, so memory does
+# not depend on the number of rows. Missing values are handled pairwise like DataFrame.corr():
+# every entry uses the rows where both columns are present. Spearman correlations need global
+# ranks, so the same pass also writes the columns into one preallocated float32 array (4 bytes per
+# value, sized from a count of the file's lines), which is ranked at the end and reduced the same
+# way (with missing values, each column is ranked over its present values, where DataFrame.corr
+# re-ranks every pair; the difference is small). Chunk reductions can run in worker threads (numpy
+# releases the GIL in the matrix products).
+#
+# The result is saved as an artifact bundle (see shared/model_format.py) recording the source
+# file's size/mtime. Only the pipeline (ensure(), when data.csv changed) and this script compute it;
+# the page loads the bundle, reports whether it is current, stale or missing, and only slices it:
+#   correlations.top_k('Bankrupt?', 10), correlations.matrix('pearson', columns)
+#
+#   python correlation.py data/data.csv assets/correlation.bundle
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from shared.model_format import MANIFEST, load_bundle, save_bundle
+
+CHUNK_ROWS = 50_000
+METHODS = ['pearson', 'spearman']
+
+
+class _Moments:
+    # pairwise-complete sums of a column-shifted float32 matrix, accumulated in float64
+    def __init__(self, p):
+        self.n = np.zeros((p, p))
+        self.sx = np.zeros((p, p))   # sx[i, j]: sum of x_i over rows where x_i and x_j are present
+        self.sxx = np.zeros((p, p))
+        self.sxy = np.zeros((p, p))
+        self.shift = None
+
+    @staticmethod
+    def reduce(X, shift):
+        mask = ~np.isnan(X)
+        Xc = np.where(mask, X - shift, np.float32(0))
+        M = mask.astype(np.float32)
+        return M.T @ M, Xc.T @ M, (Xc * Xc).T @ M, Xc.T @ Xc
+
+    def add(self, parts):
+        for total, part in zip([self.n, self.sx, self.sxx, self.sxy], parts):
+            total += part
+
+    def correlation(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            n = np.where(self.n > 0, self.n, np.nan)
+            cov = self.sxy - self.sx * self.sx.T / n
+            var_i = self.sxx - self.sx ** 2 / n
+            corr = cov / np.sqrt(var_i * var_i.T)
+        # constant columns stay NaN (as in pandas); float error can push |r| slightly over 1
+        diagonal = np.diag(var_i) > 0
+        corr[np.diag_indices_from(corr)] = np.where(diagonal, 1.0, np.nan)
+        return np.clip(corr, -1, 1)
+
+
+def _accumulate(chunks, p, workers):
+    # chunks: iterable of float32 (rows, p) arrays -> _Moments; reductions of up to 2 * workers
+    # chunks are in flight while the next ones are parsed
+    moments = _Moments(p)
+    if workers <= 1:
+        for X in chunks:
+            if moments.shift is None:
+                moments.shift = _shift(X)
+            moments.add(_Moments.reduce(X, moments.shift))
+        return moments
+
+    pending = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for X in chunks:
+            if moments.shift is None:
+                moments.shift = _shift(X)
+            pending.append(pool.submit(_Moments.reduce, X, moments.shift))
+            if len(pending) >= 2 * workers:
+                moments.add(pending.pop(0).result())
+        for future in pending:
+            moments.add(future.result())
+    return moments
+
+def _shift(X):
+    with np.errstate(invalid='ignore'):
+        shift = np.nanmean(X, axis=0) if len(X) else np.zeros(X.shape[1])
+    return np.nan_to_num(shift).astype(np.float32)
+
+def _rank_columns(X, workers):
+    # average ranks per column (ties share their mean rank, NaN stays NaN), in place, float32
+    def rank(j):
+        X[:, j] = pd.Series(X[:, j]).rank(method='average').to_numpy(np.float32)
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        list(pool.map(rank, range(X.shape[1])))
+    return X
+
+
+class Correlations:
+    def __init__(self, columns, matrices, n_rows, source=None):
+        self.columns = list(columns)
+        self.index = {c: i for i, c in enumerate(self.columns)}
+        self.matrices = matrices  # method -> (p, p) float32 array
+        self.n_rows = n_rows
+        self.source = source
+
+    @property
+    def methods(self):
+        return list(self.matrices)
+
+    def matrix(self, method='pearson', columns=None):
+        # DataFrame of the full matrix, or of the columns x columns block
+        corr = self.matrices[method]
+        if columns is None:
+            return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+        idx = [self.index[c] for c in columns]
+        return pd.DataFrame(corr[np.ix_(idx, idx)], index=list(columns), columns=list(columns))
+
+    def with_target(self, target, method='pearson'):
+        return pd.Series(self.matrices[method][self.index[target]], index=self.columns, name=target)
+
+    def top_k(self, target, k, method='pearson', absolute=False, include_target=False):
+        # the k columns most correlated with target, strongest first (NaN last)
+        values = self.with_target(target, method).astype(np.float64)
+        if not include_target:
+            values = values.drop(target)
+        key = values.abs() if absolute else values
+        order = np.argsort(-key.fillna(-np.inf).to_numpy(), kind='stable')[:k]
+        return values.iloc[order]
+
+
+def compute(chunks, columns, workers=1, methods=METHODS, source=None, n_rows_hint=None):
+    # chunks: iterable of DataFrames (or 2-d arrays) with these columns; n_rows_hint: expected row
+    # count, the size of the Spearman array (grown by doubling if the chunks turn out longer)
+    p = len(columns)
+    keep_ranks = 'spearman' in methods
+    values = np.empty((n_rows_hint or CHUNK_ROWS, p) if keep_ranks else (0, p), np.float32)
+    n_rows = 0
+
+    def arrays():
+        nonlocal n_rows, values
+        for chunk in chunks:
+            X = np.asarray(chunk, dtype=np.float32)
+            if keep_ranks:
+                if n_rows + len(X) > len(values):
+                    grown = np.empty((max(2 * len(values), n_rows + len(X)), p), np.float32)
+                    grown[:n_rows] = values[:n_rows]
+                    values = grown
+                values[n_rows:n_rows + len(X)] = X
+            n_rows += len(X)
+            yield X
+
+    matrices = {}
+    pearson = _accumulate(arrays(), p, workers).correlation()
+    if 'pearson' in methods:
+        matrices['pearson'] = pearson.astype(np.float32)
+    if keep_ranks:
+        ranks = _rank_columns(values[:n_rows], workers)
+        chunks_of_ranks = (ranks[i:i + CHUNK_ROWS] for i in range(0, len(ranks), CHUNK_ROWS))
+        matrices['spearman'] = _accumulate(chunks_of_ranks, p, workers).correlation().astype(np.float32)
+    return Correlations(columns, matrices, n_rows, source)
+
+def _count_rows(path, block=1 << 20):
+    # data lines of a CSV (newlines minus the header), without parsing it
+    lines, last = 0, b'\n'
+    with open(path, 'rb') as f:
+        while data := f.read(block):
+            lines += data.count(b'\n')
+            last = data[-1:]
+    return max(lines - 1 + (last != b'\n'), 0)
+
+def _numeric(chunk, columns):
+    # columns parsed by pandas as they come; values that are not numbers (in any chunk) become NaN
+    return chunk[columns].apply(pd.to_numeric, errors='coerce')
+
+def compute_csv(path, chunk_rows=CHUNK_ROWS, workers=None, methods=METHODS):
+    # single pass over a CSV; columns without any number in the first 1000 rows are skipped
+    workers = workers or os.cpu_count() or 1
+    head = pd.read_csv(path, nrows=1000)
+    parsed = _numeric(head, head.columns)
+    columns = parsed.columns[parsed.notna().any()].tolist()
+    n_rows = _count_rows(path) if 'spearman' in methods else None
+    chunks = pd.read_csv(path, usecols=columns, chunksize=chunk_rows)
+    return compute((_numeric(chunk, columns) for chunk in chunks), columns, workers, methods, _source(path), n_rows)
+
+
+# --- persistence --------------------------------------------------------------------------------
+
+def _source(path):
+    stat = os.stat(path)
+    return {'file': os.path.basename(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def save(correlations, directory):
+    arrays = {method: matrix for method, matrix in correlations.matrices.items()}
+    meta = {'columns': correlations.columns, 'n_rows': correlations.n_rows}
+    return save_bundle(directory, 'correlation', arrays, meta=meta, source=correlations.source)
+
+def load(path):
+    # path: the bundle directory or its manifest (loader for the artifact registry)
+    directory = os.path.dirname(path) if os.path.basename(path) == MANIFEST else path
+    manifest, arrays, _ = load_bundle(directory)
+    meta = manifest['meta']
+    return Correlations(meta['columns'], arrays, meta['n_rows'], manifest['source'])
+
+def is_current(data_path, directory):
+    return status(data_path, directory) == 'current'
+
+def status(data_path, directory):
+    # 'missing' (no bundle), 'stale' (data_path changed since it was computed) or 'current'; a bundle
+    # whose source file is not there to compare with counts as current
+    manifest_path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(manifest_path):
+        return 'missing'
+    if not os.path.exists(data_path):
+        return 'current'
+    with open(manifest_path) as f:
+        source = json.load(f).get('source') or {}
+    stat = os.stat(data_path)
+    return 'current' if (source.get('size'), source.get('mtime_ns')) == (stat.st_size, stat.st_mtime_ns) else 'stale'
+
+_lock = threading.Lock()
+
+def ensure(data_path, directory, **kwargs):
+    # manifest path of correlations that are current for data_path, computing them first if needed
+    # (once per process at a time: concurrent sessions wait for the first one)
+    with _lock:
+        if not is_current(data_path, directory):
+            save(compute_csv(data_path, **kwargs), directory)
+    return os.path.join(directory, MANIFEST)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print(f'usage: python {sys.argv[0]} <data.csv> <output.bundle>')
+        sys.exit(1)
+    correlations = compute_csv(sys.argv[1])
+    save(correlations, sys.argv[2])
+    print(f'{len(correlations.columns)} columns, {correlations.n_rows} rows -> {sys.argv[2]}')
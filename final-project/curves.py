@@ -0,0 +1,85 @@
+# ROC / precision-recall / lift curves for the model comparison.
+#
+# Each model's scores are sorted once; cumulative true/false positive counts at every distinct
+# score give the ROC curve, the PR curve, the lift curve, ROC AUC and average precision in the same
+# pass (sklearn's roc_curve + roc_auc_score sort twice per model). The full curves can have one
+# point per test row, so for plotting each one is decimated to at most max_points points spaced
+# evenly along the curve in the unit square: at the default 1000 points, neighbours are less than
+# a pixel or two apart on the page, so the plotted line looks the same.
+import numpy as np
+
+MAX_POINTS = 1000
+
+
+def decimate(x, y, max_points=MAX_POINTS):
+    # indices of at most max_points + 1 points of the curve (x, y), evenly spaced by arc length in
+    # [0, 1] x [0, 1] units (y is rescaled when it is not a rate, e.g. lift); first and last kept
+    n = len(x)
+    if n <= max_points:
+        return np.arange(n)
+    y_range = np.ptp(y) or 1.0
+    steps = np.hypot(np.diff(x), np.diff(y) / y_range)
+    length = np.concatenate([[0.0], np.cumsum(steps)])
+    buckets = np.floor(length * (max_points / max(length[-1], 1e-12))).astype(np.int64)
+    keep = np.flatnonzero(np.diff(buckets, prepend=-1) > 0)
+    if keep[-1] != n - 1:
+        keep = np.append(keep, n - 1)
+    return keep
+
+
+class Curves:
+    def __init__(self, y_true, scores, max_points=MAX_POINTS):
+        y_true = np.asarray(y_true).astype(bool)
+        scores = np.asarray(scores)
+        n = len(y_true)
+        order = np.argsort(scores, kind='stable')[::-1]
+        sorted_scores = scores[order]
+
+        # last position of each distinct score: a threshold between two distinct values
+        distinct = np.flatnonzero(np.diff(sorted_scores)) if n else np.array([], dtype=np.int64)
+        ends = np.append(distinct, n - 1) if n else distinct
+        tp = np.cumsum(y_true[order], dtype=np.int64)[ends]
+        fp = ends + 1 - tp
+        thresholds = sorted_scores[ends]
+
+        self.n = n
+        self.n_positive = int(tp[-1]) if n else 0
+        self.n_negative = n - self.n_positive
+        self.base_rate = self.n_positive / n if n else 0.0
+
+        # ROC, starting at (0, 0) like sklearn
+        tp0 = np.concatenate([[0], tp])
+        fp0 = np.concatenate([[0], fp])
+        fpr = fp0 / max(self.n_negative, 1)
+        tpr = tp0 / max(self.n_positive, 1)
+        self.roc_auc = float(np.trapezoid(tpr, fpr)) if self.n_negative and self.n_positive else float('nan')
+
+        # precision-recall; average precision as in sklearn (sum of precision * recall increments)
+        precision = tp / (tp + fp)
+        recall = tp / max(self.n_positive, 1)
+        self.average_precision = float(np.sum(np.diff(recall, prepend=0.0) * precision)) if self.n_positive else float('nan')
+
+        # cumulative lift: precision among the top-scored fraction of the population / base rate
+        depth = (tp + fp) / max(n, 1)
+        lift = precision / self.base_rate if self.base_rate else np.zeros_like(precision)
+        # lift at the first threshold covering at least 10% of the population
+        self.top_decile_lift = float(lift[min(np.searchsorted(depth, 0.1), len(lift) - 1)]) if n else float('nan')
+
+        keep = decimate(fpr, tpr, max_points)
+        self.fpr, self.tpr = fpr[keep], tpr[keep]
+        self.roc_thresholds = np.concatenate([[np.inf], thresholds])[keep]
+        keep = decimate(recall, precision, max_points)
+        self.recall, self.precision, self.pr_thresholds = recall[keep], precision[keep], thresholds[keep]
+        keep = decimate(depth, lift, max_points)
+        self.depth, self.lift = depth[keep], lift[keep]
+        self.n_thresholds = len(thresholds)
+
+    def summary(self):
+        return {'ROC AUC': self.roc_auc, 'Average precision': self.average_precision,
+                'Top-decile lift': self.top_decile_lift, 'Thresholds': self.n_thresholds}
+
+
+def compare(probas, y_true, max_points=MAX_POINTS):
+    # {model name: Curves} for every model scored on this test set
+    return {name: Curves(y_true, scores, max_points) for name, scores in probas.items()
+            if len(scores) == len(y_true)}
@@ -0,0 +1,110 @@
+# Evaluation engine for the Model Performance page.
+#
+# The model's decision scores (logits) are computed once; labels, probabilities, the confusion
+# matrix, the per-class metrics and the probability histograms are all derived from them.
+# Scores are sorted once with the cumulative count of positives, so evaluating another threshold
+# is a binary search (O(log n)) instead of a new pass over the test set.
+import numpy as np
+import pandas as pd
+
+HIST_BINS = 50
+LOGIT_BINS = 60
+CURVE_POINTS = 120
+
+
+def decision_scores(model, X):
+    # logits for linear models; log-odds of predict_proba otherwise
+    if hasattr(model, 'decision_function'):
+        return np.asarray(model.decision_function(X), dtype=np.float64)
+    proba = np.clip(model.predict_proba(X)[:, 1], 1e-15, 1 - 1e-15)
+    return np.log(proba / (1 - proba))
+
+def _logit(p):
+    if p <= 0:
+        return -np.inf
+    if p >= 1:
+        return np.inf
+    return np.log(p / (1 - p))
+
+
+class Evaluation:
+    def __init__(self, scores, y, classes=None):
+        # classes: the (negative, positive) labels, sorted like sklearn's classes_; taken from y by default
+        y = np.asarray(y)
+        self.classes = np.unique(y).tolist() if classes is None else list(classes)
+        if len(self.classes) != 2:
+            raise ValueError(f"expected 2 classes, got {self.classes}")
+        self.scores = np.asarray(scores, dtype=np.float64)
+        self.y = y == self.classes[1]
+        self.n = len(self.y)
+        self.proba = 1 / (1 + np.exp(-self.scores))
+
+        order = np.argsort(self.scores, kind='stable')
+        self.sorted_scores = self.scores[order]
+        # positives[i]: positives among the i lowest scores
+        self.positives = np.concatenate([[0], np.cumsum(self.y[order])])
+        self.n_positive = int(self.positives[-1])
+
+        edges = np.linspace(0, 1, HIST_BINS + 1)
+        self.hist_edges = edges
+        self.hist_counts = {c: np.histogram(self.proba[self.y == positive], bins=edges)[0]
+                            for c, positive in zip(self.classes, (False, True))}
+
+    def confusion(self, threshold=0.5):
+        # [[tn, fp], [fn, tp]] (sklearn layout); predicted positive when probability > threshold,
+        # i.e. logit > logit(threshold), which is model.predict at 0.5
+        n_negative_pred = int(np.searchsorted(self.sorted_scores, _logit(threshold), side='right'))
+        fn = int(self.positives[n_negative_pred])
+        tn = n_negative_pred - fn
+        tp = self.n_positive - fn
+        fp = self.n - n_negative_pred - tp
+        return np.array([[tn, fp], [fn, tp]])
+
+    def predictions(self, threshold=0.5):
+        return self.scores > _logit(threshold)
+
+    def report(self, threshold=0.5):
+        # same table as pd.DataFrame(classification_report(y, y_pred, output_dict=True)).transpose()
+        cm = self.confusion(threshold)
+        support = cm.sum(axis=1)
+        predicted = cm.sum(axis=0)
+        correct = np.diag(cm)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            precision = np.where(predicted > 0, correct / predicted, 0.0)
+            recall = np.where(support > 0, correct / support, 0.0)
+            f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+
+        rows = {str(c): [precision[i], recall[i], f1[i], support[i]] for i, c in enumerate(self.classes)}
+        accuracy = correct.sum() / self.n if self.n else 0.0
+        rows['accuracy'] = [accuracy, accuracy, accuracy, accuracy]
+        rows['macro avg'] = [precision.mean(), recall.mean(), f1.mean(), self.n]
+        weights = support / max(self.n, 1)
+        rows['weighted avg'] = [(precision * weights).sum(), (recall * weights).sum(), (f1 * weights).sum(), self.n]
+        return pd.DataFrame.from_dict(rows, orient='index', columns=['precision', 'recall', 'f1-score', 'support'])
+
+
+def evaluate(model, X_test, y_test):
+    return Evaluation(decision_scores(model, X_test), y_test)
+
+
+def _compact(values):
+    # 4 significant digits: plenty for a chart, and keeps the JSON payload small
+    return [float(f'{v:.4g}') for v in values]
+
+def logit_profile(scores, bins=LOGIT_BINS, curve_points=CURVE_POINTS, clip=(0.5, 99.5)):
+    # pre-aggregated view of the logit -> probability relation: a histogram of the logits (the
+    # outer 0.5% on each side are counted in the edge bins) and the sigmoid over the same range,
+    # with the density of companies at each curve point for shading; size is independent of N
+    scores = np.asarray(scores, dtype=np.float64)
+    lo, hi = np.percentile(scores, clip) if len(scores) else (-1.0, 1.0)
+    if hi <= lo:
+        lo, hi = lo - 1, hi + 1
+    counts, edges = np.histogram(np.clip(scores, lo, hi), bins=bins, range=(lo, hi))
+    x = np.linspace(lo, hi, curve_points)
+    centers = (edges[:-1] + edges[1:]) / 2
+    density = np.interp(x, centers, counts / max(counts.sum(), 1) / np.diff(edges))
+    return {
+        'edges': _compact(edges), 'counts': counts.tolist(),
+        'x': _compact(x), 'probability': _compact(1 / (1 + np.exp(-x))), 'density': _compact(density),
+        'n': int(len(scores)), 'clipped': int(np.sum((scores < lo) | (scores > hi))),
+    }
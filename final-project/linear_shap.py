@@ -0,0 +1,137 @@
+# Closed-form SHAP values for the logistic regression.
+#
+# For a linear model with independent features, the SHAP value of feature j for a row x is
+# coef_j * (x_j - mean_j) on the logit scale, where mean is the background (here: test set) mean,
+# and the base value is the logit at the mean. This is what shap.LinearExplainer(model, X_test)
+# returns, without building the explainer or an N x p SHAP matrix: rows are explained on demand
+# (one float32 vector operation), and the global importance (mean |SHAP| per feature) is a running
+# aggregate over row chunks, so memory stays bounded by the chunk size for any number of companies.
+# LocalExplanations serves the per-company waterfall view on top of it.
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+CHUNK_ROWS = 65_536
+TOP_N = 15
+CACHE_SIZE = 256
+
+
+def _chunks(X, chunk_rows=CHUNK_ROWS):
+    # float32 row blocks of a DataFrame or array, without converting the whole frame at once
+    rows = X.iloc if hasattr(X, 'iloc') else X
+    for start in range(0, len(X), chunk_rows):
+        yield start, np.asarray(rows[start:start + chunk_rows], dtype=np.float32)
+
+
+class LinearShap:
+    def __init__(self, model, background, chunk_rows=CHUNK_ROWS):
+        # model: fitted binary LogisticRegression (or any model with coef_ / intercept_)
+        # background: DataFrame/array the expectation is taken over (the test set)
+        self.coef = np.asarray(model.coef_, dtype=np.float64).ravel()
+        self.intercept = float(np.ravel(model.intercept_)[0])
+        self.feature_names = list(getattr(background, 'columns', range(len(self.coef))))
+        self.chunk_rows = chunk_rows
+
+        # background mean, streamed (float64 accumulator)
+        total, n = np.zeros(len(self.coef)), 0
+        for _, block in _chunks(background, chunk_rows):
+            total += block.sum(axis=0, dtype=np.float64)
+            n += len(block)
+        self.mean = total / max(n, 1)
+        self.expected_value = float(self.coef @ self.mean + self.intercept)
+
+        self._coef32 = self.coef.astype(np.float32)
+        self._mean32 = self.mean.astype(np.float32)
+        self._abs_sum = np.zeros(len(self.coef))
+        self._n_seen = 0
+
+    def shap_values(self, X):
+        # (rows, features) float32 SHAP values for a block of rows
+        return (np.asarray(X, dtype=np.float32) - self._mean32) * self._coef32
+
+    def row(self, x):
+        # SHAP values of a single row (Series or 1-d array)
+        return self.shap_values(np.asarray(x, dtype=np.float32).reshape(1, -1))[0]
+
+    def logits(self, X):
+        # total logit per row (base value + sum of SHAP values = the model's decision function)
+        out = np.empty(len(X))
+        for start, block in _chunks(X, self.chunk_rows):
+            out[start:start + len(block)] = block.astype(np.float64) @ self.coef + self.intercept
+        return out
+
+    def update(self, X):
+        # add a block of rows to the running global importance
+        self._abs_sum += np.abs(self.shap_values(X)).sum(axis=0, dtype=np.float64)
+        self._n_seen += len(X)
+
+    def fit_importance(self, X):
+        for _, block in _chunks(X, self.chunk_rows):
+            self.update(block)
+        return self
+
+    @property
+    def n_seen(self):
+        return self._n_seen
+
+    def mean_abs_shap(self):
+        # global importance over every row seen so far
+        return self._abs_sum / max(self._n_seen, 1)
+
+
+def explain(model, X):
+    # explainer with the background and global importance taken over X
+    return LinearShap(model, X).fit_importance(X)
+
+
+class LocalExplanations:
+    # waterfall payloads for single companies: the high-risk rows (predicted bankrupt, logit > 0)
+    # are found once, each row's top features are picked with argpartition (O(p) instead of a
+    # full sort), and the ready-to-plot payloads of recently viewed rows are kept in an LRU
+    def __init__(self, explainer, X, top_n=TOP_N, cache_size=CACHE_SIZE):
+        self.explainer = explainer
+        self.X = X
+        self.top_n = top_n
+        self.cache_size = cache_size
+        self.logits = explainer.logits(X)
+        self.risky_indices = np.flatnonzero(self.logits > 0)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _row(self, idx):
+        return self.X.iloc[idx] if hasattr(self.X, 'iloc') else self.X[idx]
+
+    def _build(self, idx):
+        x = np.asarray(self._row(idx), dtype=np.float32)
+        row_shap = self.explainer.row(x)
+        k = min(self.top_n, len(row_shap))
+        top = np.argpartition(np.abs(row_shap), len(row_shap) - k)[-k:]
+        top = top[np.argsort(np.abs(row_shap[top]))]  # smallest first, largest at the top of the plot
+        total = float(row_shap.sum(dtype=np.float64))
+        other = total - float(row_shap[top].sum(dtype=np.float64))
+
+        base_value = self.explainer.expected_value
+        final_logit = base_value + total
+        return {
+            'names': [str(self.explainer.feature_names[j]) for j in top] + ["Rest of features"],
+            'values': row_shap[top].astype(float).tolist() + [other],
+            'text': [f"{v:.2f}" for v in x[top]] + [""],
+            'base_value': base_value,
+            'final_logit': final_logit,
+            'final_prob': float(1 / (1 + np.exp(-final_logit))),
+        }
+
+    def waterfall(self, idx):
+        idx = int(idx)
+        with self._lock:
+            payload = self._cache.get(idx)
+            if payload is not None:
+                self._cache.move_to_end(idx)
+                return payload
+        payload = self._build(idx)
+        with self._lock:
+            self._cache[idx] = payload
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return payload
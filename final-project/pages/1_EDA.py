@@ -3,20 +3,13 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from sklearn.metrics import roc_curve, roc_auc_score
-import pickle
+from utils import load_comparison_curves, load_correlations, load_df_sample
 
 st.set_page_config(page_title="Overview & Comparison", page_icon="📊", layout="wide")
 
-@st.cache_data
-def load_comparison_data():
-    y_test = np.load('assets/y_test.npy')
-    df_sample = pd.read_csv('assets/df_sample.csv')
-    with open('assets/model_comparison_probas.pkl', 'rb') as f:
-        probas = pickle.load(f)
-    return y_test, df_sample, probas
-
-y_test, df_sample, probas = load_comparison_data()
+df_sample = load_df_sample()
+curves = load_comparison_curves()
+correlations, correlation_state = load_correlations()
 
 # --- EDA SECTION ---
 st.header("1. Exploratory Data Analysis (Sample)")
@@ -34,10 +27,16 @@ with col1:
 
 with col2:
     st.subheader("Correlation Matrix (Top Features)")
-    # Calculate corr for sample to be fast
-    corr = df_sample.corr(numeric_only=True)
-    # Select correlation with target
-    target_corr = corr['Bankrupt?'].sort_values(ascending=False).head(10).drop('Bankrupt?')
+    method = st.radio("Correlation", ["Pearson", "Spearman"], horizontal=True).lower()
+    st.caption(f"Computed over {correlations.n_rows:,} rows.")
+    if correlation_state == 'stale':
+        st.warning("data.csv changed since these correlations were computed; "
+                   "run `python pipeline.py` (or `python correlation.py`) to refresh them.")
+    elif correlation_state == 'missing':
+        st.info("No precomputed correlations for the full dataset: showing the sample's. "
+                "Run `python pipeline.py` (or `python correlation.py`) to compute them.")
+    # Slices of the precomputed matrix: features most correlated with the target
+    target_corr = correlations.top_k('Bankrupt?', 9, method=method)
     fig_corr = px.bar(x=target_corr.values, y=target_corr.index, orientation='h',
                       title="Top Features Correlated with Bankruptcy",
                       labels={'x': 'Correlation', 'y': 'Feature'})
@@ -49,9 +48,9 @@ A visual representation of the correlation between the top 15 most correlated fe
 """)
 
 N_FEATURES = 15
-top_features = corr['Bankrupt?'].abs().sort_values(ascending=False).head(N_FEATURES + 1).index.tolist()
+top_features = ['Bankrupt?'] + correlations.top_k('Bankrupt?', N_FEATURES, method=method, absolute=True).index.tolist()
 
-corr_top = df_sample[top_features].corr(numeric_only=True).round(2)
+corr_top = correlations.matrix(method, top_features).round(2)
 
 fig_heatmap = px.imshow(
     corr_top,
@@ -82,19 +81,18 @@ relevant_features = [
     'Current Ratio'
 ]
 
-col1, col2 = st.columns(2)
-df_sample_cp = df_sample.copy()
+# Heavy-tailed ratios are plotted on a log1p scale (only these columns are transformed)
+log_features = {'Total debt/Total net worth', 'Current Ratio'}
 
-df_sample_cp['Total debt/Total net worth'] = np.log1p(df_sample_cp['Total debt/Total net worth'])
-df_sample_cp['Current Ratio'] = np.log1p(df_sample_cp['Current Ratio'])
+col1, col2 = st.columns(2)
 
 for i, feature in enumerate(relevant_features):
+    values = np.log1p(df_sample[feature]) if feature in log_features else df_sample[feature]
 
     # --- HISTOGRAM WITH DENSITY OVERLAY ---
     fig_hist = px.histogram(
-        df_sample_cp,
-        x=feature,
-        color='Bankrupt?',
+        x=values,
+        color=df_sample['Bankrupt?'],
         marginal="box", # Adds a box plot on top for outlier context
         histnorm='probability density', # Normalizes bars so the area is 1 for each class
         opacity=0.6,
@@ -125,22 +123,31 @@ We evaluated Random Forest, SVM, Logistic Regression, XGBoost, and simplified XG
 The plot below compares their **True Positive Rate** vs. **False Positive Rate**.
 """)
 
+st.dataframe(pd.DataFrame({name: c.summary() for name, c in curves.items()}).transpose()
+             .sort_values('ROC AUC', ascending=False)
+             .style.format({'ROC AUC': "{:.3f}", 'Average precision': "{:.3f}", 'Top-decile lift': "{:.2f}"}))
+
+roc_tab, pr_tab, lift_tab = st.tabs(["ROC", "Precision-Recall", "Lift"])
+
 fig_roc = go.Figure()
 fig_roc.add_shape(
     type='line', line=dict(dash='dash'),
     x0=0, x1=1, y0=0, y1=1
 )
-
-for model_name, y_proba in probas.items():
-
-    if len(y_proba) == len(y_test):
-        fpr, tpr, _ = roc_curve(y_test, y_proba)
-        auc = roc_auc_score(y_test, y_proba)
-
-        fig_roc.add_trace(go.Scatter(
-            x=fpr, y=tpr, mode='lines',
-            name=f'{model_name} (AUC={auc:.3f})'
-        ))
+fig_pr = go.Figure()
+fig_lift = go.Figure()
+fig_lift.add_hline(y=1, line_dash="dash")
+
+for model_name, c in curves.items():
+    fig_roc.add_trace(go.Scatter(
+        x=c.fpr, y=c.tpr, mode='lines',
+        name=f'{model_name} (AUC={c.roc_auc:.3f})'
+    ))
+    fig_pr.add_trace(go.Scatter(
+        x=c.recall, y=c.precision, mode='lines',
+        name=f'{model_name} (AP={c.average_precision:.3f})'
+    ))
+    fig_lift.add_trace(go.Scatter(x=c.depth, y=c.lift, mode='lines', name=model_name))
 
 fig_roc.update_layout(
     title="ROC Curve Comparison",
@@ -148,10 +155,16 @@ fig_roc.update_layout(
     yaxis_title="True Positive Rate",
     width=900, height=800
 )
-
-left, middle, right = st.columns((1, 5, 1))
-with middle:
-    st.plotly_chart(fig_roc, use_container_width=True)
+fig_pr.update_layout(title="Precision-Recall Curve Comparison", xaxis_title="Recall",
+                     yaxis_title="Precision", width=900, height=800)
+fig_lift.update_layout(title="Cumulative Lift", xaxis_title="Fraction of companies flagged (highest risk first)",
+                       yaxis_title="Lift over base rate", width=900, height=800)
+
+for tab, fig in [(roc_tab, fig_roc), (pr_tab, fig_pr), (lift_tab, fig_lift)]:
+    with tab:
+        left, middle, right = st.columns((1, 5, 1))
+        with middle:
+            st.plotly_chart(fig, use_container_width=True)
 
 
 st.success("**Decision:** Logistic Regression chosen for deployment due to high AUC (comparable to XGBoost) and similar interpretability.")
\ No newline at end of file
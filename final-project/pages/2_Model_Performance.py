@@ -1,41 +1,26 @@
 import streamlit as st
-import pickle
 import pandas as pd
 import numpy as np
 import plotly.figure_factory as ff
-import plotly.express as px
-from sklearn.metrics import confusion_matrix, classification_report
+import plotly.graph_objects as go
+from utils import load_evaluation
 
 st.set_page_config(page_title="Model Performance", page_icon="📈", layout="wide")
 
-@st.cache_resource
-def load_logreg_model():
-    with open('assets/logreg_model.pkl', 'rb') as f:
-        model = pickle.load(f)
-    return model
-
-@st.cache_data
-def load_test_data():
-    X_test = pd.read_csv('assets/X_test.csv')
-    y_test = np.load('assets/y_test.npy')
-    return X_test, y_test
-
-model = load_logreg_model()
-X_test, y_test = load_test_data()
+# scores, sorted threshold index and histograms, computed once per model / test set
+evaluation = load_evaluation()
 
 st.title("Logistic Regression Performance")
 
-# Predictions
-y_pred = model.predict(X_test)
-y_proba = model.predict_proba(X_test)[:, 1]
+threshold = st.slider("Decision threshold (predict bankrupt when probability > threshold)", 0.01, 0.99, 0.50, 0.01)
 
 col1, col2 = st.columns([1, 1])
 
 with col1:
     st.subheader("Confusion Matrix (Normalized by Predicted Class)")
     
-    # 1. Calculate raw confusion matrix
-    cm_raw = confusion_matrix(y_test, y_pred)
+    # 1. Raw confusion matrix at the selected threshold
+    cm_raw = evaluation.confusion(threshold)
     col_sums = cm_raw.sum(axis=0, keepdims=True)
 
     col_sums[col_sums == 0] = 1 
@@ -63,19 +48,18 @@ with col1:
 
 with col2:
     st.subheader("Probability Distribution")
-    df_prob = pd.DataFrame({'Probability': y_proba, 'Actual': y_test})
-    df_prob['Actual'] = df_prob['Actual'].map({False: 'Non-Bankrupt', True: 'Bankrupt'})
 
-    
-    fig_hist = px.histogram(
-        df_prob, x="Probability", color="Actual", nbins=50,
-        title="Distribution of Predicted Probabilities",
-        opacity=0.7, barmode='overlay'
-    )
-    fig_hist.add_vline(x=0.5, line_dash="dash", line_color="red", annotation_text="Threshold")
+    # pre-binned per class (50 bins), so the payload does not grow with the test set
+    centers = (evaluation.hist_edges[:-1] + evaluation.hist_edges[1:]) / 2
+    fig_hist = go.Figure([
+        go.Bar(x=centers, y=evaluation.hist_counts[actual], name=label, opacity=0.7)
+        for actual, label in zip(evaluation.classes, ['Non-Bankrupt', 'Bankrupt'])
+    ])
+    fig_hist.update_layout(title="Distribution of Predicted Probabilities", barmode='overlay', bargap=0,
+                           xaxis_title="Probability", yaxis_title="count", legend_title="Actual")
+    fig_hist.add_vline(x=threshold, line_dash="dash", line_color="red", annotation_text="Threshold")
     st.plotly_chart(fig_hist, use_container_width=True)
 
 st.subheader("Classification Metrics")
-report = classification_report(y_test, y_pred, output_dict=True)
-df_report = pd.DataFrame(report).transpose()
-st.dataframe(df_report.style.format("{:.3f}"))
\ No newline at end of file
+df_report = evaluation.report(threshold)
+st.dataframe(df_report.style.format("{:.3f}"))
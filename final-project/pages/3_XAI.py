@@ -1,36 +1,20 @@
 import streamlit as st
-import shap
-import pickle
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
+from plotly.subplots import make_subplots
+from utils import load_explainer, load_local_explanations, load_logit_profile, load_test_data
 
 st.set_page_config(page_title="Explainability", page_icon="🤖", layout="wide")
 
-@st.cache_resource
-def load_resources():
-    with open('assets/logreg_model.pkl', 'rb') as f:
-        model = pickle.load(f)
-    X_test = pd.read_csv('assets/X_test.csv')
-    return model, X_test
+MAX_OPTIONS = 1000
 
-model, X_test = load_resources()
-
-@st.cache_data
-def get_shap_values(_model, _X_test):
-    # use LinearExplainer for LogReg
-    explainer = shap.LinearExplainer(_model, _X_test, model_output='raw')
-    shap_values = explainer.shap_values(_X_test)
-    
-    # Check if list (binary class) or array
-    if isinstance(shap_values, list):
-        shap_values = shap_values[1]
-        
-    return explainer, shap_values
+X_test, _ = load_test_data()
 
+# Linear SHAP in closed form: coef * (x - mean) on the logit scale, computed per row on demand
 with st.spinner("Calculating SHAP values (this may take a moment)..."):
-    explainer, shap_values = get_shap_values(model, X_test)
+    explainer = load_explainer()
 
 st.title("Explainable AI (XAI) Dashboard")
 st.markdown("We use **SHAP (SHapley Additive exPlanations)** to understand feature contributions.")
@@ -38,15 +22,13 @@ st.markdown("We use **SHAP (SHapley Additive exPlanations)** to understand featu
 # --- TABBED VIEW ---
 tab1, tab2, tab3 = st.tabs(["Global Importance", "SHAP Values and eq. probabilities", "Local Prediction (Waterfall)"])
 
-shap_values = np.array(shap_values)
-
 # --- TAB 1: Global Feature Importance (Bar Plot) ---
 with tab1:
     st.subheader("Which features matter most overall?")
     
-    # Calculate mean absolute shap values
-    mean_abs_shap = np.abs(shap_values).mean(axis=0)
-    feature_names = X_test.columns
+    # Mean absolute shap values (running aggregate over the test set)
+    mean_abs_shap = explainer.mean_abs_shap()
+    feature_names = explainer.feature_names
     
     df_import = pd.DataFrame({
         'Feature': feature_names,
@@ -61,56 +43,51 @@ with tab1:
 with tab2:
     st.subheader("Relationship between SHAP Logits and Probability")
     
-    baseline_logit = explainer.expected_value
-    
-    # Calculate totals
-    total_logits = np.sum(shap_values, axis=1) + baseline_logit
-    probs = 1 / (1 + np.exp(-total_logits))
-    
-    df_scurve = pd.DataFrame({
-        'Total Logit': total_logits,
-        'Probability': probs
-    })
-    
-    fig_curve = px.scatter(df_scurve, x='Total Logit', y='Probability', 
-                           title="Sigmoid Curve: Total Logit vs Probability",
-                           opacity=0.5)
+    # Total logit = base value + sum of SHAP values = the model's decision function; pre-binned,
+    # so the chart size does not depend on the number of companies
+    profile = load_logit_profile()
+    centers = [(a + b) / 2 for a, b in zip(profile['edges'][:-1], profile['edges'][1:])]
+    
+    fig_curve = make_subplots(specs=[[{"secondary_y": True}]])
+    fig_curve.add_trace(go.Bar(x=centers, y=profile['counts'], name="Companies", opacity=0.3,
+                               marker_color="grey"), secondary_y=True)
+    fig_curve.add_trace(go.Scatter(
+        x=profile['x'], y=profile['probability'], mode='lines+markers', name="Probability",
+        marker=dict(size=5, color=profile['density'], colorscale='Viridis',
+                    colorbar=dict(title="Density", x=1.08)),
+        line=dict(color="lightgrey"),
+    ), secondary_y=False)
     
     fig_curve.add_hline(y=0.5, line_dash="dash", line_color="red", annotation_text="Threshold")
-    fig_curve.update_layout(height=600)
+    fig_curve.update_layout(title="Sigmoid Curve: Total Logit vs Probability", height=600, bargap=0,
+                            xaxis_title="Total Logit")
+    fig_curve.update_yaxes(title_text="Probability", secondary_y=False)
+    fig_curve.update_yaxes(title_text="Companies", secondary_y=True, showgrid=False)
     
+    if profile['clipped']:
+        st.caption(f"{profile['clipped']:,} of {profile['n']:,} companies with extreme logits are counted in the outer bins.")
     st.plotly_chart(fig_curve, use_container_width=True)
 
 # --- TAB 3: Local Explanation (Waterfall) ---
 with tab3:
     st.subheader("Why did the model predict Bankruptcy for a specific company?")
     
-    # Filter for high risk companies for interest
-    preds = model.predict(X_test)
-    risky_indices = np.where(preds == 1)[0]
+    # High risk companies (predicted bankrupt) are found once per model / test set
+    local = load_local_explanations()
+    risky_indices = local.risky_indices
     
     if len(risky_indices) > 0:
-        selected_idx = st.selectbox("Select a High-Risk Test Sample Index:", risky_indices, accept_new_options=True)
+        # long lists are capped; any other index can still be typed in
+        options = risky_indices[:MAX_OPTIONS].tolist()
+        selected_idx = st.selectbox("Select a High-Risk Test Sample Index:", options, accept_new_options=True)
     else:
         selected_idx = st.number_input("Select Index", min_value=0, max_value=len(X_test)-1, value=0)
     selected_idx = int(selected_idx)
-    # Get values for this instance
-    row_shap = shap_values[selected_idx]
-    row_features = X_test.iloc[selected_idx]
-    base_value = explainer.expected_value
-    
-    # Create Waterfall Data
-    # Sort by magnitude for cleaner plot
-    sort_inds = np.argsort(np.abs(row_shap))
-    top_n = 15
-    top_inds = sort_inds[-top_n:]
-    
-    # Calculate 'Other' group
-    other_shap = np.sum(row_shap[sort_inds[:-top_n]])
     
-    plot_names = list(row_features.index[top_inds]) + ["Rest of features"]
-    plot_values = list(row_shap[top_inds]) + [other_shap]
-    plot_text = [f"{val:.2f}" for val in row_features.values[top_inds]] + [""]
+    # Top features (by |SHAP|) + 'Rest of features', cached per company
+    payload = local.waterfall(selected_idx)
+    base_value = payload['base_value']
+    plot_values = payload['values']
     
     # Determine measures
     measures = ["relative"] * (len(plot_values))
@@ -119,17 +96,17 @@ with tab3:
     fig_waterfall = go.Figure(go.Waterfall(
         name = "20", orientation = "h",
         measure = measures,
-        y = plot_names,
+        y = payload['names'],
         x = plot_values,
-        text = plot_text,
+        text = payload['text'],
         base = base_value,
         decreasing = {"marker":{"color":"#FF4136"}}, # Red for bankrupt
         increasing = {"marker":{"color":"#2ECC40"}}, # Green for safe
         connector = {"line":{"color":"rgb(63, 63, 63)"}},
     ))
     
-    final_logit = np.sum(row_shap) + base_value
-    final_prob = 1 / (1 + np.exp(-final_logit))
+    final_logit = payload['final_logit']
+    final_prob = payload['final_prob']
     
     fig_waterfall.update_layout(
         title = f"Waterfall Chart (Logit Scale) | Final Prob: {final_prob:.4f}",
@@ -139,4 +116,4 @@ with tab3:
     
     st.plotly_chart(fig_waterfall, use_container_width=True)
     
-    st.info(f"Base Value (Average Logit): {base_value:.4f} | Final Logit: {final_logit:.4f}")
\ No newline at end of file
+    st.info(f"Base Value (Average Logit): {base_value:.4f} | Final Logit: {final_logit:.4f}")
@@ -0,0 +1,218 @@
+# Offline training pipeline for the bankruptcy dashboard assets.
+#
+# Scripted version of notebook.ipynb: load -> normalize -> split -> fit (one stage per model) ->
+# score -> export. Every stage is cached on disk with joblib.Memory, keyed on its inputs (the raw
+# data by content hash), so re-running after a change only redoes the stages downstream of it:
+# unchanged data and parameters rebuild nothing, a new model parameter refits that model only.
+# Independent models are fitted in parallel processes, each with its share of the cores for its
+# own threads. XGBoost is optional: without it the two XGBoost models are skipped.
+#
+# The export step writes the files the pages read from assets/, only replacing files whose content
+# changed (so the apps' artifact registry and exported bundles do not reload needlessly), and
+# refreshes the persisted correlation matrices. Run from final-project/:
+#   python pipeline.py --jobs 4 --bundle
+import argparse
+import io
+import os
+import pickle
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+from shared.artifacts import file_sha256
+from shared.model_format import export_pickle
+import correlation
+
+try:
+    from xgboost import XGBClassifier
+except ImportError:
+    XGBClassifier = None
+
+DATA_PATH = 'data/data.csv'
+ASSETS_DIR = 'assets'
+CACHE_DIR = '.pipeline_cache'
+TARGET = 'Bankrupt?'
+RANDOM_STATE = 42
+TEST_SIZE = 0.1
+SAMPLE_ROWS = 1000
+N_IMPORTANT = 20
+
+# display name -> (estimator class name, constructor parameters); the notebook's models
+MODELS = {
+    'Random Forest': ('RandomForestClassifier', {'random_state': RANDOM_STATE}),
+    'SVM': ('SVC', {'probability': True, 'random_state': RANDOM_STATE}),
+    'Logistic Regression': ('LogisticRegression', {'max_iter': 1000}),
+    'XGBoost': ('XGBClassifier', {'random_state': RANDOM_STATE}),
+}
+SIMPLIFIED = 'XGBoost (Simplified)'  # XGBoost on the top N_IMPORTANT features of 'XGBoost'
+DEPLOYED = 'Logistic Regression'
+ESTIMATORS = {'RandomForestClassifier': RandomForestClassifier, 'SVC': SVC,
+              'LogisticRegression': LogisticRegression, 'XGBClassifier': XGBClassifier}
+THREADED = {'RandomForestClassifier', 'XGBClassifier'}  # estimators with an n_jobs parameter
+
+memory = joblib.Memory(CACHE_DIR, verbose=0)
+
+
+# --- stages -------------------------------------------------------------------------------------
+
+@memory.cache
+def load(path, sha256):
+    # sha256 is only part of the cache key: a changed file is a different stage input
+    df = pd.read_csv(path)
+    df[TARGET] = df[TARGET].astype(bool)
+    return df
+
+@memory.cache
+def normalize(df):
+    scaler = StandardScaler()
+    features = df.columns[df.columns != TARGET]
+    X = pd.DataFrame(scaler.fit_transform(df[features]), columns=features)
+    return scaler, X, df[TARGET].to_numpy()
+
+@memory.cache
+def split(X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE):
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
+    return X_train, X_test, y_train, y_test
+
+@memory.cache(ignore=['X_train', 'y_train', 'n_jobs'])
+def fit(estimator, params, columns, data_key, X_train, y_train, n_jobs=1):
+    # columns: feature subset (None: all); data_key identifies the training data (hashed once by the
+    # caller, instead of in every worker); n_jobs only changes the speed, not the model
+    model = ESTIMATORS[estimator](**params, **({'n_jobs': n_jobs} if estimator in THREADED else {}))
+    return model.fit(X_train if columns is None else X_train[columns], y_train)
+
+def important_columns(xgb_model, columns, k=N_IMPORTANT):
+    return list(np.asarray(columns)[np.argsort(xgb_model.feature_importances_)[::-1]][:k])
+
+def score(models, columns, X_test):
+    # probability of bankruptcy per model, on each model's own feature subset
+    return {name: model.predict_proba(X_test if columns[name] is None else X_test[columns[name]])[:, 1]
+            for name, model in models.items()}
+
+
+# --- export -------------------------------------------------------------------------------------
+
+def _write_if_changed(path, content):
+    # -> True when the file was (re)written; written to a temporary file and moved into place
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            if f.read() == content:
+                return False
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(content)
+    os.replace(tmp, path)
+    return True
+
+def _csv_bytes(df, **kwargs):
+    return df.to_csv(**kwargs).encode()
+
+def _npy_bytes(array):
+    buffer = io.BytesIO()
+    np.save(buffer, array, allow_pickle=False)
+    return buffer.getvalue()
+
+def export(df, scaler, X_normalized, X_test, y_test, models, probas, assets_dir=ASSETS_DIR, bundle=False):
+    # -> names of the asset files that changed
+    os.makedirs(assets_dir, exist_ok=True)
+    files = {
+        'X_test.csv': _csv_bytes(X_test, index=False),
+        'y_test.npy': _npy_bytes(y_test),
+        'logreg_model.pkl': pickle.dumps(models[DEPLOYED]),
+        'model_comparison_probas.pkl': pickle.dumps(probas),
+        'df_sample.csv': _csv_bytes(df.sample(SAMPLE_ROWS, random_state=RANDOM_STATE), index=False),
+        'scaler.pkl': pickle.dumps(scaler),
+        'median_values.csv': _csv_bytes(X_normalized.median()),
+    }
+    changed = [name for name, content in files.items() if _write_if_changed(os.path.join(assets_dir, name), content)]
+    if bundle:
+        for name in files:
+            path = os.path.join(assets_dir, name)
+            if name.endswith('.pkl') and (name in changed or not os.path.exists(os.path.splitext(path)[0] + '.bundle')):
+                export_pickle(path)
+    return changed
+
+
+# --- driver -------------------------------------------------------------------------------------
+
+def _stage(name, func, *args, **kwargs):
+    # results are always read back from the cache, so a fresh run and a cached run export the same bytes
+    cached = func.check_call_in_cache(*args, **kwargs)
+    start = time.perf_counter()
+    result = func.call_and_shelve(*args, **kwargs).get()
+    print(f"{name:<28} {'cached' if cached else f'{time.perf_counter() - start:.2f}s'}")
+    return result
+
+def _timed_fit(*args, **kwargs):
+    # runs in a worker: fits one model into the cache -> its own wall time
+    start = time.perf_counter()
+    fit.call_and_shelve(*args, **kwargs)
+    return time.perf_counter() - start
+
+def _fit_all(specs, X_train, y_train, jobs):
+    # specs: name -> (estimator, params, columns); independent fits in parallel processes, each
+    # threaded estimator gets cpu_count // jobs threads
+    data_key = joblib.hash((X_train, y_train))
+    todo = [name for name, spec in specs.items() if not fit.check_call_in_cache(*spec, data_key, None, None)]
+    workers = max(1, min(jobs, len(todo)))
+    n_jobs = max(1, (os.cpu_count() or 1) // workers)
+    seconds = {}  # name -> wall time of its fit, measured in the worker
+    if todo:
+        seconds = dict(zip(todo, joblib.Parallel(n_jobs=workers)(
+            joblib.delayed(_timed_fit)(*specs[name], data_key, X_train, y_train, n_jobs=n_jobs) for name in todo)))
+    # every model is read back from the cache (the data arguments are not part of the key)
+    models = {name: fit.call_and_shelve(*spec, data_key, None, None).get() for name, spec in specs.items()}
+    for name in specs:
+        print(f"{'fit ' + name:<28} {f'{seconds[name]:.2f}s' if name in seconds else 'cached'}")
+    return models
+
+def run(data_path=DATA_PATH, assets_dir=ASSETS_DIR, jobs=None, bundle=False):
+    jobs = jobs or os.cpu_count() or 1
+    df = _stage('load', load, data_path, file_sha256(data_path))
+    scaler, X, y = _stage('normalize', normalize, df)
+    X_train, X_test, y_train, y_test = _stage('split', split, X, y)
+
+    specs = {name: (estimator, params, None) for name, (estimator, params) in MODELS.items()
+             if ESTIMATORS[estimator] is not None}
+    skipped = [name for name in MODELS if name not in specs]
+    if 'XGBoost' in skipped:
+        skipped.append(SIMPLIFIED)  # fitted on the features 'XGBoost' ranks
+    if skipped:
+        warnings.warn(f"xgboost is not installed, skipping {skipped}")
+    models = _fit_all(specs, X_train, y_train, jobs)
+    columns = {name: None for name in models}
+
+    if 'XGBoost' in models:
+        estimator, params = MODELS['XGBoost']
+        columns[SIMPLIFIED] = important_columns(models['XGBoost'], X_train.columns)
+        models.update(_fit_all({SIMPLIFIED: (estimator, params, columns[SIMPLIFIED])}, X_train, y_train, jobs))
+
+    start = time.perf_counter()
+    probas = score(models, columns, X_test)
+    print(f"{'score':<28} {time.perf_counter() - start:.2f}s")
+
+    changed = export(df, scaler, X, X_test, y_test, models, probas, assets_dir, bundle)
+    print(f"{'export':<28} {', '.join(changed) if changed else 'assets unchanged'}")
+    correlation.ensure(data_path, os.path.join(assets_dir, 'correlation.bundle'))
+    return changed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Train the bankruptcy models and refresh the dashboard assets.')
+    parser.add_argument('--data', default=DATA_PATH)
+    parser.add_argument('--assets', default=ASSETS_DIR)
+    parser.add_argument('--jobs', type=int, default=None, help='models fitted in parallel (default: all cores)')
+    parser.add_argument('--bundle', action='store_true', help='also export pickle-free bundles of the .pkl assets')
+    parser.add_argument('--clear-cache', action='store_true', help='drop every cached stage first')
+    args = parser.parse_args()
+    if args.clear_cache:
+        memory.clear(warn=False)
+    run(args.data, args.assets, args.jobs, args.bundle)
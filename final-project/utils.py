@@ -0,0 +1,109 @@
+import os
+
+import streamlit as st
+
+from shared.artifacts import artifact_version, get_artifact
+from shared.model_format import MANIFEST, load_resolved, resolve
+from evaluation import evaluate, logit_profile
+from curves import compare
+import correlation
+from linear_shap import LocalExplanations, explain
+
+MODEL_PATH = 'assets/logreg_model.pkl'
+X_TEST_PATH = 'assets/X_test.csv'
+Y_TEST_PATH = 'assets/y_test.npy'
+PROBAS_PATH = 'assets/model_comparison_probas.pkl'
+SAMPLE_PATH = 'assets/df_sample.csv'
+DATA_PATH = 'data/data.csv'
+CORRELATION_PATH = 'assets/correlation.bundle'
+
+# All assets go through the shared artifact registry: loaded once per process, shared by every
+# page and session (read-only, never copied), reloaded when the file on disk changes.
+# Pickled assets are read from their pickle-free bundle when one was exported (see shared/model_format.py).
+
+def _load_pickled(path):
+    return get_artifact(resolve(path)[0], loader=load_resolved)
+
+def load_logreg_model():
+    return _load_pickled(MODEL_PATH)
+
+def load_test_data():
+    return get_artifact(X_TEST_PATH), get_artifact(Y_TEST_PATH)
+
+def load_comparison_probas():
+    return _load_pickled(PROBAS_PATH)
+
+def load_df_sample():
+    return get_artifact(SAMPLE_PATH)
+
+def asset_version(path):
+    # content hash of a loaded asset, to key caches derived from it
+    if path.endswith('.pkl'):
+        path = resolve(path)[0]
+    return artifact_version(path)
+
+@st.cache_resource(max_entries=4)
+def _evaluation(model_version, test_version, _model, _X_test, _y_test):
+    return evaluate(_model, _X_test, _y_test)
+
+def load_evaluation():
+    # decision scores + sorted threshold index of the deployed model, once per model/test-set content
+    model = load_logreg_model()
+    X_test, y_test = load_test_data()
+    test_version = f'{asset_version(X_TEST_PATH)}:{asset_version(Y_TEST_PATH)}'
+    return _evaluation(asset_version(MODEL_PATH), test_version, model, X_test, y_test)
+
+@st.cache_resource(max_entries=4)
+def _comparison_curves(probas_version, test_version, _probas, _y_test):
+    return compare(_probas, _y_test)
+
+def load_comparison_curves():
+    # decimated ROC / PR / lift curves and their summary metrics, once per probas/test-set content
+    probas = load_comparison_probas()
+    _, y_test = load_test_data()
+    return _comparison_curves(asset_version(PROBAS_PATH), asset_version(Y_TEST_PATH), probas, y_test)
+
+@st.cache_data(max_entries=4)
+def _logit_profile(model_version, test_version, _evaluation):
+    return logit_profile(_evaluation.scores)
+
+def load_logit_profile():
+    # binned logits of the test set and the density-shaded sigmoid (a few KB)
+    test_version = f'{asset_version(X_TEST_PATH)}:{asset_version(Y_TEST_PATH)}'
+    evaluation = load_evaluation()
+    return _logit_profile(asset_version(MODEL_PATH), test_version, evaluation)
+
+@st.cache_resource(max_entries=4)
+def _explainer(model_version, test_version, _model, _X_test):
+    return explain(_model, _X_test)
+
+def load_explainer():
+    # closed-form SHAP explainer of the deployed model (background mean and global importance over
+    # the test set), once per model/test-set content
+    model = load_logreg_model()
+    X_test, _ = load_test_data()
+    return _explainer(asset_version(MODEL_PATH), asset_version(X_TEST_PATH), model, X_test)
+
+@st.cache_resource(max_entries=4)
+def _local_explanations(model_version, test_version, _explainer, _X_test):
+    return LocalExplanations(_explainer, _X_test)
+
+def load_local_explanations():
+    # high-risk test rows and cached per-company waterfall payloads
+    X_test, _ = load_test_data()
+    return _local_explanations(asset_version(MODEL_PATH), asset_version(X_TEST_PATH), load_explainer(), X_test)
+
+@st.cache_resource(max_entries=2)
+def _sample_correlations(sample_version, _df_sample):
+    numeric = _df_sample.select_dtypes(include=['number', 'bool'])
+    return correlation.compute([numeric], numeric.columns)
+
+def load_correlations():
+    # -> (correlations, state). Pearson/Spearman matrices over the full dataset, as last computed by
+    # pipeline.py or correlation.py (never in a page request); state is 'current', 'stale' (data.csv
+    # changed since) or 'missing' (no bundle: computed over the sample instead)
+    state = correlation.status(DATA_PATH, CORRELATION_PATH)
+    if state != 'missing':
+        return get_artifact(os.path.join(CORRELATION_PATH, MANIFEST), loader=correlation.load), state
+    df_sample = load_df_sample()
+    return _sample_correlations(asset_version(SAMPLE_PATH), df_sample), state
@@ -0,0 +1,206 @@
+# Materialized summaries for the Data Exploration page.
+#
+# Summaries hold everything the page plots, in a mergeable form (sums and counts rather than
+# means, fixed-edge histogram counts, sufficient statistics for the correlation matrix):
+#   - group summary: mean price per (car, model, body) and per brand, over all rows
+#   - filtered summary: value counts / histograms and the correlation matrix, over the rows
+#     kept by the filter (one per filter spec)
+# Summaries are saved next to the dataset cache. When the dataset only had rows appended,
+# the saved summary is updated with a summary of the new rows instead of being recomputed.
+import hashlib
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+SUMMARY_FORMAT_VERSION = 2
+GROUP_KEYS = ['car', 'model', 'body']
+CORR_ENCODED = ['car', 'body', 'engType', 'drive']  # label-encoded before the correlation, like the notebook
+HIST_BINS = 40
+MAX_DISCRETE_VALUES = 50  # numeric columns with more distinct values only keep a histogram
+
+
+def _is_categorical(series):
+    return isinstance(series.dtype, pd.CategoricalDtype) or series.dtype == 'object'
+
+def _label_codes(series):
+    # LabelEncoder semantics over the column's categories: sorted labels -> 0..k-1, missing -> k
+    values = series.astype('category')
+    categories = values.cat.categories
+    order = np.argsort(categories.astype(str))
+    rank = np.empty(len(categories) + 1, dtype=np.float64)
+    rank[order] = np.arange(len(categories))
+    rank[-1] = len(categories)
+    return rank[values.cat.codes.to_numpy()], sorted(categories.astype(str))
+
+def _histogram_edges(x):
+    x = x[~np.isnan(x)]
+    if len(x) == 0:
+        return np.array([0.0, 1.0])
+    lo, hi = x.min(), x.max()
+    return np.linspace(lo, hi if hi > lo else lo + 1, HIST_BINS + 1)
+
+def compute_group_summary(df):
+    price_sum = df.groupby(GROUP_KEYS, observed=True)['price'].agg(['sum', 'count'])
+    return {
+        'n_rows': len(df),
+        'group_price': price_sum,
+        'brand_price': price_sum.groupby(level='car', observed=True).sum(),
+    }
+
+def compute_filtered_summary(df, mask, like=None):
+    # like: an existing summary whose histogram edges / categories must be reused (for merging);
+    # returns None if the rows do not fit them, in which case the caller recomputes from scratch
+    view = df[mask]
+    summary = {'n_rows': len(df), 'n_filtered': len(view)}
+
+    columns = [c for c in view.columns if c not in ['car', 'model']]
+    value_counts, histograms = {}, {}
+    for col in columns:
+        if _is_categorical(view[col]):
+            value_counts[col] = view[col].value_counts(sort=False)
+            value_counts[col] = value_counts[col][value_counts[col] > 0]
+            continue
+        x = view[col].to_numpy(dtype=np.float64)
+        counts = pd.Series(x).value_counts(sort=False)
+        value_counts[col] = counts if len(counts) <= MAX_DISCRETE_VALUES else None
+
+        edges = like['histograms'][col][0] if like is not None else _histogram_edges(x)
+        finite = x[~np.isnan(x)]
+        if like is not None and len(finite) and (finite.min() < edges[0] or finite.max() > edges[-1]):
+            return None
+        histograms[col] = (edges, np.histogram(finite, bins=edges)[0])
+    summary['value_counts'] = value_counts
+    summary['histograms'] = histograms
+
+    # correlation sufficient statistics over numeric + label-encoded columns, in dataframe column order
+    corr_columns, matrix, categories = [], [], {}
+    for col in view.columns:
+        if col in CORR_ENCODED:
+            codes, categories[col] = _label_codes(view[col])
+            matrix.append(codes)
+        elif pd.api.types.is_numeric_dtype(view[col]):
+            matrix.append(view[col].to_numpy(dtype=np.float64))
+        else:
+            continue
+        corr_columns.append(col)
+    if like is not None and (like['corr_columns'] != corr_columns or like['categories'] != categories):
+        return None
+    X = np.column_stack(matrix) if matrix else np.empty((0, 0))
+    # pairwise-complete sums (like df.corr()): a missing value only drops the pairs it is part of;
+    # columns are shifted by the first summary's means so the sums stay small
+    if like is not None:
+        shift = like['corr_shift']
+    else:
+        with np.errstate(invalid='ignore'):
+            shift = np.nan_to_num(np.nanmean(X, axis=0)) if len(X) else np.zeros(X.shape[1])
+    present = ~np.isnan(X)
+    Xc = np.where(present, X - shift, 0.0)
+    M = present.astype(np.float64)
+    summary['corr_columns'] = corr_columns
+    summary['categories'] = categories
+    summary['corr_shift'] = shift
+    summary['corr_n'] = M.T @ M           # corr_n[i, j]: rows where columns i and j are both present
+    summary['corr_sum'] = Xc.T @ M        # corr_sum[i, j]: sum of column i over those rows
+    summary['corr_sumsq'] = (Xc * Xc).T @ M
+    summary['corr_cross'] = Xc.T @ Xc
+    return summary
+
+def compute_summary(df, mask=None, like=None):
+    # mask None: the unfiltered group stats; otherwise the stats of the rows kept by the filter
+    if mask is None:
+        return compute_group_summary(df)
+    return compute_filtered_summary(df, mask, like)
+
+def _add_series(a, b):
+    if a is None or b is None:
+        return None
+    return a.add(b, fill_value=0)
+
+def merge_summaries(a, b):
+    if 'group_price' in a:
+        return {
+            'n_rows': a['n_rows'] + b['n_rows'],
+            'group_price': _add_series(a['group_price'], b['group_price']),
+            'brand_price': _add_series(a['brand_price'], b['brand_price']),
+        }
+
+    merged = {
+        'n_rows': a['n_rows'] + b['n_rows'],
+        'n_filtered': a['n_filtered'] + b['n_filtered'],
+        'value_counts': {},
+        'histograms': {col: (edges, counts + b['histograms'][col][1]) for col, (edges, counts) in a['histograms'].items()},
+        'corr_columns': a['corr_columns'],
+        'categories': a['categories'],
+        'corr_shift': a['corr_shift'],
+        'corr_n': a['corr_n'] + b['corr_n'],
+        'corr_sum': a['corr_sum'] + b['corr_sum'],
+        'corr_sumsq': a['corr_sumsq'] + b['corr_sumsq'],
+        'corr_cross': a['corr_cross'] + b['corr_cross'],
+    }
+    for col, counts in a['value_counts'].items():
+        combined = _add_series(counts, b['value_counts'][col])
+        if combined is not None and col in a['histograms'] and len(combined) > MAX_DISCRETE_VALUES:
+            combined = None
+        merged['value_counts'][col] = combined
+    return merged
+
+def correlation_matrix(summary):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        n = np.where(summary['corr_n'] > 0, summary['corr_n'], np.nan)
+        sx = summary['corr_sum']
+        cov = summary['corr_cross'] - sx * sx.T / n
+        var = summary['corr_sumsq'] - sx ** 2 / n
+        corr = cov / np.sqrt(var * var.T)
+    # constant columns stay NaN, as in pandas
+    corr[np.diag_indices_from(corr)] = np.where(np.diag(var) > 0, 1.0, np.nan)
+    return pd.DataFrame(np.clip(corr, -1, 1), index=summary['corr_columns'], columns=summary['corr_columns'])
+
+def is_discrete(summary, col):
+    # categorical, or numeric with fewer than 10 distinct values among the filtered rows
+    counts = summary['value_counts'][col]
+    return col not in summary['histograms'] or (counts is not None and len(counts) < 10)
+
+def mean_price(price_sum):
+    return (price_sum['sum'] / price_sum['count']).rename('price')
+
+
+def _row_hashes(df):
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+def _prefix_sha256(row_hashes, n):
+    return hashlib.sha256(row_hashes[:n].tobytes()).hexdigest()
+
+def get_summary(df, mask, path):
+    # mask: boolean array over df rows (the page filter), or None for the group stats;
+    # path: where it is saved (None: compute only, nothing is persisted)
+    if path is None:
+        return compute_summary(df, mask)
+
+    row_hashes = _row_hashes(df)
+    saved = None
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            saved = pickle.load(f)
+
+    summary = None
+    if saved is not None and saved['format_version'] == SUMMARY_FORMAT_VERSION:
+        n_saved = saved['summary']['n_rows']
+        if n_saved <= len(df) and saved['prefix_sha256'] == _prefix_sha256(row_hashes, n_saved):
+            if n_saved == len(df):
+                return saved['summary']
+            # only rows were appended: summarize them and merge
+            new = compute_summary(df.iloc[n_saved:], None if mask is None else mask[n_saved:], like=saved['summary'])
+            if new is not None:
+                summary = merge_summaries(saved['summary'], new)
+
+    if summary is None:
+        summary = compute_summary(df, mask)
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump({'format_version': SUMMARY_FORMAT_VERSION, 'summary': summary,
+                     'prefix_sha256': _prefix_sha256(row_hashes, len(df))}, f)
+    os.replace(tmp, path)
+    return summary
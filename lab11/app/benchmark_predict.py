@@ -0,0 +1,51 @@
+# Throughput of the per-row predict_sample_data path vs predict_batch.
+# Run from lab11/ (same working directory as the app): python app/benchmark_predict.py --rows 20000
+import argparse
+import time
+
+import numpy as np
+
+from utils import FEATURE_COLUMNS, load_data, load_model, predict_batch, predict_sample_data
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=20000, help='rows priced by predict_batch')
+    parser.add_argument('--single-rows', type=int, default=500, help='rows priced one by one (slow path)')
+    args = parser.parse_args()
+
+    data = load_model()
+    df = load_data()
+    sample = df[FEATURE_COLUMNS].dropna().sample(args.rows, replace=True, random_state=0).reset_index(drop=True)
+
+    # warm up both paths
+    predict_batch(data, sample.head(10))
+    predict_sample_data(data, sample.head(1).to_numpy(dtype=object))
+
+    n_single = min(args.single_rows, len(sample))
+    rows = sample.head(n_single).to_numpy(dtype=object)
+    start = time.perf_counter()
+    single = [predict_sample_data(data, rows[i:i + 1].copy()) for i in range(n_single)]
+    t_single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = predict_batch(data, sample)
+    t_batch = time.perf_counter() - start
+
+    assert np.allclose(single, batch[:n_single]), 'batch and per-row predictions differ'
+
+    # uncached single-request latency (encode + predict)
+    latencies = []
+    for i in range(n_single):
+        start = time.perf_counter()
+        predict_batch(data, rows[i:i + 1])
+        latencies.append(time.perf_counter() - start)
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1e3
+
+    print(f'per-row: {n_single:>8,} rows in {t_single:8.3f}s -> {n_single / t_single:12,.0f} rows/s')
+    print(f'batch:   {len(sample):>8,} rows in {t_batch:8.3f}s -> {len(sample) / t_batch:12,.0f} rows/s')
+    print(f'single-request latency: p50 {p50:.3f} ms, p99 {p99:.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# Rare-category collapsing ('Other' grouping) for the car/model columns.
+#
+# The kept categories are fitted once and saved as JSON next to the model, so the display
+# dataset, training and inference all group the same brands/models into 'Other' without
+# recounting. Everything works on categorical codes: counting is a bincount and remapping
+# is one array lookup per column.
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+CATEGORY_MAP_PATH = 'models/category_map.json'
+OTHER = 'Other'
+
+
+def _as_categorical(values):
+    if isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype):
+        return values.array
+    return pd.Categorical(values)
+
+def fit_category_map(df, columns, cutoff):
+    # keep the categories with at least `cutoff` rows, per column
+    kept = {}
+    for col in columns:
+        values = _as_categorical(df[col])
+        codes = values.codes
+        counts = np.bincount(codes[codes >= 0], minlength=len(values.categories))
+        kept[col] = [str(c) for c in values.categories[counts >= cutoff]]
+    return {'cutoff': cutoff, 'columns': kept}
+
+def collapse_categories(values, kept, other=OTHER):
+    # values not in `kept` become `other`; missing values stay missing
+    values = _as_categorical(values)
+    new_categories = pd.Index(kept if other in kept else kept + [other])
+
+    # old code -> new code, with one extra slot at the end so that code -1 (missing) maps to -1
+    remap = new_categories.get_indexer(values.categories.astype(str))
+    remap[remap < 0] = new_categories.get_loc(other)
+    remap = np.append(remap, -1)
+
+    return pd.Categorical.from_codes(remap[values.codes], categories=new_categories)
+
+def apply_category_map(df, category_map, other=OTHER):
+    for col, kept in category_map['columns'].items():
+        if col in df.columns:
+            df[col] = collapse_categories(df[col], kept, other)
+    return df
+
+def save_category_map(category_map, path=CATEGORY_MAP_PATH):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(category_map, f, indent=1)
+
+def load_category_map(path=CATEGORY_MAP_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+def get_category_map(df, columns, cutoff, path=CATEGORY_MAP_PATH):
+    # reuse the persisted map when it covers these columns with the same cutoff, otherwise fit and save one
+    if os.path.exists(path):
+        category_map = load_category_map(path)
+        if category_map['cutoff'] == cutoff and set(columns) <= set(category_map['columns']):
+            return category_map
+    category_map = fit_category_map(df, columns, cutoff)
+    save_category_map(category_map, path)
+    return category_map
@@ -0,0 +1,155 @@
+# Columnar cache for the AutoValuator CSV datasets.
+#
+# Each CSV is parsed once and written next to it as an uncompressed Arrow IPC file
+# (<name>.arrow) with string columns stored as categoricals. The loaders memory-map that
+# file instead of re-parsing the CSV. The cache records the source file's mtime, size and
+# sha256; it is rebuilt when the source changes (the hash is only computed when mtime/size differ,
+# and a touched but unchanged source gets its new mtime recorded, so it is hashed once) or when a
+# file its transform depends on (the saved category map) changes. load_dataset returns the frame
+# together with its version, read from the same cache file.
+#
+# Convert everything up front (run from lab11/, like the app):
+#   python app/datastore.py
+import hashlib
+import os
+import sys
+
+import pandas as pd
+import pyarrow as pa
+
+from categories import CATEGORY_MAP_PATH, apply_category_map, get_category_map
+
+from shared.artifacts import file_sha256
+
+CACHE_FORMAT_VERSION = '2'
+
+
+def _collapse_car_model(df):
+    # brands/models with fewer than 10 listings are grouped into 'Other', using the map saved with the model
+    category_map = get_category_map(df, ['car', 'model'], 10)
+    return apply_category_map(df, category_map)
+
+# csv name -> (read_csv options, transform applied before caching, files the transform depends on)
+DATASETS = {
+    'car_ad_display.csv': (dict(encoding='ISO-8859-1', sep=';'), _collapse_car_model, [CATEGORY_MAP_PATH]),
+    'car_ad_display_clean.csv': (dict(encoding='ISO-8859-1', sep=','), None, []),
+    'X_test.csv': (dict(encoding='ISO-8859-1', sep=','), None, []),
+}
+DEFAULT_DATASET = (dict(encoding='ISO-8859-1', sep=','), None, [])
+
+
+def cache_path(path):
+    return os.path.splitext(path)[0] + '.arrow'
+
+def _read_cache_metadata(path):
+    try:
+        with pa.memory_map(path, 'r') as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+    except (FileNotFoundError, pa.ArrowInvalid):
+        return None
+    return {k.decode(): v.decode() for k, v in metadata.items()}
+
+def _dependencies_sha256(path):
+    _, _, dependencies = DATASETS.get(os.path.basename(path), DEFAULT_DATASET)
+    digest = hashlib.sha256()
+    for dependency in dependencies:
+        digest.update(file_sha256(dependency).encode() if os.path.exists(dependency) else b'-')
+    return digest.hexdigest()
+
+def is_cache_fresh(path):
+    metadata = _read_cache_metadata(cache_path(path))
+    if metadata is None or metadata.get('cache_format_version') != CACHE_FORMAT_VERSION:
+        return False
+    if metadata.get('dependencies_sha256') != _dependencies_sha256(path):
+        return False
+    stat = os.stat(path)
+    if metadata['source_mtime_ns'] == str(stat.st_mtime_ns) and metadata['source_size'] == str(stat.st_size):
+        return True
+    # touched or copied but possibly unchanged: fall back to the content hash
+    if metadata['source_size'] == str(stat.st_size) and metadata['source_sha256'] == file_sha256(path):
+        _write_cache(cache_path(path), _read_table(cache_path(path)), {'source_mtime_ns': str(stat.st_mtime_ns)})
+        return True
+    return False
+
+def _read_table(target):
+    # read_all() on a memory map is zero-copy; the pages come from the OS page cache
+    return pa.ipc.open_file(pa.memory_map(target, 'r')).read_all()
+
+def _write_cache(target, table, metadata):
+    # metadata is merged into the table's; written to a temp file and renamed, so a reader never
+    # maps a half-written cache
+    existing = {k.decode(): v.decode() for k, v in (table.schema.metadata or {}).items()}
+    table = table.replace_schema_metadata({**existing, **metadata})
+    tmp = target + '.tmp'
+    with pa.OSFile(tmp, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, target)
+    return target
+
+def build_cache(path):
+    read_options, transform, _ = DATASETS.get(os.path.basename(path), DEFAULT_DATASET)
+    df = pd.read_csv(path, **read_options)
+    if 'Unnamed: 0' in df.columns:
+        df = df.drop(columns='Unnamed: 0')
+    if transform is not None:
+        df = transform(df)
+
+    for col in df.select_dtypes(include=['object', 'string']).columns:
+        df[col] = df[col].astype('category')
+
+    stat = os.stat(path)
+    return _write_cache(cache_path(path), pa.Table.from_pandas(df, preserve_index=False), {
+        'cache_format_version': CACHE_FORMAT_VERSION,
+        'source_mtime_ns': str(stat.st_mtime_ns),
+        'source_size': str(stat.st_size),
+        'source_sha256': file_sha256(path),
+        'dependencies_sha256': _dependencies_sha256(path),
+    })
+
+def load_table(path):
+    if not is_cache_fresh(path):
+        build_cache(path)
+    return _read_table(cache_path(path))
+
+def load_frame(path):
+    return load_table(path).to_pandas(split_blocks=True)
+
+def _version(metadata):
+    return metadata['source_sha256'][:16] + '-' + metadata['dependencies_sha256'][:16]
+
+def dataset_version(path):
+    # content hash of the source CSV plus its transform dependencies; used to key caches of derived results
+    if not is_cache_fresh(path):
+        build_cache(path)
+    return _version(_read_cache_metadata(cache_path(path)))
+
+def source_stat(path):
+    # mtime/size of the source and of its transform dependencies: a cheap key for in-process caches
+    # of load_dataset (a change re-checks the cache; nothing is hashed while the stat is unchanged)
+    _, _, dependencies = DATASETS.get(os.path.basename(path), DEFAULT_DATASET)
+    stats = []
+    for file in [path, *dependencies]:
+        try:
+            stat = os.stat(file)
+            stats.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            stats.append(None)
+    return tuple(stats)
+
+def load_dataset(path):
+    # (version, DataFrame) from one read of the cache file, so the two always describe the same data
+    table = load_table(path)
+    return _version({k.decode(): v.decode() for k, v in table.schema.metadata.items()}), table.to_pandas(split_blocks=True)
+
+
+if __name__ == '__main__':
+    names = sys.argv[1:] or list(DATASETS)
+    for name in names:
+        if not os.path.exists(name):
+            print(f'skipping {name}: not found')
+            continue
+        if is_cache_fresh(name):
+            print(f'{name}: cache up to date ({cache_path(name)})')
+        else:
+            print(f'{name}: wrote {build_cache(name)}')
@@ -0,0 +1,126 @@
+# Server-side downsampling for scatter plots.
+#
+# The browser only ever receives a bounded payload, whatever the number of rows:
+#   - up to MAX_POINTS rows: all points
+#   - up to DENSITY_MIN_ROWS rows: MAX_POINTS points, picked with LTTB (largest triangle three
+#     buckets) over the x-sorted data, which keeps the outline and outliers of the cloud; for
+#     features with few distinct x values (e.g. year) LTTB degenerates, so a random sample is used
+#   - above that: a 2D histogram (drawn as a heatmap)
+# Box plots get the same treatment: the quartiles, mean and whiskers of every category are computed
+# here (the way plotly would from the raw rows) and only the most extreme outliers are sent along.
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+MAX_POINTS = 5000
+DENSITY_MIN_ROWS = 250_000
+DENSITY_BINS = 120
+MAX_OUTLIERS = 50  # per box
+BOX_COLOR = '#636efa'
+
+
+def lttb(x, y, n_out):
+    # x must be sorted; returns the indices of the n_out points to keep (first and last always kept)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # average of the next bucket is the third vertex of the triangle
+        nxt_lo, nxt_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[nxt_lo:nxt_hi].mean(), y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+def random_sample(n, n_out, seed=0):
+    return np.sort(np.random.default_rng(seed).choice(n, size=n_out, replace=False))
+
+def histogram2d(x, y, bins=DENSITY_BINS):
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins)
+    return {
+        'kind': 'density',
+        'x': (x_edges[:-1] + x_edges[1:]) / 2,
+        'y': (y_edges[:-1] + y_edges[1:]) / 2,
+        'z': np.where(counts.T > 0, counts.T, np.nan),  # empty cells transparent
+        'n_rows': len(x),
+    }
+
+def downsample_scatter(x, y, max_points=MAX_POINTS, density_min_rows=DENSITY_MIN_ROWS):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[valid], y[valid]
+    n = len(x)
+
+    if n <= max_points:
+        return {'kind': 'points', 'method': 'all', 'x': x, 'y': y, 'n_rows': n}
+    if n >= density_min_rows:
+        return histogram2d(x, y)
+
+    if len(np.unique(x)) < max_points // 10:
+        idx = random_sample(n, max_points)
+        method = 'random'
+    else:
+        order = np.argsort(x, kind='stable')
+        idx = order[lttb(x[order], y[order], max_points)]
+        method = 'lttb'
+    return {'kind': 'points', 'method': method, 'x': x[idx], 'y': y[idx], 'n_rows': n}
+
+def scatter_trace(payload, colorscale, cmin, cmax):
+    if payload['kind'] == 'density':
+        return go.Heatmap(x=payload['x'], y=payload['y'], z=payload['z'], colorscale=colorscale, showscale=False,
+                          hovertemplate='x=%{x:,.1f}<br>y=%{y:,.0f}<br>%{z:,} rows<extra></extra>')
+    return go.Scatter(
+        x=payload['x'],
+        y=payload['y'],
+        mode='markers',
+        opacity=0.6,
+        marker=dict(
+            colorscale=colorscale,
+            color=payload['y'],
+            showscale=True,
+            cmin=cmin,
+            cmax=cmax,
+        )
+    )
+
+def box_stats(x, y, max_outliers=MAX_OUTLIERS):
+    # per category of x: quartiles (linear interpolation, plotly's default), mean, Tukey whiskers
+    # (the furthest points within 1.5 IQR of the box) and at most max_outliers of the points beyond
+    # them, the furthest from the median first
+    y = pd.Series(np.asarray(y, dtype=np.float64))
+    keys = pd.Series(np.asarray(x, dtype=object))
+    valid = keys.notna().to_numpy() & y.notna().to_numpy()
+    stats = {k: [] for k in ['x', 'q1', 'median', 'q3', 'mean', 'lowerfence', 'upperfence', 'n']}
+    outliers_x, outliers_y = [], []
+    for key, values in y[valid].groupby(keys[valid], sort=True):
+        values = values.to_numpy()
+        q1, median, q3 = np.percentile(values, [25, 50, 75])
+        inside = values[(values >= q1 - 1.5 * (q3 - q1)) & (values <= q3 + 1.5 * (q3 - q1))]
+        lower, upper = inside.min(), inside.max()
+        row = [key, *(float(v) for v in (q1, median, q3, values.mean(), lower, upper)), len(values)]
+        for name, value in zip(stats, row):
+            stats[name].append(value)
+        outliers = values[(values < lower) | (values > upper)]
+        if len(outliers) > max_outliers:
+            outliers = outliers[np.argpartition(-np.abs(outliers - median), max_outliers - 1)[:max_outliers]]
+        outliers_x += [key] * len(outliers)
+        outliers_y += outliers.tolist()
+    stats['outliers_x'], stats['outliers_y'] = outliers_x, outliers_y
+    return stats
+
+def box_traces(stats):
+    # the precomputed boxes, and their outliers as a separate marker trace
+    box = go.Box(x=stats['x'], q1=stats['q1'], median=stats['median'], q3=stats['q3'], mean=stats['mean'],
+                 lowerfence=stats['lowerfence'], upperfence=stats['upperfence'], boxpoints=False,
+                 marker_color=BOX_COLOR)
+    outliers = go.Scatter(x=stats['outliers_x'], y=stats['outliers_y'], mode='markers',
+                          marker=dict(size=4, color=BOX_COLOR), hoverinfo='y')
+    return box, outliers
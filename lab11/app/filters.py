@@ -0,0 +1,77 @@
+# Outlier filter for the exploration charts.
+#
+# A FilterSpec holds the inclusive bounds (set from the sidebar; the defaults are the notebook's
+# thresholds). It is applied through a SortedIndex built once per dataset version: the bounds of
+# the most selective column become a searchsorted range over that column's pre-sorted row order,
+# and only the rows in that range are checked against the other bounds. This produces a single
+# mask without materializing one DataFrame copy per condition.
+import dataclasses
+import hashlib
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class FilterSpec:
+    price_min: float = 1000
+    price_max: float = 100000
+    mileage_max: float = 600
+    engV_max: float = 7.5
+    year_min: float = 1975
+
+    def bounds(self):
+        # column -> (low, high), both inclusive
+        return {
+            'price': (self.price_min, self.price_max),
+            'mileage': (-np.inf, self.mileage_max),
+            'engV': (-np.inf, self.engV_max),
+            'year': (self.year_min, np.inf),
+        }
+
+    def key(self):
+        return hashlib.sha256(repr(tuple(float(v) for v in dataclasses.astuple(self))).encode()).hexdigest()[:12]
+
+    def describe(self):
+        return (f'price {self.price_min:g}-{self.price_max:g}, mileage<={self.mileage_max:g}, '
+                f'engV<={self.engV_max:g}, year>={self.year_min:g}')
+
+
+class SortedIndex:
+    def __init__(self, df, columns):
+        self.n_rows = len(df)
+        self.values = {col: df[col].to_numpy(dtype=np.float64) for col in columns}
+        # NaN sorts last, so it is never inside a finite range (same as a failed comparison)
+        self.order = {col: np.argsort(values) for col, values in self.values.items()}
+        self.sorted = {col: self.values[col][order] for col, order in self.order.items()}
+
+    def range(self, col, low, high):
+        values = self.sorted[col]
+        return np.searchsorted(values, low, side='left'), np.searchsorted(values, high, side='right')
+
+    def mask(self, spec):
+        bounds = spec.bounds()
+        ranges = {col: self.range(col, *bounds[col]) for col in bounds}
+        driver = min(ranges, key=lambda col: ranges[col][1] - ranges[col][0])
+        start, stop = ranges[driver]
+        rows = self.order[driver][start:stop]
+
+        keep = np.ones(len(rows), dtype=bool)
+        for col, (low, high) in bounds.items():
+            if col == driver:
+                continue
+            x = self.values[col][rows]
+            keep &= (x >= low) & (x <= high)
+
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[rows[keep]] = True
+        return mask
+
+
+def compile_mask(df, spec):
+    # one fused pass without an index, for one-off use (train.py's outlier filter)
+    mask = np.ones(len(df), dtype=bool)
+    for col, (low, high) in spec.bounds().items():
+        x = df[col].to_numpy(dtype=np.float64)
+        mask &= (x >= low) & (x <= high)
+    return mask
@@ -7,9 +7,10 @@ import seaborn as sns
 import plotly.express as px
 import plotly
 from utils import *
+from aggregates import correlation_matrix, is_discrete, mean_price
+from downsample import box_traces, scatter_trace
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from sklearn.preprocessing import LabelEncoder
 
 
 st.set_page_config(page_title='Data Exploration', layout='wide')
@@ -18,7 +19,7 @@ st.title('🔍 Data Exploration')
 st.write('Dataset exploration and key insights')
 
 with st.spinner('Loading data...'):
-    df = load_data()
+    data_version, df = load_versioned_data()
 
 st.header('Data Exploration')
 st.markdown('Quick preview of raw data:')
@@ -27,30 +28,38 @@ st.dataframe(df.head())
 st.subheader('Basic info')
 st.write('Rows:', df.shape[0], 'Columns:', df.shape[1])
 
+# outlier filter for the distribution, scatter and correlation charts (see filters.py);
+# everything below is cached per dataset version + filter spec, so moving a slider only
+# recomputes the charts that depend on the filter
+spec = filter_sidebar(df)
+filter_key = spec.key()  # hash of the slider values: one cache entry per filter state
+mask, rows = load_filtered_rows(data_version, filter_key, spec, df)
+
+# precomputed aggregates (see aggregates.py)
+group_summary = load_summary(data_version, 'groups', df, None)
+summary = load_summary(data_version, filter_key, df, mask)
+
 col1, col2 = st.columns(2)
 
 with col1:
     with st.spinner('Loading chart...'):
-        tmp = df.groupby(['car', 'model', 'body']).mean(numeric_only=True).sort_values('price', ascending=False).reset_index()
-        tmp['index'] = tmp.apply(lambda x: f"{x['car']}: {x['model']} ({x['body']})", axis=1)
-        fig = px.bar(tmp[:10], x='price', y='index', orientation='h', title='Top 10 Most Expensive Cars',
+        tmp = mean_price(group_summary['group_price']).nlargest(10).reset_index()
+        tmp['index'] = tmp['car'].astype(str) + ': ' + tmp['model'].astype(str) + ' (' + tmp['body'].astype(str) + ')'
+        fig = px.bar(tmp, x='price', y='index', orientation='h', title='Top 10 Most Expensive Cars',
                     color_continuous_scale=my_colorscale, color='price')
         fig.update_layout(yaxis=dict(autorange="reversed"), height=600)
         st.plotly_chart(fig, use_container_width=True)
 
 with col2:
     with st.spinner('Loading chart...'):
-        tmp = df.groupby(['car']).mean(numeric_only=True).sort_values('price', ascending=False).reset_index()
-        fig = px.bar(tmp[:10], x='price', y='car', orientation='h', title='Top 10 most expensive brands on average',
+        tmp = mean_price(group_summary['brand_price']).nlargest(10).reset_index()
+        fig = px.bar(tmp, x='price', y='car', orientation='h', title='Top 10 most expensive brands on average',
                     color_continuous_scale=my_colorscale, color='price')
         fig.update_layout(yaxis=dict(autorange="reversed"), height=600)
         st.plotly_chart(fig, use_container_width=True)
 
-df = df[df["price"] <= 100000]
-df = df[df["price"] >= 1000]
-df = df[df["mileage"] <= 600]
-df = df[df["engV"] <= 7.5]
-df = df[df["year"] >= 1975]
+df = df.iloc[rows]
+st.write(f'Filtered view ({spec.describe()}):', len(df), 'rows')
 
 # Select columns except car and model
 columns = [x for x in df.columns if x not in ['car', 'model']]
@@ -68,25 +77,27 @@ with st.spinner('Loading chart...'):
         c = idx % n_cols + 1
 
         # Categorical or low-cardinality count plot
-        if df[col].dtype == 'object' or df[col].nunique() < 10:
-            counts = df[col].value_counts().reset_index()
-            counts.columns = [col, 'count']
+        if is_discrete(summary, col):
+            counts = summary['value_counts'][col].sort_values(ascending=False)
 
             fig.add_trace(
                 go.Bar(
-                    x=counts[col],
-                    y=counts['count'],
+                    x=counts.index.astype(str) if col not in summary['histograms'] else counts.index,
+                    y=counts.values,
                     width=0.9
                 ),
                 row=r, col=c
             )
 
-        # Numeric density plot
+        # Numeric density plot (precomputed histogram)
         else:
+            edges, hist = summary['histograms'][col]
+            widths = np.diff(edges)
             fig.add_trace(
-                go.Histogram(
-                    x=df[col],
-                    histnorm='probability density',
+                go.Bar(
+                    x=edges[:-1] + widths / 2,
+                    y=hist / max(hist.sum(), 1) / widths,
+                    width=widths,
                 ),
                 row=r, col=c
             )
@@ -120,33 +131,16 @@ with st.spinner('Loading chart...'):
         r = idx // n_cols + 1
         c = idx % n_cols + 1
 
-        # Categorical / low-cardinality -> boxplot
-        if df[feature].dtype == "object" or df[feature].nunique() < 10:
-            fig.add_trace(
-                go.Box(
-                    x=df[feature],
-                    y=df[target],
-                    boxmean=True,
-                ),
-                row=r, col=c
-            )
+        # Categorical / low-cardinality -> boxplot (precomputed statistics, see downsample.py)
+        if is_discrete(summary, feature):
+            for trace in box_traces(box_payload(data_version, filter_key, feature, target, df)):
+                fig.add_trace(trace, row=r, col=c)
 
-        # Numeric -> scatter plot
+        # Numeric -> scatter plot (downsampled server-side, see downsample.py)
         else:
+            payload = scatter_payload(data_version, filter_key, feature, target, df)
             fig.add_trace(
-                go.Scatter(
-                    x=df[feature],
-                    y=df[target],
-                    mode='markers',
-                    opacity=0.6,
-                    marker=dict(
-                        colorscale=my_colorscale,
-                        color=df[target],
-                        showscale=True,
-                        cmin=df[target].min(),
-                        cmax=df[target].max(),
-                    )
-                ),
+                scatter_trace(payload, my_colorscale, df[target].min(), df[target].max()),
                 row=r, col=c
             )
 
@@ -159,19 +153,7 @@ with st.spinner('Loading chart...'):
 
     st.plotly_chart(fig, use_container_width=True)
 
-le_car = LabelEncoder()
-df['car'] = le_car.fit_transform(df['car'])
-
-le_body = LabelEncoder()
-df['body'] = le_body.fit_transform(df['body'])
-
-le_engType = LabelEncoder()
-df['engType'] = le_engType.fit_transform(df['engType'])
-
-le_drive = LabelEncoder()
-df['drive'] = le_drive.fit_transform(df['drive'])
-
-corr = df.corr(numeric_only=True)
+corr = correlation_matrix(summary)
 
 with st.spinner('Loading chart...'):
     fig = px.imshow(
@@ -1,5 +1,6 @@
 import streamlit as st
 import numpy as np
+import pandas as pd
 from utils import *
 
 st.set_page_config(page_title='Price Prediction', layout='wide')
@@ -13,9 +14,10 @@ df = load_data()
 col_sliders, col_selects = st.columns(2)
 
 with col_selects:
-    year_in = st.slider('Year', min_value=1950, max_value=2025, value=2010)
-    mileage_in = st.slider('Mileage (thousands?)', min_value=0, max_value=1000, value=100, step=10)
-    engV_in = st.slider('engV', min_value=0.0, max_value=30.0, value=1.8, step=0.5)
+    # steps shared with the prediction cache (PLAYGROUND_STEPS)
+    year_in = st.slider('Year', min_value=1950, max_value=2025, value=2010, step=PLAYGROUND_STEPS['year'])
+    mileage_in = st.slider('Mileage (thousands?)', min_value=0, max_value=1000, value=100, step=PLAYGROUND_STEPS['mileage'])
+    engV_in = st.slider('engV', min_value=0.0, max_value=30.0, value=1.8, step=PLAYGROUND_STEPS['engV'])
 
 with col_sliders:
     car_in = st.selectbox('Brand (car)', np.sort(df['car'].unique()))
@@ -39,3 +41,30 @@ if st.button('Predict'):
             """,
             unsafe_allow_html=True
         )
+
+st.divider()
+st.subheader('📦 Bulk pricing')
+st.write(f"Upload a CSV of cars with the columns {', '.join(FEATURE_COLUMNS)} to price the whole inventory at once.")
+
+uploaded_file = st.file_uploader('Inventory CSV', type='csv')
+
+if uploaded_file is not None:
+    if model_loaded is None:
+        st.warning('Please load or train a model first.')
+    else:
+        inventory = pd.read_csv(uploaded_file)
+        missing = [c for c in FEATURE_COLUMNS if c not in inventory.columns]
+        if missing:
+            st.error(f"Missing columns: {', '.join(missing)}")
+        else:
+            try:
+                with st.spinner(f'Pricing {len(inventory):,} cars...'):
+                    inventory['predicted_price'] = predict_batch(model_loaded, inventory)
+            except ValueError as e:
+                st.error(str(e))
+            else:
+                st.write('Rows priced:', len(inventory))
+                st.dataframe(inventory.head(100))
+                st.download_button('Download priced CSV', inventory.to_csv(index=False).encode('utf-8'),
+                                   file_name='priced_inventory.csv', mime='text/csv')
+
@@ -1,7 +1,9 @@
 import streamlit as st
-import matplotlib.pyplot as plt
+import numpy as np
 
 from utils import *
+from shap_plots import (beeswarm_figure, decision_figure, dependence_figure, importance_figure,
+                        top_features, waterfall_figure)
 
 st.set_page_config(page_title='Model Explainability', layout='wide')
 
@@ -30,59 +32,48 @@ X_test = load_X_test()
 if model is None:
     exit(1)
 
+views = load_shap_views(model, X_test)
+if views is None:
+    st.info('No precomputed SHAP values for this model and test set yet. '
+            'Run `python app/shap_store.py` from lab11/, or build them here.')
+    if st.button('Build SHAP store (this may take a moment)'):
+        with st.spinner('Computing SHAP values...'):
+            # interaction values are not shown on this page; the offline build computes them
+            build_shap_store(model, X_test, interactions=False)
+        st.rerun()
+    st.stop()
+
+manifest, shap_arrays, aggregates = views
+feature_names = manifest['feature_names']
+
+st.subheader('Global explainability')
+st.markdown('### Mean feature importance (bar)')
+st.plotly_chart(importance_figure(aggregates, feature_names), use_container_width=True)
+
+st.markdown('### Summary plot (beeswarm)')
+st.plotly_chart(beeswarm_figure(aggregates, feature_names, my_colorscale), use_container_width=True)
+
+st.markdown('### Dependence plots for top features')
+top_feats = top_features(aggregates, feature_names, 3)
+for col, f in zip(st.columns(len(top_feats)), top_feats):
+    with col:
+        st.plotly_chart(dependence_figure(aggregates, feature_names, f), use_container_width=True)
+
+st.markdown('---')
+st.subheader('Local explainability')
 idx = st.slider('Choose an index from X (row) to explain locally', min_value=0, max_value=len(X_test)-1, value=0)
 
-if st.button('Compute SHAP values (this may take a moment)'):
-    with st.spinner('Computing explainer...'):
-        explainer, shap_values = get_shap_explainer(model, X_test)
-        st.success('Explainer computed')
-        st.subheader('Global explainability')
-        st.markdown('### Mean feature importance (bar)')
-        # shap.plots.bar uses matplotlib; capture to figure
-        fig = plt.figure(figsize=(8,6))
-        shap.plots.bar(shap_values)
-        st.pyplot(fig)
-
-        st.markdown('### Summary plot (beeswarm)')
-        fig2 = plt.figure(figsize=(10,6))
-        shap.summary_plot(shap_values, X_test)
-        st.pyplot(fig2)
-
-        st.markdown('### Dependence plots for top features')
-        top_feats = list(
-            pd.DataFrame(shap_values.values, columns=X_test.columns)
-            .abs().mean()
-            .sort_values(ascending=False)
-            .head(3)
-            .index
-        )
-
-        for f in top_feats:
-            st.write(f'Dependence plot for {f}')
-            try:
-                shap.dependence_plot(f, shap_values.values, X_test, interaction_index=None, show=False)
-            except Exception:
-                shap.dependence_plot(f, shap_values, X_test, interaction_index=None, show=False)
-
-            # Grab the current figure and send to Streamlit
-            fig = plt.gcf()
-            st.pyplot(fig)
-            plt.clf()  # Clear the figure for the next iteration
-
-        st.markdown('---')
-        st.subheader('Local explainability')
-        sv = shap_values[idx]
-        st.write('Base value (average prediction):', sv.base_values)
-        st.write('Model prediction for row:', model.predict(X_test.iloc[[idx]])[0])
-
-        st.write('Waterfall plot (local)')
-        figw = plt.figure(figsize=(8,6))
-        shap.plots.waterfall(sv)
-        st.pyplot(figw)
-
-        st.write('Decision plot (local)')
-        figdec = plt.figure(figsize=(10,4))
-        shap.decision_plot(sv.base_values, sv.values, X_test.iloc[idx], show=False)
-        st.pyplot(figdec)
-
-        st.success('SHAP visualizations rendered')
+row_values = np.asarray(shap_arrays['values'][idx], dtype=np.float64)
+base_value = float(shap_arrays['base_values'][idx])
+st.write('Base value (average prediction):', base_value)
+st.write('Model prediction for row:', model.predict(X_test.iloc[[idx]])[0])
+
+col_waterfall, col_decision = st.columns(2)
+with col_waterfall:
+    st.write('Waterfall plot (local)')
+    st.plotly_chart(waterfall_figure(row_values, base_value, X_test.iloc[idx].to_numpy(), feature_names),
+                    use_container_width=True)
+with col_decision:
+    st.write('Decision plot (local)')
+    st.plotly_chart(decision_figure(row_values, base_value, feature_names, top_features(aggregates, feature_names)),
+                    use_container_width=True)
@@ -0,0 +1,39 @@
+import streamlit as st
+import pandas as pd
+
+from utils import *
+
+st.set_page_config(page_title='Admin', layout='wide')
+
+st.title('🛠️ Admin')
+st.write('Runtime state of this server process: loaded artifacts, prediction cache and request batching.')
+
+st.subheader('Loaded artifacts')
+artifacts = loaded_artifacts()
+if artifacts:
+    st.dataframe(pd.DataFrame(artifacts))
+else:
+    st.write('No artifact loaded yet.')
+
+st.subheader('Prediction cache')
+prediction_cache = load_prediction_cache()
+stats = prediction_cache.stats()
+col1, col2, col3, col4 = st.columns(4)
+col1.metric('Hit rate', f"{stats['hit_rate']:.1%}")
+col2.metric('Entries', f"{stats['entries']:,} / {stats['max_entries']:,}")
+col3.metric('Memory', f"{stats['bytes'] / 2**20:.2f} / {stats['max_bytes'] / 2**20:.0f} MB")
+col4.metric('TTL', f"{stats['ttl']:.0f} s")
+st.dataframe(pd.DataFrame([{k: stats[k] for k in ['hits', 'misses', 'bypassed', 'evictions', 'expirations', 'invalidations']}]))
+if st.button('Clear prediction cache'):
+    prediction_cache.clear()
+    st.rerun()
+
+st.subheader('Request batching')
+metrics = serving_metrics()
+if metrics:
+    st.dataframe(pd.DataFrame(metrics).T.drop(columns='batch_size_histogram'))
+    for name, m in metrics.items():
+        st.caption(f'{name}: number of batches by batch size')
+        st.bar_chart(pd.Series(m['batch_size_histogram'], name='batches'))
+else:
+    st.write('No single predictions served yet.')
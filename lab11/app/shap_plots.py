@@ -0,0 +1,171 @@
+# Plotly views of a SHAP store.
+#
+# The global plots are drawn from aggregates computed once per store and saved next to it
+# (aggregates.npz), so their size and render time do not depend on the number of rows:
+#   - mean |SHAP| per feature (bar)
+#   - per-feature histograms of SHAP values, with the mean (normalised) feature value per bin (beeswarm)
+#   - per-feature quantile bins of the feature value, with mean and 10-90% band of SHAP (dependence)
+import os
+
+import numpy as np
+import plotly.graph_objects as go
+
+AGGREGATES_FILE = 'aggregates.npz'
+N_SHAP_BINS = 60
+N_DEPENDENCE_BINS = 30
+CHUNK_ROWS = 1_000_000
+
+
+def _normalise(x):
+    # feature value -> [0, 1] for colouring, clipped at the 5th/95th percentiles like shap's beeswarm
+    lo, hi = np.nanpercentile(x, [5, 95])
+    if hi <= lo:
+        lo, hi = np.nanmin(x), np.nanmax(x)
+    return np.clip((x - lo) / (hi - lo), 0, 1) if hi > lo else np.full(len(x), 0.5)
+
+def _dependence_bins(x, n_bins):
+    uniques = np.unique(x[~np.isnan(x)])
+    if len(uniques) <= n_bins:
+        # discrete feature: one bin per value
+        edges = np.append(uniques, uniques[-1] + 1)
+    else:
+        edges = np.unique(np.nanquantile(x, np.linspace(0, 1, n_bins + 1)))
+    return edges
+
+def compute_aggregates(values, X):
+    # values: (N, F) SHAP values (may be a memmap); X: (N, F) feature values
+    n_rows, n_features = values.shape
+    mean_abs = np.zeros(n_features)
+    for start in range(0, n_rows, CHUNK_ROWS):
+        mean_abs += np.abs(values[start:start + CHUNK_ROWS]).sum(axis=0, dtype=np.float64)
+    mean_abs /= max(n_rows, 1)
+
+    shap_edges = np.zeros((n_features, N_SHAP_BINS + 1))
+    shap_counts = np.zeros((n_features, N_SHAP_BINS))
+    shap_color = np.full((n_features, N_SHAP_BINS), np.nan)
+    dep_x = np.full((n_features, N_DEPENDENCE_BINS), np.nan)
+    dep_mean = np.full((n_features, N_DEPENDENCE_BINS), np.nan)
+    dep_lo = np.full((n_features, N_DEPENDENCE_BINS), np.nan)
+    dep_hi = np.full((n_features, N_DEPENDENCE_BINS), np.nan)
+    dep_count = np.zeros((n_features, N_DEPENDENCE_BINS))
+
+    for j in range(n_features):
+        v = np.asarray(values[:, j], dtype=np.float64)
+        x = np.asarray(X[:, j], dtype=np.float64)
+
+        # beeswarm density: SHAP histogram + mean normalised feature value per bin
+        lo, hi = v.min(), v.max()
+        edges = np.linspace(lo, hi if hi > lo else lo + 1, N_SHAP_BINS + 1)
+        bins = np.clip(np.searchsorted(edges, v, side='right') - 1, 0, N_SHAP_BINS - 1)
+        counts = np.bincount(bins, minlength=N_SHAP_BINS)
+        color_sum = np.bincount(bins, weights=np.nan_to_num(_normalise(x), nan=0.5), minlength=N_SHAP_BINS)
+        shap_edges[j] = edges
+        shap_counts[j] = counts
+        shap_color[j] = np.divide(color_sum, counts, out=np.full(N_SHAP_BINS, np.nan), where=counts > 0)
+
+        # dependence summary: SHAP by feature-value bin
+        x_edges = _dependence_bins(x, N_DEPENDENCE_BINS)
+        x_bins = np.clip(np.searchsorted(x_edges, x, side='right') - 1, 0, len(x_edges) - 2)
+        order = np.argsort(x_bins, kind='stable')
+        splits = np.searchsorted(x_bins[order], np.arange(1, len(x_edges) - 1))
+        for b, group in enumerate(np.split(order, splits)):
+            if len(group) == 0:
+                continue
+            dep_x[j, b] = x[group].mean()
+            dep_mean[j, b] = v[group].mean()
+            dep_lo[j, b], dep_hi[j, b] = np.percentile(v[group], [10, 90])
+            dep_count[j, b] = len(group)
+
+    return dict(mean_abs=mean_abs, shap_edges=shap_edges, shap_counts=shap_counts, shap_color=shap_color,
+                dep_x=dep_x, dep_mean=dep_mean, dep_lo=dep_lo, dep_hi=dep_hi, dep_count=dep_count)
+
+def load_aggregates(store_path, rows_sha256, values, X):
+    # reuse the saved aggregates when they were computed from the same rows, otherwise recompute and save
+    path = os.path.join(store_path, AGGREGATES_FILE)
+    if os.path.exists(path):
+        with np.load(path) as saved:
+            if str(saved['rows_sha256']) == rows_sha256:
+                return {k: saved[k] for k in saved.files if k != 'rows_sha256'}
+    aggregates = compute_aggregates(values, X)
+    tmp = path + '.tmp.npz'
+    np.savez(tmp, rows_sha256=rows_sha256, **aggregates)
+    os.replace(tmp, path)
+    return aggregates
+
+def top_features(aggregates, feature_names, k=None):
+    order = np.argsort(aggregates['mean_abs'])[::-1]
+    return [feature_names[i] for i in order[:k]]
+
+
+def importance_figure(aggregates, feature_names):
+    order = np.argsort(aggregates['mean_abs'])
+    fig = go.Figure(go.Bar(x=aggregates['mean_abs'][order], y=[feature_names[i] for i in order], orientation='h'))
+    fig.update_layout(title='Mean |SHAP value| (average impact on predicted price)', xaxis_title='mean |SHAP|',
+                      height=80 + 40 * len(feature_names))
+    return fig
+
+def beeswarm_figure(aggregates, feature_names, colorscale):
+    order = np.argsort(aggregates['mean_abs'])
+    edges, counts, color = aggregates['shap_edges'], aggregates['shap_counts'], aggregates['shap_color']
+    xs, ys, sizes, colors, texts = [], [], [], [], []
+    for row, j in enumerate(order):
+        keep = counts[j] > 0
+        centers = (edges[j, :-1] + edges[j, 1:]) / 2
+        xs.append(centers[keep])
+        ys.append(np.full(keep.sum(), row))
+        sizes.append(counts[j, keep])
+        colors.append(color[j, keep])
+        texts.extend(f'{feature_names[j]}: {int(c):,} rows' for c in counts[j, keep])
+    sizes = np.concatenate(sizes)
+
+    fig = go.Figure(go.Scatter(
+        x=np.concatenate(xs), y=np.concatenate(ys), mode='markers', text=texts,
+        hovertemplate='%{text}<br>SHAP ≈ %{x:,.0f}<extra></extra>',
+        marker=dict(size=4 + 22 * np.sqrt(sizes / sizes.max()), color=np.concatenate(colors),
+                    colorscale=colorscale, cmin=0, cmax=1, opacity=0.8,
+                    colorbar=dict(title='Feature value', tickvals=[0, 1], ticktext=['Low', 'High'])),
+    ))
+    fig.add_vline(x=0, line_color='grey')
+    fig.update_layout(title='SHAP value distribution per feature (marker size = number of rows)',
+                      xaxis_title='SHAP value (impact on predicted price)',
+                      yaxis=dict(tickvals=list(range(len(order))), ticktext=[feature_names[j] for j in order]),
+                      height=80 + 50 * len(feature_names))
+    return fig
+
+def dependence_figure(aggregates, feature_names, feature):
+    j = feature_names.index(feature)
+    keep = aggregates['dep_count'][j] > 0
+    x = aggregates['dep_x'][j, keep]
+    fig = go.Figure([
+        go.Scatter(x=np.concatenate([x, x[::-1]]),
+                   y=np.concatenate([aggregates['dep_hi'][j, keep], aggregates['dep_lo'][j, keep][::-1]]),
+                   fill='toself', line=dict(width=0), fillcolor='rgba(116,173,209,0.35)',
+                   name='10-90% of rows', hoverinfo='skip'),
+        go.Scatter(x=x, y=aggregates['dep_mean'][j, keep], mode='lines+markers', name='mean SHAP',
+                   line=dict(color='rgb(215,48,39)'), customdata=aggregates['dep_count'][j, keep],
+                   hovertemplate=f'{feature}=%{{x:,.2f}}<br>mean SHAP=%{{y:,.0f}}<br>%{{customdata:,}} rows<extra></extra>'),
+    ])
+    fig.add_hline(y=0, line_color='grey')
+    fig.update_layout(title=f'Dependence of SHAP value on {feature}', xaxis_title=feature, yaxis_title='SHAP value')
+    return fig
+
+def waterfall_figure(values, base_value, data, feature_names):
+    order = np.argsort(np.abs(values))
+    fig = go.Figure(go.Waterfall(
+        orientation='h', measure=['relative'] * len(order), base=base_value,
+        y=[f'{feature_names[i]} = {data[i]:g}' for i in order], x=values[order],
+        decreasing={'marker': {'color': 'rgb(69,117,180)'}}, increasing={'marker': {'color': 'rgb(215,48,39)'}},
+    ))
+    fig.update_layout(title=f'Base value {base_value:,.0f} → prediction {base_value + values.sum():,.0f}',
+                      xaxis_title='Predicted price', height=80 + 45 * len(order))
+    return fig
+
+def decision_figure(values, base_value, feature_names, order):
+    # cumulative prediction as features are added in global-importance order (least important first)
+    idx = [feature_names.index(f) for f in order][::-1]
+    path = base_value + np.concatenate([[0], np.cumsum(values[idx])])
+    fig = go.Figure(go.Scatter(x=path, y=['base value'] + [feature_names[i] for i in idx], mode='lines+markers',
+                               line=dict(color='rgb(215,48,39)')))
+    fig.add_vline(x=base_value, line_dash='dash', line_color='grey')
+    fig.update_layout(title='Decision path', xaxis_title='Model output (price)', height=80 + 45 * len(idx))
+    return fig
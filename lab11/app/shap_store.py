@@ -0,0 +1,188 @@
+# Offline SHAP store for the AutoValuator model.
+#
+# SHAP values, base values and interaction values for X_test are computed with
+# shap.TreeExplainer and saved as .npy files under shap_store/<model version>/, where the
+# version is a hash of the trained model. The page memory-maps them instead of running the
+# explainer. When rows are appended to X_test, only the new rows are explained and appended.
+# A store is only served for the exact rows it was built from (their hash is compared once per
+# X_test file version). Interaction values are optional: a store built without them drops any
+# interaction_values.npy left over from an earlier build.
+#
+# Build or update (run from lab11/, like the app):
+#   python app/shap_store.py [--no-interactions]
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+import weakref
+
+import numpy as np
+
+STORE_ROOT = 'shap_store'
+STORE_FORMAT_VERSION = 1
+ARRAYS = ['values', 'base_values', 'interaction_values']
+
+
+_model_versions = weakref.WeakKeyDictionary()  # model object -> version
+_rows_checks = {}  # (store, rows_sha256, X file, mtime_ns, size) -> whether the rows match
+
+def model_version(model):
+    # serializing the booster takes a while: computed once per model object
+    try:
+        return _model_versions[model]
+    except (KeyError, TypeError):
+        pass
+    booster = getattr(model, 'booster_', model)
+    if hasattr(booster, 'model_to_string'):
+        payload = booster.model_to_string().encode()
+    else:
+        payload = pickle.dumps(model)
+    version = hashlib.sha256(payload).hexdigest()[:16]
+    try:
+        _model_versions[model] = version
+    except TypeError:
+        pass  # not weak-referenceable
+    return version
+
+def rows_sha256(X):
+    return hashlib.sha256(np.ascontiguousarray(np.asarray(X, dtype=np.float64)).tobytes()).hexdigest()
+
+def store_dir(model, root=STORE_ROOT):
+    return os.path.join(root, model_version(model))
+
+def _read_manifest(path):
+    try:
+        with open(os.path.join(path, 'manifest.json')) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def _explain(model, X, interactions):
+    import shap
+
+    explainer = shap.TreeExplainer(model)
+    values = np.asarray(explainer.shap_values(X), dtype=np.float32)
+    base_values = np.full(len(X), float(np.ravel(explainer.expected_value)[0]), dtype=np.float32)
+    arrays = {'values': values, 'base_values': base_values}
+    if interactions:
+        arrays['interaction_values'] = np.asarray(explainer.shap_interaction_values(X), dtype=np.float32)
+    return arrays
+
+def _write_arrays(path, old, new):
+    # old: memory-mapped arrays already in the store (or None); new: arrays for the appended rows
+    for name, array in new.items():
+        n_old = 0 if old is None else len(old[name])
+        tmp = os.path.join(path, f'{name}.npy.tmp')
+        out = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.float32,
+                                        shape=(n_old + len(array),) + array.shape[1:])
+        if n_old:
+            out[:n_old] = old[name]
+        out[n_old:] = array
+        out.flush()
+        del out
+        os.replace(tmp, os.path.join(path, f'{name}.npy'))
+
+def build_shap_store(model, X, root=STORE_ROOT, interactions=True):
+    # interactions=False also reuses a store built with them (its interaction values are dropped)
+    path = store_dir(model, root)
+    os.makedirs(path, exist_ok=True)
+    feature_names = [str(c) for c in X.columns]
+    X_values = X.to_numpy(dtype=np.float64)
+
+    manifest = _read_manifest(path)
+    start = 0
+    if manifest is not None:
+        n_rows = manifest['n_rows']
+        reusable = (manifest['format_version'] == STORE_FORMAT_VERSION
+                    and manifest['feature_names'] == feature_names
+                    and (manifest['interactions'] or not interactions)
+                    and n_rows <= len(X_values)
+                    and manifest['rows_sha256'] == rows_sha256(X_values[:n_rows]))
+        if reusable and n_rows == len(X_values) and manifest['interactions'] == interactions:
+            return path
+        start = n_rows if reusable else 0
+
+    begin = time.perf_counter()
+    if start < len(X_values):
+        new = _explain(model, X.iloc[start:], interactions)
+        old = load_arrays(path) if start else None
+        _write_arrays(path, old, new)
+    # (start == len(X): up to date, only the interaction values of a full build are dropped)
+    if not interactions and os.path.exists(os.path.join(path, 'interaction_values.npy')):
+        os.remove(os.path.join(path, 'interaction_values.npy'))
+
+    manifest = {
+        'format_version': STORE_FORMAT_VERSION,
+        'model_version': os.path.basename(path),
+        'feature_names': feature_names,
+        'interactions': interactions,
+        'n_rows': len(X_values),
+        'rows_sha256': rows_sha256(X_values),
+        'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'last_update': {'rows_added': len(X_values) - start, 'seconds': round(time.perf_counter() - begin, 3)},
+    }
+    # the manifest is written last: a store is only considered valid once it exists
+    with open(os.path.join(path, 'manifest.json.tmp'), 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(os.path.join(path, 'manifest.json.tmp'), os.path.join(path, 'manifest.json'))
+    return path
+
+def load_arrays(path):
+    return {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+            for name in ARRAYS if os.path.exists(os.path.join(path, f'{name}.npy'))}
+
+def _rows_match(path, manifest, X, X_path):
+    # hashing X_test is the expensive part: the result is kept per store and X_test file version
+    key = None
+    if X_path is not None and os.path.exists(X_path):
+        stat = os.stat(X_path)
+        key = (path, manifest['rows_sha256'], os.path.abspath(X_path), stat.st_mtime_ns, stat.st_size)
+        if key in _rows_checks:
+            return _rows_checks[key]
+    match = manifest['rows_sha256'] == rows_sha256(X.to_numpy(dtype=np.float64))
+    if key is not None:
+        if len(_rows_checks) >= 64:
+            _rows_checks.clear()
+        _rows_checks[key] = match
+    return match
+
+def load_shap_store(model, X=None, root=STORE_ROOT, X_path=None):
+    # returns (manifest, memory-mapped arrays), or None when there is no store for this model
+    # (or, if X is given, when the store was not built from exactly these rows); X_path: the file
+    # X was loaded from, whose stat keys the cached row comparison
+    path = store_dir(model, root)
+    manifest = _read_manifest(path)
+    if manifest is None:
+        return None
+    if X is not None and (manifest['n_rows'] != len(X) or manifest['feature_names'] != [str(c) for c in X.columns]
+                          or not _rows_match(path, manifest, X, X_path)):
+        return None
+    return manifest, load_arrays(path)
+
+def prune_old_versions(model, root=STORE_ROOT):
+    keep = model_version(model)
+    for name in os.listdir(root):
+        if name != keep and os.path.isdir(os.path.join(root, name)):
+            shutil.rmtree(os.path.join(root, name))
+
+
+if __name__ == '__main__':
+    from utils import load_model, load_X_test
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', default='models/model.pkl')
+    parser.add_argument('--X-test', default='X_test.csv')
+    parser.add_argument('--no-interactions', action='store_true')
+    parser.add_argument('--prune', action='store_true', help='delete stores of other model versions')
+    args = parser.parse_args()
+
+    model = load_model(args.model)['model']
+    path = build_shap_store(model, load_X_test(args.X_test), interactions=not args.no_interactions)
+    if args.prune:
+        prune_old_versions(model)
+    with open(os.path.join(path, 'manifest.json')) as f:
+        manifest = json.load(f)
+    print(f"{path}: {manifest['n_rows']:,} rows, last update {manifest['last_update']}")
@@ -0,0 +1,234 @@
+# Hyperparameter search and training for the AutoValuator LightGBM price model.
+#
+# Replaces the notebook's GridSearchCV cells. The data preparation is the notebook's (price/
+# mileage/engV/year filters, rare brands grouped into 'Other' with the saved category map,
+# LabelEncoders, train/test split with random_state=42). The search is successive halving over a
+# parameter grid with K-fold CV: every candidate gets a small boosting budget, the best 1/eta
+# move on with eta times the budget, and each fit stops early once the validation RMSE stops
+# improving (so n_estimators is learned, not searched); candidates that already stopped early
+# keep their result instead of being refit with the larger budget.
+#
+# Parallelism: `jobs` candidates are trained at once in threads (LightGBM releases the GIL) and
+# each fit gets cpu_count // jobs LightGBM threads, so outer and inner parallelism never
+# oversubscribe the cores. Each worker thread constructs the binned lgb.Dataset of every fold once
+# and reuses it for all its trials. Every fit is recorded with its timing in models/trials.csv.
+#
+# The winner is refit on the full training set and saved in the format load_model() consumes
+# ({'model': LGBMRegressor, 'le_car': ..., 'le_body': ..., 'le_engType': ..., 'le_drive': ...}),
+# optionally with its pickle-free bundle. Run from lab11/, like the app:
+#   python app/train.py --jobs 2 --folds 3 --bundle
+import argparse
+import itertools
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import KFold, train_test_split
+from sklearn.preprocessing import LabelEncoder
+
+from categories import apply_category_map, get_category_map
+from filters import FilterSpec, compile_mask
+
+from shared.autovaluator_encoding import CATEGORICAL_ENCODERS, FEATURE_COLUMNS, YES_VALUES
+from shared.model_format import export_pickle
+
+PARAM_GRID = {
+    'max_depth': [2, 8, 12, -1],
+    'num_leaves': [15, 31, 63],
+    'learning_rate': [0.05, 0.1],
+    'min_child_samples': [10, 20, 40],
+}
+BASE_PARAMS = {'objective': 'regression', 'metric': 'rmse', 'force_row_wise': True, 'verbose': -1, 'seed': 42}
+MIN_ROUNDS = 50
+MAX_ROUNDS = 2000
+ETA = 3
+EARLY_STOPPING_ROUNDS = 30
+
+
+# --- data ---------------------------------------------------------------------------------------
+
+def prepare_data(path='car_ad_display.csv', test_size=0.25, random_state=42):
+    # -> X_train, X_test, y_train, y_test, encoders (as in the notebook)
+    df = pd.read_csv(path, encoding='ISO-8859-1', sep=';').drop(columns='Unnamed: 0', errors='ignore')
+    df = df.dropna()
+    df = apply_category_map(df, get_category_map(df, ['car', 'model'], 10))
+    df = df[compile_mask(df, FilterSpec())]  # the notebook's outlier thresholds, in one pass
+
+    encoders = {}
+    X = pd.DataFrame(index=df.index)
+    for column in FEATURE_COLUMNS:
+        if column in CATEGORICAL_ENCODERS:
+            encoder = encoders[CATEGORICAL_ENCODERS[column]] = LabelEncoder()
+            X[column] = encoder.fit_transform(df[column].astype(str))
+        elif column == 'registration':
+            X[column] = np.where(df[column].isin(YES_VALUES), 1, 0)
+        else:
+            X[column] = df[column]
+    y = df['price']
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
+    return X_train, X_test, y_train, y_test, encoders
+
+
+class DatasetCache:
+    # binned train/validation lgb.Datasets per CV fold, built once per worker thread (a constructed
+    # Dataset is not shared between threads training at the same time) and reused by every trial
+    def __init__(self, X, y, folds, max_bin=255):
+        self.X = X.to_numpy(dtype=np.float64)
+        self.y = y.to_numpy(dtype=np.float64)
+        self.splits = list(KFold(folds, shuffle=True, random_state=42).split(self.X))
+        # feature_pre_filter off: trials vary min_child_samples on the same binned data
+        self.params = {'max_bin': max_bin, 'feature_pre_filter': False, 'verbose': -1}
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.builds = 0
+        self.build_seconds = 0.0
+
+    def get(self, fold):
+        cache = self.local.__dict__.setdefault('datasets', {})
+        if fold not in cache:
+            start = time.perf_counter()
+            train_idx, valid_idx = self.splits[fold]
+            train = lgb.Dataset(self.X[train_idx], self.y[train_idx], feature_name=FEATURE_COLUMNS,
+                                params=self.params, free_raw_data=False).construct()
+            valid = lgb.Dataset(self.X[valid_idx], self.y[valid_idx], reference=train,
+                                params=self.params, free_raw_data=False).construct()
+            cache[fold] = (train, valid)
+            with self.lock:
+                self.builds += 1
+                self.build_seconds += time.perf_counter() - start
+        return cache[fold]
+
+
+# --- search -------------------------------------------------------------------------------------
+
+def thread_allocation(jobs, cpus=None):
+    # (outer trial workers, LightGBM threads per fit) without oversubscribing the cores
+    cpus = cpus or os.cpu_count() or 1
+    jobs = max(1, min(jobs, cpus))
+    return jobs, max(1, cpus // jobs)
+
+def parameter_grid(grid):
+    keys = list(grid)
+    candidates = [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+    # trees of depth d have at most 2**d leaves: larger num_leaves only duplicate a candidate
+    return [p for p in candidates
+            if p.get('max_depth', -1) <= 0 or p.get('num_leaves', 0) <= 2 ** p['max_depth']]
+
+def _fit_candidate(datasets, candidate_id, params, rounds, rung, num_threads):
+    # K-fold CV of one candidate at one budget -> trial record
+    start = time.perf_counter()
+    scores, iterations, stopped = [], [], []
+    for fold in range(len(datasets.splits)):
+        train, valid = datasets.get(fold)
+        booster = lgb.train({**BASE_PARAMS, **params, 'num_threads': num_threads}, train, num_boost_round=rounds,
+                            valid_sets=[valid], callbacks=[lgb.early_stopping(EARLY_STOPPING_ROUNDS, verbose=False)])
+        scores.append(booster.best_score['valid_0']['rmse'])
+        iterations.append(booster.best_iteration or rounds)
+        stopped.append(booster.current_iteration() < rounds)
+    return {'candidate': candidate_id, 'rung': rung, 'rounds': rounds, **params,
+            'cv_rmse': float(np.mean(scores)), 'cv_rmse_std': float(np.std(scores)),
+            'best_iteration': int(np.mean(iterations)), 'stopped_early': all(stopped), 'refit': True,
+            'seconds': time.perf_counter() - start}
+
+def _carry_over(result, rounds, rung):
+    # a candidate that early-stopped on every fold would stop at the same tree with a larger budget
+    return {**result, 'rung': rung, 'rounds': rounds, 'refit': False, 'seconds': 0.0}
+
+def successive_halving(X, y, grid=PARAM_GRID, folds=3, jobs=1, eta=ETA, min_rounds=MIN_ROUNDS,
+                       max_rounds=MAX_ROUNDS, log=print):
+    # -> (best trial, DataFrame of all trials)
+    jobs, num_threads = thread_allocation(jobs)
+    datasets = DatasetCache(X, y, folds)
+    candidates = dict(enumerate(parameter_grid(grid)))
+    previous = {}  # candidate -> its result at the last rung
+    trials = []
+    rounds, rung = min_rounds, 0
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while True:
+            start = time.perf_counter()
+            done = {i: _carry_over(previous[i], rounds, rung) for i in candidates
+                    if i in previous and previous[i]['stopped_early']}
+            todo = [(i, params) for i, params in candidates.items() if i not in done]
+            results = list(done.values()) + list(pool.map(
+                lambda item: _fit_candidate(datasets, item[0], item[1], rounds, rung, num_threads), todo))
+            trials += results
+            previous = {r['candidate']: r for r in results}
+            results.sort(key=lambda r: r['cv_rmse'])
+            log(f"rung {rung}: {len(results)} candidates x {rounds} rounds ({len(todo)} fitted), best CV RMSE "
+                f"{results[0]['cv_rmse']:,.2f} ({time.perf_counter() - start:.1f}s)")
+            if len(results) == 1 or rounds >= max_rounds:
+                break
+            candidates = {r['candidate']: candidates[r['candidate']] for r in results[:max(1, len(results) // eta)]}
+            rounds, rung = min(rounds * eta, max_rounds), rung + 1
+
+    trials = pd.DataFrame(trials)
+    trials.attrs.update(dataset_builds=datasets.builds, dataset_seconds=datasets.build_seconds,
+                        jobs=jobs, num_threads=num_threads)
+    return results[0], trials
+
+
+# --- final model --------------------------------------------------------------------------------
+
+def fit_final(X_train, y_train, best, num_threads=None):
+    params = {k: best[k] for k in PARAM_GRID if k in best}
+    model = lgb.LGBMRegressor(random_state=42, force_row_wise=True, verbose=-1, n_estimators=best['best_iteration'],
+                              n_jobs=num_threads or os.cpu_count(), **params)
+    return model.fit(X_train, y_train)
+
+def save_model(model, encoders, path='models/model.pkl', bundle=False):
+    # written to a temporary file and moved into place, so the app never reads a partial pickle
+    data = {'model': model, **encoders}
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as file:
+        pickle.dump(data, file)
+    os.replace(tmp, path)
+    if bundle:
+        export_pickle(path)
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tune and train the AutoValuator LightGBM model.')
+    parser.add_argument('--data', default='car_ad_display.csv')
+    parser.add_argument('--output', default='models/model.pkl')
+    parser.add_argument('--trials', default='models/trials.csv', help='per-fit timings and CV scores')
+    parser.add_argument('--folds', type=int, default=3)
+    parser.add_argument('--jobs', type=int, default=2, help='candidates trained in parallel')
+    parser.add_argument('--eta', type=int, default=ETA)
+    parser.add_argument('--min-rounds', type=int, default=MIN_ROUNDS)
+    parser.add_argument('--max-rounds', type=int, default=MAX_ROUNDS)
+    parser.add_argument('--bundle', action='store_true', help='also export the pickle-free bundle')
+    parser.add_argument('--test-set', help='write the encoded test features here (e.g. X_test.csv)')
+    args = parser.parse_args()
+
+    X_train, X_test, y_train, y_test, encoders = prepare_data(args.data)
+    print(f'{len(X_train)} training rows, {len(X_test)} test rows')
+
+    start = time.perf_counter()
+    best, trials = successive_halving(X_train, y_train, folds=args.folds, jobs=args.jobs, eta=args.eta,
+                                      min_rounds=args.min_rounds, max_rounds=args.max_rounds)
+    print(f"search: {len(trials)} trials in {time.perf_counter() - start:.1f}s "
+          f"({trials.attrs['jobs']} workers x {trials.attrs['num_threads']} threads, "
+          f"{trials.attrs['dataset_builds']} dataset builds in {trials.attrs['dataset_seconds']:.2f}s)")
+    print('best:', {k: best[k] for k in PARAM_GRID}, f"{best['best_iteration']} trees, CV RMSE {best['cv_rmse']:,.2f}")
+    os.makedirs(os.path.dirname(args.trials) or '.', exist_ok=True)
+    trials.to_csv(args.trials, index=False)
+
+    model = fit_final(X_train, y_train, best)
+    y_pred = model.predict(X_test)
+    print(f"test RMSE {np.sqrt(mean_squared_error(y_test, y_pred)):,.2f}, R2 {r2_score(y_test, y_pred):.4f}")
+    save_model(model, encoders, args.output, args.bundle)
+    if args.test_set:
+        X_test.to_csv(args.test_set)
+    print(f'saved {args.output}' + (' (+ bundle)' if args.bundle else ''))
+
+
+if __name__ == '__main__':
+    main()
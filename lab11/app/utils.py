@@ -1,9 +1,22 @@
 import streamlit as st
 import pandas as pd
 import pickle
-import shap
 import numpy as np
-import time
+import math
+import os
+
+from aggregates import get_summary
+from datastore import load_dataset, source_stat
+from downsample import box_stats, downsample_scatter
+from filters import FilterSpec, SortedIndex
+from shap_plots import load_aggregates
+from shap_store import build_shap_store, load_shap_store, store_dir
+
+from shared.artifacts import artifact_version, get_artifact, registry
+from shared.autovaluator_encoding import CATEGORICAL_ENCODERS, FEATURE_COLUMNS, YES_VALUES, CodeTable, build_code_tables, encode_features
+from shared.coalescer import coalescer_metrics, get_coalescer
+from shared.prediction_cache import PredictionCache
+from shared.model_format import load_resolved, resolve
 
 # from https://plotly.com/python/colorscales/
 my_colorscale = [[0.0, "rgb(49,54,149)"],
@@ -17,52 +30,92 @@ my_colorscale = [[0.0, "rgb(49,54,149)"],
         [0.8888888888888888, "rgb(215,48,39)"],
         [1.0, "rgb(165,0,38)"]]
 
-@st.cache_resource
-def shorten_categories(categories, cutoff):
-    categorical_map = {}
-    for i in range(len(categories)):
-        if categories.values[i] >= cutoff:
-            categorical_map[categories.index[i]] = categories.index[i]
-        else:
-            categorical_map[categories.index[i]] = 'Other'
-    return categorical_map
-
-@st.cache_data
-def load_data(path='car_ad_display.csv'):
-    time.sleep(2)
-    
-    df = pd.read_csv(path, encoding='ISO-8859-1', sep=';')
+# loaded from the memory-mapped Arrow cache (see datastore.py); shared read-only across sessions.
+# The frame and its version come from the same cached read, keyed on the files' mtime/size: a
+# rerun costs one stat() per file, and a changed file is picked up (frame and version together).
+@st.cache_resource(max_entries=8)
+def _load_dataset(path, source_stat):
+    return load_dataset(path)
 
-    if 'Unnamed: 0' in df.columns:
-        df = df.drop(columns='Unnamed: 0')
+def load_versioned_data(path='car_ad_display.csv'):
+    # -> (dataset version, DataFrame)
+    return _load_dataset(path, source_stat(path))
 
-    car_map = shorten_categories(df.car.value_counts(), 10)
-    df['car'] = df['car'].map(car_map)
-
-    model_map = shorten_categories(df.model.value_counts(), 10)
-    df['model'] = df['model'].map(model_map)
+def load_data(path='car_ad_display.csv'):
+    return load_versioned_data(path)[1]
 
-    return df
+def load_data_version(path='car_ad_display.csv'):
+    return load_versioned_data(path)[0]
 
-@st.cache_data
 def load_data_clean(path='car_ad_display_clean.csv'):
-    df = pd.read_csv(path, encoding='ISO-8859-1', sep=',')
-    if 'Unnamed: 0' in df.columns:
-        df = df.drop(columns='Unnamed: 0')
-    return df
+    return load_versioned_data(path)[1]
 
-@st.cache_data
 def load_X_test(path='X_test.csv'):
-    df = pd.read_csv(path, encoding='ISO-8859-1', sep=',')
-    if 'Unnamed: 0' in df.columns:
-        df = df.drop(columns='Unnamed: 0')
-    return df
+    return load_versioned_data(path)[1]
+
+@st.cache_resource
+def load_sorted_index(data_version, _df):
+    return SortedIndex(_df, list(FilterSpec().bounds()))
+
+@st.cache_resource(max_entries=16)
+def load_filtered_rows(data_version, filter_key, _spec, _df):
+    # mask and row positions for one filter spec (filter_key = spec.key()); only these are cached,
+    # not a filtered DataFrame copy per entry
+    mask = load_sorted_index(data_version, _df).mask(_spec)
+    rows = np.flatnonzero(mask)
+    mask.flags.writeable = False
+    rows.flags.writeable = False
+    return mask, rows
+
+@st.cache_resource(max_entries=32)
+def load_summary(data_version, summary_key, _df, _mask, path='car_ad_display.csv'):
+    # page aggregates ('groups', or a filter key with its mask). The group stats and the default
+    # filter are materialized on disk next to the dataset cache and updated incrementally on appends;
+    # other slider positions only live in this cache.
+    persist = summary_key in ('groups', FilterSpec().key())
+    return get_summary(_df, _mask, f'{os.path.splitext(path)[0]}.summary-{summary_key}.pkl' if persist else None)
+
+def filter_sidebar(df, defaults=FilterSpec()):
+    st.sidebar.header('Outlier filter')
+    # bounds rounded out to the step, so the positions are multiples of it (e.g. the default 1000)
+    price_step = 500.0
+    price_lo = math.floor(float(df['price'].min()) / price_step) * price_step
+    price_hi = math.ceil(float(df['price'].max()) / price_step) * price_step
+    price_min, price_max = st.sidebar.slider(
+        'Price', min_value=price_lo, max_value=price_hi, step=price_step,
+        value=(float(max(price_lo, defaults.price_min)), float(min(price_hi, defaults.price_max))))
+    mileage_max = st.sidebar.slider('Max mileage', min_value=0.0, max_value=float(df['mileage'].max()),
+                                    value=float(min(df['mileage'].max(), defaults.mileage_max)), step=10.0)
+    engV_max = st.sidebar.slider('Max engV', min_value=0.0, max_value=float(df['engV'].max()),
+                                 value=float(min(df['engV'].max(), defaults.engV_max)), step=0.1)
+    year_min = st.sidebar.slider('Min year', min_value=int(df['year'].min()), max_value=int(df['year'].max()),
+                                 value=max(int(df['year'].min()), int(defaults.year_min)))
+    return FilterSpec(price_min, price_max, mileage_max, engV_max, year_min)
+
+@st.cache_data(max_entries=256)
+def scatter_payload(data_version, filter_key, feature, target, _df):
+    # bounded-size scatter data for one subplot, cached per dataset version + filter state
+    return downsample_scatter(_df[feature].to_numpy(dtype=np.float64), _df[target].to_numpy(dtype=np.float64))
+
+@st.cache_data(max_entries=256)
+def box_payload(data_version, filter_key, feature, target, _df):
+    # quartiles/whiskers and capped outliers per category for one box subplot, cached like scatter_payload
+    return box_stats(_df[feature], _df[target])
+
+def _load_model_artifact(path):
+    data = load_resolved(path)
+    data['code_tables'] = build_code_tables(data)
+    return data
 
-@st.cache_data
 def load_model(path='models/model.pkl'):
+    # loaded once per process by the shared artifact registry and reloaded when the file changes;
+    # shared, not copied: the artifact and its code tables are read-only.
+    # The pickle-free bundle (models/model.bundle/, see shared/model_format.py) is used when present.
+    # data['model'] is then a raw lgb.Booster instead of the pickled LGBMRegressor: both have
+    # predict(X) (and _predict() unwraps booster_ anyway), but sklearn-only attributes such as
+    # feature_importances_ or get_params() exist on the pickle's model only.
     try:
-        with open(path, 'rb') as f:
-            data = pickle.load(f)
+        data = get_artifact(resolve(path)[0], loader=_load_model_artifact)
     except FileNotFoundError:
         st.error(f"Model file not found at: {path}")
         data = None
@@ -74,47 +127,54 @@ def load_model(path='models/model.pkl'):
         data = None
     return data
 
+def load_model_version(path='models/model.pkl'):
+    return artifact_version(resolve(path)[0])
+
+def load_shap_views(model, X_test, path='X_test.csv'):
+    # precomputed SHAP store (see shap_store.py) plus its plot aggregates (see shap_plots.py);
+    # None if there is no store for this model built from these X_test rows
+    stored = load_shap_store(model, X_test, X_path=path)
+    if stored is None:
+        return None
+    manifest, arrays = stored
+    aggregates = load_shap_aggregates(store_dir(model), manifest['rows_sha256'], arrays['values'], X_test)
+    return manifest, arrays, aggregates
+
 @st.cache_resource
-def get_shap_explainer(_model, X_sample):
-    # Using TreeExplainer if possible for speed; fallback to general Explainer
-    try:
-        explainer = shap.Explainer(_model)
-    except Exception:
-        explainer = shap.Explainer(_model)
-    shap_values = explainer(X_sample)
-    return explainer, shap_values
-
-@st.cache_data
-def predict_sample_data(_data, X_sample):
-
-    model = _data["model"]
-    le_car = _data["le_car"]
-    le_body = _data["le_body"]
-    le_engType = _data["le_engType"]
-    le_drive = _data["le_drive"]
-
-    df_original = load_data()
-    yes_l = ['yes', 'YES', 'Yes', 'y', 'Y']
-
-    # Apply the encoder and data type corrections:
-    X_sample[:, 0] = str(X_sample[:, 0][0] if X_sample[:, 0][0] in list(df_original['car'].unique()) else 'Other')
-    X_sample[:, 0] = le_car.transform(X_sample[:,0])
-    X_sample[:, 1] = le_body.transform(X_sample[:,1])
-    X_sample[:, 4] = le_engType.transform(X_sample[:,4])
-    X_sample[:, 5] = int(1 if X_sample[:, 5][0] in yes_l else 0)
-    X_sample[:, 7] = le_drive.transform(X_sample[:,7])
-
-    X_sample = np.array([[
-        int(X_sample[0, 0]),
-        int(X_sample[0, 1]),
-        int(X_sample[0, 2]),
-        float(X_sample[0, 3]),
-        int(X_sample[0, 4]),
-        int(X_sample[0, 5]),
-        int(X_sample[0, 6]),
-        int(X_sample[0, 7])
-    ]])
-
-    y_pred_sample = model.predict(X_sample)
-
-    return y_pred_sample[0]
\ No newline at end of file
+def load_shap_aggregates(store_path, rows_sha256, _values, _X_test):
+    return load_aggregates(store_path, rows_sha256, _values, _X_test.to_numpy(dtype=np.float64))
+
+def _predict(model, X_encoded):
+    # the LGBMRegressor wrapper re-validates its input on every call (~1ms); the booster does not
+    return getattr(model, 'booster_', model).predict(X_encoded)
+
+# resolution of the Prediction Playground's numeric sliders (the page builds them with these steps)
+PLAYGROUND_STEPS = {'year': 1, 'mileage': 10, 'engV': 0.1}
+
+@st.cache_resource
+def load_prediction_cache():
+    # bounded LRU/TTL cache of single-row prices, one per process, keyed on the encoded row (what the
+    # booster sees) snapped to the playground's slider steps
+    return PredictionCache(steps={FEATURE_COLUMNS.index(col): step for col, step in PLAYGROUND_STEPS.items()})
+
+def predict_sample_data(_data, X_sample, path='models/model.pkl'):
+    # the artifact version is part of the cache key, so a reloaded model never serves stale prices
+    model_version = load_model_version(path)
+    X_encoded = encode_features(_data["code_tables"], X_sample[:1])
+    return load_prediction_cache().get_or_compute('autovaluator', model_version, X_encoded[0],
+                                           lambda: _predict_coalesced(model_version, _data, X_encoded[0]))
+
+def _predict_coalesced(model_version, _data, x_encoded):
+    # single rows from concurrent sessions are priced together in one booster call (see shared/coalescer.py)
+    coalescer = get_coalescer(('autovaluator', model_version), lambda rows: _predict(_data["model"], np.vstack(rows)))
+    return float(coalescer.submit(x_encoded))
+
+def loaded_artifacts():
+    return registry.info()
+
+def serving_metrics():
+    # queue depth / batch size counters of the prediction coalescers, per (model, version)
+    return {f'{name} {version[:12]}': metrics for (name, version), metrics in coalescer_metrics().items()}
+
+def predict_batch(_data, X):
+    return _predict(_data["model"], encode_features(_data["code_tables"], X))
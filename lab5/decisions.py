@@ -0,0 +1,71 @@
+# ------------------------------------------------------------
+# LoanTech decision layer
+#
+# Probabilities are computed once; the cutoff is only applied afterwards, so moving the cutoff
+# never re-runs the model. For a portfolio of applicants the probabilities are sorted once
+# (ProbabilityIndex), and approvals / confusion counts at any cutoff are a binary search into the
+# sorted array plus a lookup in the cumulative count of good loans.
+# ------------------------------------------------------------
+import numpy as np
+
+
+def decide(proba, cutoff):
+    # approved when the probability reaches the cutoff (same rule as predict_sample_data)
+    return (np.asarray(proba) >= cutoff).astype(int)
+
+
+class ProbabilityIndex:
+    def __init__(self, proba, labels=None):
+        # proba: approval probabilities; labels: optional true outcomes (1 = loan approved / good)
+        proba = np.asarray(proba, dtype=np.float64)
+        order = np.argsort(proba, kind='stable')
+        self.sorted = proba[order]
+        self.n = len(proba)
+        self.has_labels = labels is not None
+        if self.has_labels:
+            labels = np.asarray(labels, dtype=np.int64)[order]
+            # positives[i]: number of positives among the i lowest probabilities
+            self.positives = np.concatenate([[0], np.cumsum(labels)])
+            self.n_positive = int(self.positives[-1])
+
+    def n_rejected(self, cutoff):
+        return int(np.searchsorted(self.sorted, cutoff, side='left'))
+
+    def n_approved(self, cutoff):
+        return self.n - self.n_rejected(cutoff)
+
+    def approval_rate(self, cutoff):
+        return self.n_approved(cutoff) / self.n if self.n else 0.0
+
+    def confusion(self, cutoff):
+        # (tn, fp, fn, tp) with approval as the positive prediction
+        if not self.has_labels:
+            raise ValueError("confusion counts need the true outcomes: build the index with labels")
+        rejected = self.n_rejected(cutoff)
+        fn = int(self.positives[rejected])
+        tn = rejected - fn
+        tp = self.n_positive - fn
+        fp = self.n - rejected - tp
+        return tn, fp, fn, tp
+
+    def metrics(self, cutoff):
+        approved = self.n_approved(cutoff)
+        metrics = {'approved': approved, 'rejected': self.n - approved, 'approval_rate': self.approval_rate(cutoff)}
+        if self.has_labels:
+            tn, fp, fn, tp = self.confusion(cutoff)
+            metrics.update(tn=tn, fp=fp, fn=fn, tp=tp,
+                           accuracy=(tp + tn) / self.n if self.n else np.nan,
+                           precision=tp / (tp + fp) if tp + fp else np.nan,
+                           recall=tp / (tp + fn) if tp + fn else np.nan)
+        return metrics
+
+    def sweep(self, cutoffs):
+        # approval counts (and confusion counts) for many cutoffs in one searchsorted call
+        cutoffs = np.asarray(cutoffs, dtype=np.float64)
+        rejected = np.searchsorted(self.sorted, cutoffs, side='left')
+        sweep = {'cutoff': cutoffs, 'approved': self.n - rejected}
+        if self.has_labels:
+            fn = self.positives[rejected]
+            tp = self.n_positive - fn
+            sweep.update(tn=rejected - fn, fp=self.n - rejected - tp, fn=fn, tp=tp)
+        return sweep
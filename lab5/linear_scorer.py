@@ -0,0 +1,66 @@
+# ------------------------------------------------------------
+# LoanTech compiled linear scorer: check and export
+#
+# The folded scorer itself (shared.loantech_scorer.LinearScorer) is shared with the inference
+# server; this module checks it against the sklearn pipeline of predict_sample_data and exports
+# the folded form as JSON.
+#
+# Usage (from lab5/): export the folded form after checking it against the sklearn pipeline
+#   python linear_scorer.py --artifacts loan_app_artifacts.pkl --output loan_app_scorer.json
+# ------------------------------------------------------------
+import argparse
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from shared.artifacts import file_sha256
+from shared.loantech_scorer import RAW_COLUMNS, LinearScorer
+
+
+def pipeline_proba(model_data, batch):
+    # reference: the sklearn pipeline of predict_sample_data
+    numeric_cols = model_data["numeric_cols"]
+    categorical_cols = model_data["categorical_cols"]
+    encoder = model_data["encoder"]
+    scaled = pd.DataFrame(model_data["scaler"].transform(batch[numeric_cols]), columns=numeric_cols, index=batch.index)
+    encoded = pd.DataFrame(encoder.transform(batch[categorical_cols]),
+                           columns=encoder.get_feature_names_out(categorical_cols), index=batch.index)
+    X = pd.concat([scaled, encoded], axis=1)[model_data["model_columns_ordered"]]
+    return model_data["model"].predict_proba(X)[:, 1]
+
+def verification_sample(model_data, n=10_000, seed=0):
+    # random numeric values around the training distribution x every category (plus an unknown one)
+    rng = np.random.default_rng(seed)
+    scaler = model_data["scaler"]
+    sample = {col: mean + scale * rng.standard_normal(n)
+              for col, mean, scale in zip(model_data["numeric_cols"], scaler.mean_, scaler.scale_)}
+    for col, categories in zip(model_data["categorical_cols"], model_data["encoder"].categories_):
+        sample[col] = rng.choice(list(categories.astype(str)) + ['<unknown>'], n)
+    return pd.DataFrame(sample)[RAW_COLUMNS]
+
+def verify(scorer, model_data, n=10_000, tol=1e-9):
+    batch = verification_sample(model_data, n)
+    expected = pipeline_proba(model_data, batch)
+    batch_error = np.abs(scorer.predict_proba_batch(batch) - expected).max()
+    rows = batch.to_numpy(dtype=object).tolist()
+    single_error = max(abs(scorer.predict_proba(row) - p) for row, p in zip(rows, expected))
+    error = max(batch_error, single_error)
+    if error > tol:
+        raise ValueError(f"Compiled scorer differs from the sklearn pipeline by {error:.3g} (tolerance {tol:g})")
+    return error
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export the LoanTech artifact as a compiled linear scorer.')
+    parser.add_argument('--artifacts', default='loan_app_artifacts.pkl')
+    parser.add_argument('--output', default='loan_app_scorer.json')
+    parser.add_argument('--tolerance', type=float, default=1e-9)
+    args = parser.parse_args()
+
+    with open(args.artifacts, 'rb') as f:
+        model_data = pickle.load(f)
+    scorer = LinearScorer.from_artifacts(model_data, file_sha256(args.artifacts))
+    error = verify(scorer, model_data, tol=args.tolerance)
+    scorer.save(args.output)
+    print(f'Wrote {args.output} (max |p - p_sklearn| = {error:.2e})')
@@ -7,9 +7,13 @@
 # UI Created with assistance from ChatGPT (GPT-5, OpenAI)
 # ------------------------------------------------------------
 
+import os
 import streamlit as st
-from utils import load_model, predict_sample_data
+from utils import load_model, load_model_version, score_sample_data, load_data, load_portfolio_index, file_key, upload_key
+from decisions import decide
 import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
 
 model_data = load_model('loan_app_artifacts.pkl')
 
@@ -20,37 +24,33 @@ st.set_page_config(page_title="Loan Approval Predictor", layout="wide")
 st.title("Loan Approval Predictor $$")
 st.write("Enter your details to predict your personal loan approval probability.")
 
-# Applicant Details Section
-st.subheader("Applicant Details")
+mode = st.radio("Mode", ["Single applicant", "Portfolio"], horizontal=True)
 
-col1, col2 = st.columns(2)
+if mode == "Single applicant":
+    # Applicant Details Section
+    st.subheader("Applicant Details")
 
-with col1:
-    gender = st.selectbox("Gender", ["Male", "Female"])
-    married = st.selectbox("Married", ["Yes", "No"])
-    dependents = st.selectbox("Dependents", ["0", "1", "2", "3+"])
-    education = st.selectbox("Education", ["Graduate", "Not Graduate"])
-    self_employed = st.selectbox("Self Employed", ["No", "Yes"])
-    applicant_income = st.number_input("Applicant Income ($)", min_value=150, step=100, max_value=81000, value=6000)
-    coapplicant_income = st.number_input("Co-Applicant Income ($)", min_value=0, step=100, max_value=41700, value=8000)
+    col1, col2 = st.columns(2)
 
-with col2:
-    property_area = st.selectbox("Property Area", ["Urban", "Semiurban", "Rural"])
-    credit_history = st.selectbox("Credit History Available?", ["Yes (1.0)", "No (0.0)"])
-    loan_amount = st.number_input("Loan Amount ($k)", min_value=9, step=1, max_value=700, value=150)
-    loan_term = st.number_input("Loan Term (Months)", min_value=12, step=1, max_value=480, value=360)
+    with col1:
+        gender = st.selectbox("Gender", ["Male", "Female"])
+        married = st.selectbox("Married", ["Yes", "No"])
+        dependents = st.selectbox("Dependents", ["0", "1", "2", "3+"])
+        education = st.selectbox("Education", ["Graduate", "Not Graduate"])
+        self_employed = st.selectbox("Self Employed", ["No", "Yes"])
+        applicant_income = st.number_input("Applicant Income ($)", min_value=150, step=100, max_value=81000, value=6000)
+        coapplicant_income = st.number_input("Co-Applicant Income ($)", min_value=0, step=100, max_value=41700, value=8000)
 
-# Prediction Cutoff Section
-st.subheader("Prediction Cutoff")
-st.write("Set the probability cutoff for approval")
-cutoff = st.slider("", 0.0, 1.0, 0.50, 0.01)
+    with col2:
+        property_area = st.selectbox("Property Area", ["Urban", "Semiurban", "Rural"])
+        credit_history = st.selectbox("Credit History Available?", ["Yes (1.0)", "No (0.0)"])
+        loan_amount = st.number_input("Loan Amount ($k)", min_value=9, step=1, max_value=700, value=150)
+        loan_term = st.number_input("Loan Term (Months)", min_value=12, step=1, max_value=480, value=360)
 
-# Predict Button
-st.write("")
-predict_button = st.button("🔮 Predict Loan Approval", use_container_width=True)
-
-# Display mock prediction (for UI testing)
-if predict_button:
+    # Prediction Cutoff Section
+    st.subheader("Prediction Cutoff")
+    st.write("Set the probability cutoff for approval")
+    cutoff = st.slider("", 0.0, 1.0, 0.50, 0.01)
 
     credit_history_input = 0.0
     if credit_history == "Yes (1.0)":
@@ -69,15 +69,75 @@ if predict_button:
         property_area                           # e.g.: 'Semiurban'
     ]]
 
-    predict_proba, prediction = predict_sample_data(model_data, sample_data, cutoff)
-
-    st.toast("✅ Prediction complete!")
-
-    if prediction:
-        st.write("Eligible for loan!")
-        st.metric('Predicted probability', np.round(predict_proba, 2),
-                  f"{float(predict_proba - cutoff):.1%} above cutoff")
+    # Predict Button
+    st.write("")
+    predict_button = st.button("🔮 Predict Loan Approval", use_container_width=True)
+
+    if predict_button:
+        # the probability is kept for these inputs: moving the cutoff only re-thresholds it
+        st.session_state["loan_prediction"] = (sample_data, load_model_version('loan_app_artifacts.pkl'),
+                                               score_sample_data(model_data, sample_data))
+        st.toast("✅ Prediction complete!")
+
+    last_prediction = st.session_state.get("loan_prediction")
+    if last_prediction is not None and last_prediction[:2] == (sample_data, load_model_version('loan_app_artifacts.pkl')):
+        predict_proba = float(last_prediction[2][0])
+        prediction = decide(predict_proba, cutoff)
+
+        if prediction:
+            st.write("Eligible for loan!")
+            st.metric('Predicted probability', np.round(predict_proba, 2),
+                      f"{float(predict_proba - cutoff):.1%} above cutoff")
+        else:
+            st.write("Sorry, you're not elegible")
+            st.metric('Predicted probability', np.round(predict_proba, 2),
+                      f"{float(predict_proba - cutoff):.1%} below cutoff")
+
+else:
+    st.subheader("Portfolio")
+    st.write("Score a batch of applicants once, then explore the approval cutoff.")
+
+    upload = st.file_uploader("Applicants CSV (same columns as the loan dataset)", type="csv")
+    if upload is not None:
+        portfolio_key, portfolio = upload_key(upload), pd.read_csv(upload, dtype={"Dependents": str})
+    elif os.path.exists('loan_dataset.csv'):
+        portfolio_key, portfolio = file_key('loan_dataset.csv'), load_data('loan_dataset.csv')
     else:
-        st.write("Sorry, you're not elegible")
-        st.metric('Predicted probability', np.round(predict_proba, 2),
-                  f"{float(predict_proba - cutoff):.1%} below cutoff") 
\ No newline at end of file
+        st.info("Upload an applicants file to start.")
+        st.stop()
+
+    try:
+        index = load_portfolio_index(model_data, load_model_version('loan_app_artifacts.pkl'), portfolio_key, portfolio)
+    except ValueError as e:
+        st.error(f"Could not score this file: {e}")
+        st.stop()
+
+    cutoff = st.slider("Approval cutoff", 0.0, 1.0, 0.50, 0.01)
+    metrics = index.metrics(cutoff)
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Applicants", f"{index.n:,}")
+    col2.metric("Approved", f"{metrics['approved']:,}")
+    col3.metric("Approval rate", f"{metrics['approval_rate']:.1%}")
+
+    cutoffs = np.linspace(0, 1, 101)
+    sweep = index.sweep(cutoffs)
+    fig = go.Figure(go.Scatter(x=cutoffs, y=sweep['approved'] / max(index.n, 1), mode='lines', name='Approval rate'))
+
+    if index.has_labels:
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Accuracy", f"{metrics['accuracy']:.1%}")
+        col2.metric("Precision", f"{metrics['precision']:.1%}")
+        col3.metric("Recall", f"{metrics['recall']:.1%}")
+
+        st.write("Confusion matrix (rows: actual, columns: predicted)")
+        st.dataframe(pd.DataFrame([[metrics['tn'], metrics['fp']], [metrics['fn'], metrics['tp']]],
+                                  index=["Actual N", "Actual Y"], columns=["Rejected", "Approved"]))
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            fig.add_trace(go.Scatter(x=cutoffs, y=sweep['tp'] / (sweep['tp'] + sweep['fp']), mode='lines', name='Precision'))
+            fig.add_trace(go.Scatter(x=cutoffs, y=sweep['tp'] / index.n_positive, mode='lines', name='Recall'))
+
+    fig.add_vline(x=cutoff, line_dash='dash', line_color='grey')
+    fig.update_layout(xaxis_title='Cutoff', yaxis_title='Rate', yaxis_range=[0, 1])
+    st.plotly_chart(fig)
@@ -0,0 +1,134 @@
+# ------------------------------------------------------------
+# LoanTech batch scoring
+#
+# Scores application files (CSV or Parquet) in fixed-size chunks with bounded memory:
+# the preprocessing is compiled once (shared.loantech_scorer.CompiledTransform) and writes
+# straight into a preallocated float32 matrix, and the probabilities/decisions of each chunk
+# are appended to the output file as they are produced.
+#
+# Usage (from lab5/):
+#   python scoring.py applications.csv scored.csv --cutoff 0.5 --chunk-size 100000
+# ------------------------------------------------------------
+import argparse
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from shared.loantech_scorer import NUMERIC_COLUMNS, RAW_COLUMNS, CompiledTransform
+
+ID_COLUMN = 'Loan_ID'
+
+
+def prepare_batch(batch):
+    # nightly files carry the two incomes separately; the model uses their sum
+    if 'TotalIncome' not in batch.columns and {'ApplicantIncome', 'CoapplicantIncome'} <= set(batch.columns):
+        batch = batch.assign(TotalIncome=batch['ApplicantIncome'].astype(float) + batch['CoapplicantIncome'].astype(float))
+    missing = [col for col in RAW_COLUMNS if col not in batch.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+    return batch
+
+def predict_proba_matrix(model, X):
+    if hasattr(model, 'coef_'):
+        # linear model: skip predict_proba's per-call validation
+        logits = X @ model.coef_[0].astype(np.float32) + np.float32(model.intercept_[0])
+        return 1.0 / (1.0 + np.exp(-logits.astype(np.float64)))
+    return model.predict_proba(X)[:, 1]
+
+def _as_text(series):
+    # numeric-typed categorical column -> the labels a CSV would hold (1.0 -> '1'), missing stays missing
+    if not pd.api.types.is_numeric_dtype(series):
+        return series
+    values = series.to_numpy(dtype=np.float64)
+    text = [str(int(x)) if x.is_integer() else str(x) for x in values[~np.isnan(values)]]
+    result = pd.Series(np.nan, index=series.index, dtype=object)
+    result[~np.isnan(values)] = text
+    return result
+
+def iter_batches(path, chunk_size):
+    categorical = [col for col in RAW_COLUMNS if col not in NUMERIC_COLUMNS] + [ID_COLUMN]
+    if path.endswith('.parquet'):
+        for record_batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            batch = record_batch.to_pandas()
+            yield batch.assign(**{col: _as_text(batch[col]) for col in categorical if col in batch.columns})
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype={col: str for col in categorical})
+
+class _ResultWriter:
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.endswith('.parquet')
+        self.writer = None
+
+    def write(self, frame):
+        if self.parquet:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.path, table.schema)
+            self.writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode='a' if self.writer else 'w', header=self.writer is None, index=False)
+            self.writer = True
+
+    def close(self):
+        if self.parquet and self.writer is not None:
+            self.writer.close()
+
+def score_file(model_data, input_path, output_path, cutoff=0.5, chunk_size=100_000):
+    transform = CompiledTransform(model_data)
+    model = model_data["model"]
+    out = np.empty((chunk_size, transform.n_features), dtype=np.float32)
+
+    tmp_path = output_path + '.tmp' + os.path.splitext(output_path)[1]
+    writer = _ResultWriter(tmp_path)
+    # n_imputed: rows with a missing numeric value, scored with the training mean in its place
+    n_rows, n_approved, n_imputed = 0, 0, 0
+    try:
+        for batch in iter_batches(input_path, chunk_size):
+            batch = prepare_batch(batch)
+            n_imputed += int(batch[transform.numeric_cols].isna().any(axis=1).sum())
+            X = transform.transform(batch, out)
+            proba = predict_proba_matrix(model, X)
+            decision = (proba >= cutoff).astype(np.int8)
+
+            result = pd.DataFrame({'probability': proba, 'decision': decision})
+            if ID_COLUMN in batch.columns:
+                result.insert(0, ID_COLUMN, batch[ID_COLUMN].to_numpy())
+            writer.write(result)
+
+            n_rows += len(batch)
+            n_approved += int(decision.sum())
+    except BaseException:
+        writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    writer.close()
+    os.replace(tmp_path, output_path)
+    return n_rows, n_approved, n_imputed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Score a LoanTech application file in chunks.')
+    parser.add_argument('input', help='CSV or Parquet file with the raw application columns')
+    parser.add_argument('output', help='CSV or Parquet file to write probability/decision to')
+    parser.add_argument('--artifacts', default='loan_app_artifacts.pkl')
+    parser.add_argument('--cutoff', type=float, default=0.5)
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    args = parser.parse_args()
+
+    with open(args.artifacts, 'rb') as f:
+        model_data = pickle.load(f)
+
+    start = time.perf_counter()
+    n_rows, n_approved, n_imputed = score_file(model_data, args.input, args.output, args.cutoff, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    print(f'{n_rows:,} applications scored in {elapsed:.1f}s ({n_rows / max(elapsed, 1e-9):,.0f} rows/s), '
+          f'{n_approved:,} approved at cutoff {args.cutoff}')
+    if n_imputed:
+        print(f'warning: {n_imputed:,} applications had missing numeric values, scored with the training mean')
@@ -1,57 +1,58 @@
-import pickle
+import hashlib
+import os
+import numpy as np
 import pandas as pd
 import streamlit as st
 import time
 
+from shared.artifacts import artifact_version, get_artifact
+from shared.loantech_scorer import LinearScorer
+from shared.model_format import load_resolved, resolve
+from decisions import ProbabilityIndex, decide
+from scoring import prepare_batch
+
 @st.cache_data
 def load_data(data_path: str):
     time.sleep(1) # to check if cached correctly
     data = pd.read_csv(data_path)
     return data
 
-@st.cache_resource # should work better than cache_data since the stored daya might be somewhat complex
-def load_model(model_path: str):
-    time.sleep(1) # to check if cached correctly
-    with open(model_path, 'rb') as file:
-        data = pickle.load(file)
+def _load_model_artifact(model_path: str):
+    data = load_resolved(model_path) # pickle, or the pickle-free bundle when one was exported
+    data["scorer"] = LinearScorer.from_artifacts(data) # compiled once, shared by all sessions
     return data
 
-@st.cache_data
-def predict_sample_data(_data, sample_data, cutoff):
-
-    raw_columns = ['LoanAmount', 'Loan_Amount_Term', 'TotalIncome', 
-                'Gender', 'Married', 'Dependents', 
-                'Education', 'Self_Employed', 'Credit_History', 'Property_Area']
-    
-    model = _data["model"]
-    encoder = _data["encoder"]
-    scaler = _data["scaler"]
-    numeric_cols = _data["numeric_cols"]
-    categorical_cols = _data["categorical_cols"]
-    model_columns_ordered = _data["model_columns_ordered"]
-
-    sample_df = pd.DataFrame(sample_data, columns=raw_columns)
-
-    sample_df_scaled_data = scaler.transform(sample_df[numeric_cols])
-
-    df_sample_scaled = pd.DataFrame(sample_df_scaled_data, 
-                                columns=numeric_cols, 
-                                index=sample_df.index) # Mantenim l'índex per al concat
-
-    # Encode categorical cols
-    sample_df_encoded_data = encoder.transform(sample_df[categorical_cols])
-
-    encoded_col_names = encoder.get_feature_names_out(categorical_cols)
-    df_sample_encoded = pd.DataFrame(sample_df_encoded_data, 
-                                columns=encoded_col_names, 
-                                index=sample_df.index) # Mantenim l'índex per al concat
-
-    # Concat both dataframes horizontally
-    sample_df_processed_df = pd.concat([df_sample_scaled, df_sample_encoded], axis=1)
+def load_model(model_path: str):
+    # loaded once per process by the shared artifact registry (no copy per session), reloaded if the file changes
+    return get_artifact(resolve(model_path)[0], loader=_load_model_artifact)
 
-    # Reorder cols (we need the same order as in training)
-    sample_df_processed_df = sample_df_processed_df[model_columns_ordered]
+def load_model_version(model_path: str):
+    return artifact_version(resolve(model_path)[0])
 
-    predict_proba = model.predict_proba(sample_df_processed_df)[:, 1]
+def score_sample_data(_data, sample_data):
+    # approval probabilities only: the cutoff is applied afterwards (see decisions.decide)
+    scorer = _data.get("scorer") or LinearScorer.from_artifacts(_data)
+    return np.array([scorer.predict_proba(sample) for sample in sample_data])
 
-    return predict_proba, (predict_proba >= cutoff).astype(int)
\ No newline at end of file
+def predict_sample_data(_data, sample_data, cutoff):
+    predict_proba = score_sample_data(_data, sample_data)
+    return predict_proba, decide(predict_proba, cutoff)
+
+def file_key(path: str):
+    stat = os.stat(path)
+    return f"{path}:{stat.st_mtime_ns}:{stat.st_size}"
+
+def upload_key(upload):
+    return hashlib.sha256(upload.getvalue()).hexdigest()
+
+@st.cache_resource(max_entries=8)
+def load_portfolio_index(_data, model_version, portfolio_key, _portfolio):
+    # model_version / portfolio_key identify the artifact and the applicant file (file_key / upload_key); probabilities are scored
+    # once and sorted, every cutoff afterwards is a binary search. A cache resource: the read-only
+    # index is shared by the sessions, not pickled and copied on every rerun like cache_data would
+    scorer = _data.get("scorer") or LinearScorer.from_artifacts(_data)
+    batch = prepare_batch(_portfolio)
+    labels = None
+    if "Loan_Status" in batch.columns:
+        labels = (batch["Loan_Status"].astype(str) == "Y").astype(int)
+    return ProbabilityIndex(scorer.predict_proba_batch(batch), labels)
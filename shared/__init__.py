@@ -0,0 +1,3 @@
+# Code shared by the Streamlit apps (lab5, lab11, final-project). The apps run from their own
+# directories; the package is installed in editable mode by requirements.txt (`-e .`, see
+# pyproject.toml), so `import shared` works from anywhere without touching sys.path.
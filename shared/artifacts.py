@@ -0,0 +1,163 @@
+# Process-wide registry of model artifacts, shared by the Streamlit apps.
+#
+# Each artifact is loaded lazily on first use, exactly once per process (concurrent sessions
+# block on a per-artifact lock instead of loading in parallel), and every caller gets the same
+# object: nothing is copied, so artifacts must be treated as read-only.
+# The file's sha256 is recorded at load time; it doubles as the artifact version for cache keys.
+# When the file changes on disk (mtime/size, checked at most every CHECK_INTERVAL seconds) and its
+# hash differs, the artifact is reloaded; if the new file cannot be loaded (or has been removed),
+# the previous version keeps being served.
+#
+# The apps use the module-level helpers:
+#   from shared.artifacts import get_artifact, artifact_version
+#   model = get_artifact('models/model.pkl', loader=my_loader)
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+CHECK_INTERVAL = 2.0  # seconds between stat() calls per artifact
+
+
+def file_sha256(path):
+    # the one content hash used across the repo (artifact versions, bundle manifests, data files)
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def _load_pickle(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+def _load_npy(path):
+    # read-only memory map: pages are shared between processes and sessions
+    return np.load(path, mmap_mode='r', allow_pickle=False)
+
+def _load_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+DEFAULT_LOADERS = {
+    '.pkl': _load_pickle,
+    '.pickle': _load_pickle,
+    '.npy': _load_npy,
+    '.csv': pd.read_csv,
+    '.json': _load_json,
+}
+
+
+class _Entry:
+    def __init__(self, path, loader):
+        self.path = path
+        self.loader = loader
+        self.lock = threading.Lock()
+        self.value = None
+        self.loaded = False
+        self.sha256 = None
+        self.stat = None
+        self.checked_at = 0.0
+        self.loaded_at = None
+        self.loads = 0
+        self.last_error = None
+
+
+class ArtifactRegistry:
+    def __init__(self, check_interval=CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, path, loader):
+        key = os.path.abspath(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if loader is None:
+                    ext = os.path.splitext(path)[1].lower()
+                    if ext not in DEFAULT_LOADERS:
+                        raise ValueError(f"No default loader for '{ext}' files, pass loader=")
+                    loader = DEFAULT_LOADERS[ext]
+                entry = self._entries[key] = _Entry(key, loader)
+            return entry
+
+    def _load(self, entry, stat):
+        sha256 = file_sha256(entry.path)
+        if entry.loaded and sha256 == entry.sha256:
+            # touched but unchanged: keep the loaded object
+            entry.stat = stat
+            return
+        entry.value = entry.loader(entry.path)
+        entry.sha256 = sha256
+        entry.stat = stat
+        entry.loaded = True
+        entry.loaded_at = time.time()
+        entry.loads += 1
+
+    def get(self, path, loader=None):
+        # loader: path -> object (default picked from the file extension); it only runs on first
+        # use and when the file content changes
+        entry = self._entry(path, loader)
+        now = time.monotonic()
+        if entry.loaded and now - entry.checked_at < self.check_interval:
+            return entry.value
+
+        with entry.lock:
+            if entry.loaded and now - entry.checked_at < self.check_interval:
+                return entry.value  # another session checked while we waited
+            try:
+                st = os.stat(entry.path)
+            except FileNotFoundError as e:
+                if not entry.loaded:
+                    raise
+                # removed (or being replaced) under a running app: keep serving the loaded version
+                entry.last_error = e
+                entry.checked_at = now
+                return entry.value
+            stat = (st.st_mtime_ns, st.st_size)
+            if not entry.loaded or stat != entry.stat:
+                try:
+                    self._load(entry, stat)
+                    entry.last_error = None
+                except Exception as e:
+                    if not entry.loaded:
+                        raise
+                    # hot reload failed (e.g. file still being written): keep serving the old version
+                    entry.last_error = e
+                    warnings.warn(f"Reloading {entry.path} failed, keeping the loaded version: {e}")
+            entry.checked_at = now
+            return entry.value
+
+    def version(self, path):
+        # sha256 of the loaded content (None if not loaded yet)
+        entry = self._entries.get(os.path.abspath(path))
+        return entry.sha256 if entry is not None else None
+
+    def invalidate(self, path=None):
+        # force a reload on next use (all artifacts when path is None)
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+
+    def info(self):
+        return [{'path': e.path, 'sha256': e.sha256, 'loaded_at': e.loaded_at, 'loads': e.loads,
+                 'last_error': None if e.last_error is None else str(e.last_error)}
+                for e in self._entries.values() if e.loaded]
+
+
+registry = ArtifactRegistry()
+
+def get_artifact(path, loader=None):
+    return registry.get(path, loader)
+
+def artifact_version(path):
+    return registry.version(path)
@@ -0,0 +1,79 @@
+# Model input encoding for the AutoValuator LightGBM model.
+#
+# The feature order and the categorical/registration encoding the model was trained with, and the
+# request-time version of it: label -> code tables built once from the fitted LabelEncoders, then
+# applied with dict lookups (one row) or one get_indexer per column (batches). A label the encoder
+# was not fitted on raises ValueError, like LabelEncoder.transform. Plain numpy/pandas,
+# so the app, training (lab11/app/train.py) and the inference server share it without Streamlit.
+from collections import namedtuple
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+# column order the model was trained on (X = df.drop('price') after dropping 'model')
+FEATURE_COLUMNS = ['car', 'body', 'mileage', 'engV', 'engType', 'registration', 'year', 'drive']
+YES_VALUES = ['yes', 'YES', 'Yes', 'y', 'Y']
+CATEGORICAL_ENCODERS = {'car': 'le_car', 'body': 'le_body', 'engType': 'le_engType', 'drive': 'le_drive'}
+
+CodeTable = namedtuple('CodeTable', ['codes', 'index'])
+
+
+def build_code_tables(data):
+    # label -> code lookups built once from the fitted LabelEncoders, so no transform() runs per request
+    tables = {}
+    for column, key in CATEGORICAL_ENCODERS.items():
+        classes = np.asarray(data[key].classes_).astype(str)
+        codes = {label: float(code) for code, label in enumerate(classes)}
+        tables[column] = CodeTable(MappingProxyType(codes), pd.Index(classes))
+    return MappingProxyType(tables)
+
+def encode_features(code_tables, X):
+    # X: DataFrame with FEATURE_COLUMNS or an (N, 8) array in that same order -> (N, 8) float64 model input
+    if isinstance(X, pd.DataFrame):
+        X = X[FEATURE_COLUMNS].to_numpy(dtype=object)
+    X = np.asarray(X, dtype=object)
+    if X.ndim != 2 or X.shape[1] != len(FEATURE_COLUMNS):
+        raise ValueError(f"Expected an (N, {len(FEATURE_COLUMNS)}) input with columns {FEATURE_COLUMNS}")
+
+    if len(X) == 1:
+        # single request: plain dict lookups, no numpy/pandas machinery
+        row = X[0]
+        return np.array([[
+            _lookup(code_tables, 'car', row[0]),
+            _lookup(code_tables, 'body', row[1]),
+            int(row[2]),
+            float(row[3]),
+            _lookup(code_tables, 'engType', row[4]),
+            1.0 if str(row[5]) in YES_VALUES else 0.0,
+            int(row[6]),
+            _lookup(code_tables, 'drive', row[7]),
+        ]], dtype=np.float64)
+
+    X_encoded = np.empty(X.shape, dtype=np.float64)
+    for i, column in enumerate(FEATURE_COLUMNS):
+        if column in code_tables:
+            table = code_tables[column]
+            labels = X[:, i].astype(str)
+            codes = table.index.get_indexer(labels)
+            if (codes < 0).any():
+                _unknown(column, labels[codes < 0])
+            X_encoded[:, i] = codes
+        elif column == 'registration':
+            X_encoded[:, i] = np.isin(X[:, i].astype(str), YES_VALUES)
+        elif column == 'engV':
+            X_encoded[:, i] = X[:, i].astype(np.float64)
+        else:
+            X_encoded[:, i] = np.trunc(X[:, i].astype(np.float64))
+    return X_encoded
+
+def _lookup(code_tables, column, value):
+    code = code_tables[column].codes.get(str(value))
+    if code is None:
+        _unknown(column, [str(value)])
+    return code
+
+def _unknown(column, labels):
+    labels = [str(label) for label in pd.unique(np.asarray(labels, dtype=object))]
+    shown = ', '.join(repr(label) for label in labels[:5]) + (f' and {len(labels) - 5} more' if len(labels) > 5 else '')
+    raise ValueError(f"Unknown {column} label(s) the model was not trained on: {shown}")
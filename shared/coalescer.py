@@ -0,0 +1,172 @@
+# In-process micro-batching for concurrent Streamlit sessions.
+#
+# Streamlit runs every session's script in its own thread; when several users press Predict at
+# once, each thread would call the model on a 1-row array and the calls serialize on the GIL and
+# per-call overhead. A Coalescer queues those single-row requests and a background thread flushes
+# them as one vectorized call when max_batch_size rows are waiting or the oldest has waited
+# max_delay seconds. Callers block until their own row's result is ready; if the batched call
+# fails, its rows are retried one by one so only the failing row's caller sees the error.
+# A closed coalescer (its model version was replaced) calls predict_fn directly.
+#
+#   coalescer = get_coalescer(('autovaluator', model_version), lambda rows: predict_batch(data, rows))
+#   price = coalescer.submit(row)
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+MAX_BATCH_SIZE = 64
+MAX_DELAY = 0.005  # seconds
+
+
+class Coalescer:
+    def __init__(self, predict_fn, max_batch_size=MAX_BATCH_SIZE, max_delay=MAX_DELAY, name='coalescer'):
+        # predict_fn: list of rows -> sequence of results, in the same order
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.closed = False
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+        self.max_queue_depth = 0
+        self.wait_seconds = 0.0
+        self.batch_sizes = np.zeros(max_batch_size + 1, dtype=np.int64)  # histogram
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def submit(self, row, timeout=None):
+        future = Future()
+        with self.lock:
+            # checked and queued under the lock, so no request lands behind close()'s sentinel
+            if self.closed:
+                future = None
+            else:
+                self.queue.put((row, future, time.perf_counter()))
+                self.requests += 1
+                self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+        if future is None:
+            return self.predict_fn([row])[0]
+        return future.result(timeout)
+
+    def close(self):
+        # stop the flush thread once the queued requests are served
+        with self.lock:
+            if not self.closed:
+                self.closed = True
+                self.queue.put(None)
+
+    def _fail_queued(self):
+        # the flush thread is exiting: nothing will serve what is still queued
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                item[1].set_exception(RuntimeError('coalescer closed before the request was served'))
+
+    def _collect(self):
+        batch = [self.queue.get()]
+        if batch[0] is None:
+            return None
+        deadline = batch[0][2] + self.max_delay
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self.queue.put(None)  # serve this batch first, stop on the next round
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        try:
+            self._serve()
+        finally:
+            with self.lock:
+                self.closed = True  # later submits call predict_fn directly
+            self._fail_queued()
+
+    def _serve(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            start = time.perf_counter()
+            predict_fn = self.predict_fn
+            try:
+                results = predict_fn([row for row, _, _ in batch])
+            except Exception as e:
+                with self.lock:
+                    self.errors += 1
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                    continue
+                # one bad row must not fail the others: fall back to one call per row
+                for row, future, _ in batch:
+                    try:
+                        future.set_result(predict_fn([row])[0])
+                    except Exception as row_error:
+                        future.set_exception(row_error)
+                continue
+            if len(results) != len(batch):
+                error = ValueError(f'predict_fn returned {len(results)} results for {len(batch)} rows')
+                with self.lock:
+                    self.errors += 1
+                for _, future, _ in batch:
+                    future.set_exception(error)
+                continue
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+            with self.lock:
+                self.batches += 1
+                self.batch_sizes[len(batch)] += 1
+                self.wait_seconds += sum(start - queued_at for _, _, queued_at in batch)
+
+    def metrics(self):
+        with self.lock:
+            sizes = np.arange(len(self.batch_sizes))
+            rows = int((sizes * self.batch_sizes).sum())
+            return {
+                'requests': self.requests,
+                'batches': self.batches,
+                'errors': self.errors,
+                'queue_depth': self.queue.qsize(),
+                'max_queue_depth': self.max_queue_depth,
+                'mean_batch_size': rows / self.batches if self.batches else 0.0,
+                'max_batch_size': int(sizes[self.batch_sizes > 0].max()) if self.batches else 0,
+                'mean_wait_ms': 1000 * self.wait_seconds / rows if rows else 0.0,
+                'batch_size_histogram': {int(s): int(c) for s, c in zip(sizes, self.batch_sizes) if c},
+            }
+
+
+_coalescers = {}
+_coalescers_lock = threading.Lock()
+
+def get_coalescer(key, predict_fn, **kwargs):
+    # one coalescer per (name, artifact version) and process; a new version of a model closes
+    # the coalescer of the previous one. The caller's predict_fn always replaces the stored one
+    # (the next batch uses it), so a coalescer never keeps calling a model object that was reloaded
+    # under the same key.
+    name = key[0]
+    with _coalescers_lock:
+        coalescer = _coalescers.get(key)
+        if coalescer is None:
+            for old in [k for k in _coalescers if k[0] == name]:
+                _coalescers.pop(old).close()
+            coalescer = _coalescers[key] = Coalescer(predict_fn, name=f'coalescer-{name}', **kwargs)
+        else:
+            coalescer.predict_fn = predict_fn
+        return coalescer
+
+def coalescer_metrics():
+    with _coalescers_lock:
+        return {key: coalescer.metrics() for key, coalescer in _coalescers.items()}
@@ -0,0 +1,296 @@
+# Headless JSON inference service for the AutoValuator (lab11) and LoanTech (lab5) models.
+#
+# Runs the same preprocessing as the apps' predict_sample_data (shared.autovaluator_encoding code
+# tables + booster, shared.loantech_scorer compiled linear scorer) behind a tornado HTTP server:
+#   POST /v1/autovaluator/predict  {"instances": [{"car": ..., "body": ..., ...}, ...]}
+#   POST /v1/loantech/predict      {"instances": [{"LoanAmount": ..., ...}, ...], "cutoff": 0.5}
+#   GET  /health, GET /metrics
+# ("instance": {...} is accepted for a single row.)
+#
+# Requests are queued per model and flushed as one vectorized batch when max_batch_rows rows are
+# waiting or the oldest has waited max_delay_ms; batches run in a pool of worker processes that
+# load both models once at startup (and are warmed up before the server accepts traffic).
+#
+# Run from the repo root:
+#   python shared/inference_server.py --port 8000 --workers 4
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import tornado.web
+
+from shared import autovaluator_encoding as encoding
+from shared.artifacts import file_sha256
+from shared.loantech_scorer import NUMERIC_COLUMNS, RAW_COLUMNS, LinearScorer
+from shared.model_format import load_resolved, resolve
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+DEFAULT_MODELS = {
+    'autovaluator': os.path.join(REPO_ROOT, 'lab11', 'models', 'model.pkl'),
+    'loantech': os.path.join(REPO_ROOT, 'lab5', 'loan_app_artifacts.pkl'),
+}
+
+
+# --- model side (runs in the worker processes) ---------------------------------------------------
+
+def _text(value):
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise TypeError(f'expected a string, got {type(value).__name__}')
+    return str(value)
+
+def _number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise TypeError(f'expected a number, got {type(value).__name__}')
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f'expected a finite number, got {value!r}')
+    return number
+
+def _optional_number(value):
+    # null: missing value (the LoanTech scorer imputes the training mean)
+    return None if value is None else _number(value)
+
+def _parse_fields(fields, instance):
+    # JSON object -> row in model input order with every field converted to its type; runs in the
+    # server process, so a malformed instance fails its own request (400) and never reaches a batch
+    if not isinstance(instance, dict):
+        raise TypeError(f'expected a JSON object per instance, got {type(instance).__name__}')
+    row = []
+    for col, convert in fields.items():
+        if col not in instance:
+            raise KeyError(f'missing field {col!r}')
+        try:
+            row.append(convert(instance[col]))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f'field {col!r}: {e}') from None
+    return row
+
+
+class AutoValuatorModel:
+    FIELDS = {col: _text if col in encoding.CATEGORICAL_ENCODERS or col == 'registration' else _number
+              for col in encoding.FEATURE_COLUMNS}
+    WARMUP_ROW = ['other', 'other', 100.0, 2.0, 'Other', 'yes', 2010.0, 'front']
+    THREADED = True  # LightGBM: takes its share of the cores
+
+    def __init__(self, path, num_threads=0):
+        self.data = load_resolved(resolve(path)[0])
+        self.code_tables = encoding.build_code_tables(self.data)
+        self.booster = getattr(self.data['model'], 'booster_', self.data['model'])
+        self.num_threads = num_threads
+
+    @classmethod
+    def parse(cls, instance):
+        return _parse_fields(cls.FIELDS, instance)
+
+    def predict(self, rows):
+        X = encoding.encode_features(self.code_tables, np.array(rows, dtype=object))
+        return self.booster.predict(X, num_threads=self.num_threads).tolist()
+
+
+class LoanTechModel:
+    FIELDS = {col: _optional_number if col in NUMERIC_COLUMNS else _text for col in RAW_COLUMNS}
+    WARMUP_ROW = [150.0, 360.0, 8000.0, 'Male', 'Yes', '0', 'Graduate', 'No', 1.0, 'Urban']
+    THREADED = False  # pure-Python scorer
+
+    def __init__(self, path):
+        self.scorer = LinearScorer.from_artifacts(load_resolved(resolve(path)[0]))
+
+    @classmethod
+    def parse(cls, instance):
+        return _parse_fields(cls.FIELDS, instance)
+
+    def predict(self, rows):
+        return [self.scorer.predict_proba(row) for row in rows]
+
+
+MODEL_CLASSES = {'autovaluator': AutoValuatorModel, 'loantech': LoanTechModel}
+_models = {}
+
+def _init_worker(paths, num_threads=0):
+    # process pool initializer: load every model once per worker; num_threads splits the cores
+    # between workers so LightGBM's OpenMP threads do not oversubscribe them (0: LightGBM default)
+    for name, path in paths.items():
+        cls = MODEL_CLASSES[name]
+        _models[name] = cls(path, num_threads) if cls.THREADED else cls(path)
+
+def _predict_worker(name, rows):
+    return _models[name].predict(rows)
+
+def _warmup_worker(_):
+    # one tiny call per model, so the first real request does not pay for lazy initialization
+    for model in _models.values():
+        model.predict([model.WARMUP_ROW])
+    return os.getpid()
+
+
+# --- server side ---------------------------------------------------------------------------------
+
+class MicroBatcher:
+    def __init__(self, name, executor, max_batch_rows=512, max_delay_ms=5.0):
+        self.name = name
+        self.executor = executor
+        self.max_batch_rows = max_batch_rows
+        self.max_delay = max_delay_ms / 1000
+        self.pending = []  # (rows, future)
+        self.pending_rows = 0
+        self.timer = None
+        self.stats = {'requests': 0, 'rows': 0, 'batches': 0, 'max_batch_rows': 0, 'errors': 0,
+                      'retried_batches': 0, 'batch_seconds': 0.0}
+
+    async def predict(self, rows):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((rows, future))
+        self.pending_rows += len(rows)
+        self.stats['requests'] += 1
+        if self.pending_rows >= self.max_batch_rows:
+            self.flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.max_delay, self.flush)
+        return await future
+
+    def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if not self.pending:
+            return
+        batch, self.pending, self.pending_rows = self.pending, [], 0
+        asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch):
+        rows = [row for request_rows, _ in batch for row in request_rows]
+        start = time.perf_counter()
+        try:
+            predictions = await asyncio.get_running_loop().run_in_executor(
+                self.executor, _predict_worker, self.name, rows)
+        except Exception as e:
+            self.stats['errors'] += 1
+            if len(batch) > 1:
+                # one bad request must not fail the others: score every request of the batch on its own
+                self.stats['retried_batches'] += 1
+                await asyncio.gather(*(self._run([item]) for item in batch))
+                return
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.stats['batches'] += 1
+        self.stats['rows'] += len(rows)
+        self.stats['max_batch_rows'] = max(self.stats['max_batch_rows'], len(rows))
+        self.stats['batch_seconds'] += time.perf_counter() - start
+
+        offset = 0
+        for request_rows, future in batch:
+            if not future.done():
+                future.set_result(predictions[offset:offset + len(request_rows)])
+            offset += len(request_rows)
+
+    def metrics(self):
+        batches = max(self.stats['batches'], 1)
+        return {**self.stats, 'queued_rows': self.pending_rows,
+                'mean_batch_rows': self.stats['rows'] / batches,
+                'mean_batch_ms': 1000 * self.stats['batch_seconds'] / batches}
+
+
+class BaseHandler(tornado.web.RequestHandler):
+    def initialize(self, service):
+        self.service = service
+
+    def write_json(self, payload, status=200):
+        self.set_status(status)
+        self.set_header('Content-Type', 'application/json')
+        self.finish(json.dumps(payload))
+
+
+class PredictHandler(BaseHandler):
+    async def post(self, name):
+        if name not in self.service['batchers']:
+            return self.write_json({'error': f"model '{name}' is not loaded"}, 404)
+        try:
+            body = json.loads(self.request.body)
+            instances = body['instances'] if 'instances' in body else [body['instance']]
+            if not isinstance(instances, list) or not instances:
+                raise ValueError('instances must be a non-empty list')
+            parser = self.service['parsers'][name]
+            rows = [parser(instance) for instance in instances]
+            if name == 'loantech':
+                cutoff = float(body.get('cutoff', 0.5))
+                if not 0.0 <= cutoff <= 1.0:
+                    raise ValueError(f'cutoff must be between 0 and 1, got {cutoff}')
+        except (ValueError, KeyError, TypeError) as e:
+            return self.write_json({'error': f'bad request: {e!r}'}, 400)
+
+        try:
+            predictions = await self.service['batchers'][name].predict(rows)
+        except ValueError as e:
+            # the fields were checked above: a value the model cannot encode (e.g. an unknown label)
+            return self.write_json({'error': f'bad request: {e}'}, 400)
+        except Exception as e:
+            return self.write_json({'error': f'prediction failed: {e}'}, 500)
+
+        if name == 'loantech':
+            return self.write_json({'probabilities': predictions, 'decisions': [int(p >= cutoff) for p in predictions],
+                                    'cutoff': cutoff})
+        return self.write_json({'predictions': predictions})
+
+
+class HealthHandler(BaseHandler):
+    def get(self):
+        self.write_json({'status': 'ok', 'models': self.service['versions']})
+
+
+class MetricsHandler(BaseHandler):
+    def get(self):
+        self.write_json({name: batcher.metrics() for name, batcher in self.service['batchers'].items()})
+
+
+def make_executor(paths, workers):
+    if workers == 0:
+        # in-process (single thread): no IPC, useful for the sub-microsecond LoanTech scorer
+        _init_worker(paths)
+        return ThreadPoolExecutor(max_workers=1)
+    threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(paths, threads_per_worker))
+    # start the workers (loading the models) and warm them up before accepting traffic
+    list(executor.map(_warmup_worker, range(2 * workers)))
+    return executor
+
+def make_app(paths, workers=2, max_batch_rows=512, max_delay_ms=5.0):
+    paths = {name: path for name, path in paths.items() if os.path.exists(resolve(path)[0])}
+    executor = make_executor(paths, workers)
+    service = {
+        'batchers': {name: MicroBatcher(name, executor, max_batch_rows, max_delay_ms) for name in paths},
+        'parsers': {name: MODEL_CLASSES[name].parse for name in paths},
+        'versions': {name: file_sha256(resolve(path)[0]) for name, path in paths.items()},
+        'executor': executor,
+    }
+    return tornado.web.Application([
+        (r'/v1/(\w+)/predict', PredictHandler, dict(service=service)),
+        (r'/health', HealthHandler, dict(service=service)),
+        (r'/metrics', MetricsHandler, dict(service=service)),
+    ]), service
+
+async def main(args):
+    paths = {'autovaluator': args.autovaluator_model, 'loantech': args.loantech_model}
+    app, service = make_app(paths, args.workers, args.max_batch_rows, args.max_delay_ms)
+    app.listen(args.port, address=args.host)
+    print(f"Serving {sorted(service['batchers'])} on http://{args.host}:{args.port} ({args.workers} workers)")
+    await asyncio.Event().wait()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='JSON inference server for the AutoValuator and LoanTech models.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=2, help='worker processes (0: score in-process)')
+    parser.add_argument('--max-batch-rows', type=int, default=512)
+    parser.add_argument('--max-delay-ms', type=float, default=5.0)
+    parser.add_argument('--autovaluator-model', default=DEFAULT_MODELS['autovaluator'])
+    parser.add_argument('--loantech-model', default=DEFAULT_MODELS['loantech'])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,173 @@
+# LoanTech model input and compiled linear scorer.
+#
+# CompiledTransform turns the artifact's scaler + one-hot encoder + column reordering (the
+# preprocessing of predict_sample_data) into index lookups that write straight into a float32
+# matrix. The pipeline (StandardScaler -> OneHotEncoder -> LogisticRegression) is linear, so
+# LinearScorer folds it further into:
+#   logit = intercept' + sum_j (coef_j / scale_j) * x_j + sum_c weight_c[value_c]
+# with intercept' = intercept - sum_j coef_j * mean_j / scale_j, and one weight table per
+# categorical column (0 for the dropped first category and for unknown values). Scoring one
+# applicant is then a handful of float multiplies and dict lookups. Plain numpy/pandas, so the
+# app, the batch scorer (lab5/scoring.py) and the inference server share it without Streamlit.
+import json
+import math
+
+import numpy as np
+import pandas as pd
+
+RAW_COLUMNS = ['LoanAmount', 'Loan_Amount_Term', 'TotalIncome',
+               'Gender', 'Married', 'Dependents',
+               'Education', 'Self_Employed', 'Credit_History', 'Property_Area']
+NUMERIC_COLUMNS = ['LoanAmount', 'Loan_Amount_Term', 'TotalIncome', 'Credit_History']  # the rest are categorical
+SCORER_FORMAT_VERSION = 1
+
+
+class CompiledTransform:
+    def __init__(self, model_data):
+        encoder = model_data["encoder"]
+        scaler = model_data["scaler"]
+        numeric_cols = model_data["numeric_cols"]
+        categorical_cols = model_data["categorical_cols"]
+        position = {col: i for i, col in enumerate(model_data["model_columns_ordered"])}
+
+        self.n_features = len(position)
+        self.numeric_cols = numeric_cols
+        self.categorical_cols = categorical_cols
+        self.numeric_pos = np.array([position[col] for col in numeric_cols])
+        self.mean = np.asarray(scaler.mean_, dtype=np.float64)
+        self.scale = np.asarray(scaler.scale_, dtype=np.float64)
+        self._mean32 = self.mean.astype(np.float32)
+        self._scale32 = self.scale.astype(np.float32)
+
+        # per categorical column: the known categories and, for each, the output column it sets
+        # (-1 for the dropped first category); unknown values set nothing, like handle_unknown='ignore'
+        feature_names = encoder.get_feature_names_out(categorical_cols)
+        self.categories, self.category_pos = [], []
+        k = 0
+        for col, categories, drop in zip(categorical_cols, encoder.categories_, encoder.drop_idx_):
+            pos = np.full(len(categories) + 1, -1)  # last slot: unknown / missing
+            for i in range(len(categories)):
+                if drop is not None and i == drop:
+                    continue
+                pos[i] = position[feature_names[k]]
+                k += 1
+            self.categories.append(pd.Index(categories.astype(str)))
+            self.category_pos.append(pos)
+
+    def transform(self, batch, out):
+        # batch: DataFrame with the raw columns; out: float32 (>= len(batch), n_features), filled in place
+        n = len(batch)
+        X = out[:n]
+        X[:] = 0
+
+        numeric = np.column_stack([batch[col].to_numpy(dtype=np.float32) for col in self.numeric_cols])
+        numeric = (numeric - self._mean32) / self._scale32
+        # missing numeric values are imputed with the training mean (0 after scaling)
+        X[:, self.numeric_pos] = np.nan_to_num(numeric, nan=0.0)
+
+        rows = np.arange(n)
+        for col, categories, pos in zip(self.categorical_cols, self.categories, self.category_pos):
+            codes = categories.get_indexer(batch[col].astype(str).to_numpy())
+            target = pos[codes]  # code -1 (unknown) picks the last slot, which is -1
+            hit = target >= 0
+            X[rows[hit], target[hit]] = 1.0
+        return X
+
+
+def _number(x):
+    # numeric field of a sample -> float, None when missing (None, NaN, empty string)
+    if x is None or (isinstance(x, str) and not x.strip()):
+        return None
+    x = float(x)  # numeric strings ("120") as well
+    return None if x != x else x
+
+def _sigmoid(z):
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1.0 + e)
+
+
+class LinearScorer:
+    def __init__(self, intercept, numeric, categorical, source_sha256=None):
+        # numeric: {col: (weight, mean)} with weight = coef / scale (mean is used for missing values)
+        # categorical: {col: {value: weight}}
+        self.intercept = float(intercept)
+        self.numeric = {col: (float(w), float(m)) for col, (w, m) in numeric.items()}
+        self.categorical = {col: {str(v): float(w) for v, w in table.items()} for col, table in categorical.items()}
+        self.source_sha256 = source_sha256
+
+        # hot path: positions in a RAW_COLUMNS-ordered sample
+        self._numeric_terms = [(RAW_COLUMNS.index(col), w, m) for col, (w, m) in self.numeric.items()]
+        self._categorical_terms = [(RAW_COLUMNS.index(col), table) for col, table in self.categorical.items()]
+
+    @classmethod
+    def from_artifacts(cls, model_data, source_sha256=None):
+        transform = CompiledTransform(model_data)
+        model = model_data["model"]
+        coef = model.coef_[0].astype(np.float64)
+
+        intercept = float(model.intercept_[0])
+        numeric = {}
+        for col, pos, mean, scale in zip(transform.numeric_cols, transform.numeric_pos, transform.mean, transform.scale):
+            weight = coef[pos] / scale
+            numeric[col] = (weight, mean)
+            intercept -= weight * mean
+
+        categorical = {}
+        for col, categories, pos in zip(transform.categorical_cols, transform.categories, transform.category_pos):
+            # pos[i] == -1: dropped category (the last slot, for unknown values, is not in the table)
+            categorical[col] = {value: coef[p] if p >= 0 else 0.0 for value, p in zip(categories, pos)}
+        return cls(intercept, numeric, categorical, source_sha256)
+
+    def logit(self, sample):
+        # sample: one applicant in RAW_COLUMNS order (as built by Page_2)
+        z = self.intercept
+        for i, w, m in self._numeric_terms:
+            x = _number(sample[i])
+            z += w * (m if x is None else x)  # missing -> training mean
+        for i, table in self._categorical_terms:
+            z += table.get(str(sample[i]), 0.0)
+        return z
+
+    def predict_proba(self, sample):
+        return _sigmoid(self.logit(sample))
+
+    def logits(self, batch):
+        # vectorized form for a DataFrame with the raw columns
+        z = np.full(len(batch), self.intercept)
+        for col, (w, m) in self.numeric.items():
+            z += w * np.nan_to_num(batch[col].to_numpy(dtype=np.float64), nan=m)
+        for col, table in self.categorical.items():
+            values = batch[col].astype(str)
+            z += values.map(table).fillna(0.0).to_numpy(dtype=np.float64)
+        return z
+
+    def predict_proba_batch(self, batch):
+        return 1.0 / (1.0 + np.exp(-self.logits(batch)))
+
+    def to_dict(self):
+        return {
+            'format_version': SCORER_FORMAT_VERSION,
+            'source_sha256': self.source_sha256,
+            'raw_columns': RAW_COLUMNS,
+            'intercept': self.intercept,
+            'numeric': {col: {'weight': w, 'mean': m} for col, (w, m) in self.numeric.items()},
+            'categorical': self.categorical,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('format_version') != SCORER_FORMAT_VERSION:
+            raise ValueError(f"Unsupported scorer format: {data.get('format_version')}")
+        numeric = {col: (d['weight'], d['mean']) for col, d in data['numeric'].items()}
+        return cls(data['intercept'], numeric, data['categorical'], data.get('source_sha256'))
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
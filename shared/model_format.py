@@ -0,0 +1,342 @@
+# Pickle-free artifact bundles.
+#
+# A bundle is a directory next to the pickle it replaces (models/model.pkl -> models/model.bundle/):
+#   - LightGBM models in LightGBM's own text format (model.txt)
+#   - linear model coefficients, scaler statistics, stored probabilities, ... as .npy arrays
+#   - fitted encoders as their plain vocabulary arrays
+#   - manifest.json: artifact kind, format version, library versions, the source pickle it was
+#     exported from, and the sha256/dtype/shape of every file
+# Arrays are opened memory-mapped (read-only), so worker processes share the same pages; the
+# sklearn objects the apps expect are rebuilt around those arrays without unpickling anything.
+#
+# Supported artifacts: the lab11 AutoValuator dict (LightGBM + LabelEncoders), the lab5 LoanTech
+# dict (StandardScaler + OneHotEncoder + LogisticRegression), and the final-project assets
+# (LogisticRegression, StandardScaler, dict of probability arrays).
+#
+# Export (from the repo root):
+#   python shared/model_format.py lab5/loan_app_artifacts.pkl
+#   python shared/model_format.py lab11/models/model.pkl final-project/assets/logreg_model.pkl ...
+import json
+import os
+import pickle
+import platform
+import shutil
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from shared.artifacts import file_sha256
+
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+BUNDLE_SUFFIX = '.bundle'
+
+LAB11_ENCODERS = ['le_car', 'le_body', 'le_engType', 'le_drive']
+
+
+def library_versions():
+    versions = {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__}
+    for name in ['sklearn', 'lightgbm']:
+        module = sys.modules.get(name)
+        if module is None:
+            try:
+                module = __import__(name)
+            except ImportError:
+                continue
+        versions[name] = module.__version__
+    return versions
+
+def _json_params(estimator):
+    # constructor parameters that survive a JSON round trip (the rest keep their defaults)
+    params = {}
+    for key, value in estimator.get_params(deep=False).items():
+        try:
+            if json.loads(json.dumps(value)) == value:
+                params[key] = value
+        except (TypeError, ValueError):
+            continue
+    return params
+
+def _vocab(values):
+    # encoder vocabulary as a plain (non-object) array
+    values = np.asarray(values)
+    return values.astype(str) if values.dtype == object else values
+
+
+# --- bundle files -------------------------------------------------------------------------------
+
+def save_bundle(directory, kind, arrays, texts=None, meta=None, source=None):
+    # arrays: name -> ndarray (.npy); texts: name -> str (e.g. a LightGBM model); meta: JSON-able
+    tmp = directory + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    files = {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        if array.dtype == object:
+            raise TypeError(f"Array '{name}' has dtype object, which cannot be stored without pickle")
+        filename = f'{name}.npy'
+        np.save(os.path.join(tmp, filename), array, allow_pickle=False)
+        files[name] = {'file': filename, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+    for name, text in (texts or {}).items():
+        filename = f'{name}.txt'
+        with open(os.path.join(tmp, filename), 'w') as f:
+            f.write(text)
+        files[name] = {'file': filename}
+    for entry in files.values():
+        entry['sha256'] = file_sha256(os.path.join(tmp, entry['file']))
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'kind': kind,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'versions': library_versions(),
+        'source': source,
+        'files': files,
+        'meta': meta or {},
+    }
+    with open(os.path.join(tmp, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    # swap in the new bundle (the manifest only becomes visible once every file is written)
+    old = directory + '.old'
+    if os.path.exists(directory):
+        os.replace(directory, old)
+    os.replace(tmp, directory)
+    shutil.rmtree(old, ignore_errors=True)
+    return manifest
+
+def load_bundle(directory, mmap=True, verify=True):
+    # -> (manifest, arrays, texts); arrays are read-only memory maps when mmap is True
+    with open(os.path.join(directory, MANIFEST)) as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported bundle format {manifest.get('format_version')} in {directory}")
+
+    arrays, texts = {}, {}
+    for name, entry in manifest['files'].items():
+        path = os.path.join(directory, entry['file'])
+        if verify and file_sha256(path) != entry['sha256']:
+            raise ValueError(f"Checksum mismatch for {path}")
+        if entry['file'].endswith('.npy'):
+            arrays[name] = np.load(path, mmap_mode='r' if mmap else None, allow_pickle=False)
+        else:
+            with open(path) as f:
+                texts[name] = f.read()
+    return manifest, arrays, texts
+
+
+# --- sklearn objects from plain arrays ----------------------------------------------------------
+
+def _label_encoder(classes):
+    from sklearn.preprocessing import LabelEncoder
+    encoder = LabelEncoder()
+    encoder.classes_ = classes
+    return encoder
+
+def _standard_scaler(params, arrays, prefix, feature_names):
+    from sklearn.preprocessing import StandardScaler
+    scaler = StandardScaler(**params)
+    for attr in ['mean_', 'var_', 'scale_', 'n_samples_seen_']:
+        if f'{prefix}{attr}' in arrays:
+            setattr(scaler, attr, arrays[f'{prefix}{attr}'])
+    scaler.n_features_in_ = len(arrays[f'{prefix}scale_'])
+    if feature_names is not None:
+        scaler.feature_names_in_ = np.asarray(feature_names, dtype=object)
+    return scaler
+
+def _scaler_arrays(scaler, prefix):
+    arrays = {f'{prefix}{attr}': np.asarray(getattr(scaler, attr))
+              for attr in ['mean_', 'var_', 'scale_', 'n_samples_seen_'] if getattr(scaler, attr, None) is not None}
+    return arrays, _feature_names(scaler)
+
+def _logistic_regression(params, arrays, prefix, feature_names):
+    from sklearn.linear_model import LogisticRegression
+    model = LogisticRegression(**params)
+    model.coef_ = arrays[f'{prefix}coef_']
+    model.intercept_ = arrays[f'{prefix}intercept_']
+    model.classes_ = arrays[f'{prefix}classes_']
+    model.n_features_in_ = model.coef_.shape[1]
+    if feature_names is not None:
+        model.feature_names_in_ = np.asarray(feature_names, dtype=object)
+    return model
+
+def _logistic_arrays(model, prefix):
+    arrays = {f'{prefix}{attr}': np.asarray(getattr(model, attr)) for attr in ['coef_', 'intercept_', 'classes_']}
+    return arrays, _feature_names(model)
+
+def _one_hot_encoder(params, columns, categories):
+    # refit on a frame holding every category once: reproduces the fitted state exactly
+    from sklearn.preprocessing import OneHotEncoder
+    encoder = OneHotEncoder(**params, categories=[np.asarray(c) for c in categories])
+    n = max(len(c) for c in categories)
+    frame = pd.DataFrame({col: np.resize(np.asarray(c), n) for col, c in zip(columns, categories)})
+    return encoder.fit(frame)
+
+def _feature_names(estimator):
+    names = getattr(estimator, 'feature_names_in_', None)
+    return None if names is None else [str(n) for n in names]
+
+
+# --- artifact kinds -----------------------------------------------------------------------------
+
+def _is_lab11(obj):
+    return isinstance(obj, dict) and 'model' in obj and all(k in obj for k in LAB11_ENCODERS)
+
+def _is_loan(obj):
+    return isinstance(obj, dict) and all(k in obj for k in ['model', 'encoder', 'scaler', 'model_columns_ordered'])
+
+def _is_array_dict(obj):
+    return isinstance(obj, dict) and all(isinstance(v, (np.ndarray, list)) for v in obj.values())
+
+def export_artifact(obj, directory, source=None):
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.preprocessing import StandardScaler
+
+    if _is_lab11(obj):
+        booster = getattr(obj['model'], 'booster_', obj['model'])
+        arrays = {key: _vocab(obj[key].classes_) for key in LAB11_ENCODERS}
+        meta = {'model_class': type(obj['model']).__name__}
+        return save_bundle(directory, 'lab11_lightgbm', arrays, {'model': booster.model_to_string()}, meta, source)
+
+    if _is_loan(obj):
+        model_arrays, model_names = _logistic_arrays(obj['model'], 'model_')
+        scaler_arrays, scaler_names = _scaler_arrays(obj['scaler'], 'scaler_')
+        encoder = obj['encoder']
+        vocab = {f'vocab_{i}': _vocab(c) for i, c in enumerate(encoder.categories_)}
+        encoder_params = {k: v for k, v in _json_params(encoder).items() if k != 'categories'}
+        meta = {
+            'numeric_cols': list(obj['numeric_cols']),
+            'categorical_cols': list(obj['categorical_cols']),
+            'model_columns_ordered': list(obj['model_columns_ordered']),
+            'model_params': _json_params(obj['model']),
+            'model_feature_names': model_names,
+            'scaler_params': _json_params(obj['scaler']),
+            'scaler_feature_names': scaler_names,
+            'encoder_params': encoder_params,
+        }
+        return save_bundle(directory, 'lab5_loan', {**model_arrays, **scaler_arrays, **vocab}, meta=meta, source=source)
+
+    if isinstance(obj, LogisticRegression):
+        arrays, names = _logistic_arrays(obj, '')
+        return save_bundle(directory, 'logistic_regression', arrays,
+                           meta={'params': _json_params(obj), 'feature_names': names}, source=source)
+
+    if isinstance(obj, StandardScaler):
+        arrays, names = _scaler_arrays(obj, '')
+        return save_bundle(directory, 'standard_scaler', arrays,
+                           meta={'params': _json_params(obj), 'feature_names': names}, source=source)
+
+    if _is_array_dict(obj):
+        # keys (e.g. model display names) are kept in the manifest, files are numbered
+        arrays = {f'array_{i}': np.asarray(v) for i, v in enumerate(obj.values())}
+        return save_bundle(directory, 'array_dict', arrays, meta={'keys': list(obj.keys())}, source=source)
+
+    raise TypeError(f"Don't know how to export a {type(obj).__name__} without pickle")
+
+def load_artifact(directory, mmap=True, verify=True):
+    # rebuilds the object the original pickle held, around memory-mapped arrays
+    manifest, arrays, texts = load_bundle(directory, mmap, verify)
+    kind, meta = manifest['kind'], manifest['meta']
+
+    if kind == 'lab11_lightgbm':
+        # the model comes back as the raw lgb.Booster, not the LGBMRegressor wrapper the pickle
+        # holds: it has the same predict(X) (and works with shap.TreeExplainer), but none of the
+        # sklearn attributes (booster_, feature_importances_, get_params, ...)
+        import lightgbm as lgb
+        data = {'model': lgb.Booster(model_str=texts['model'])}
+        data.update({key: _label_encoder(arrays[key]) for key in LAB11_ENCODERS})
+        return data
+
+    if kind == 'lab5_loan':
+        categories = [arrays[f'vocab_{i}'] for i in range(len(meta['categorical_cols']))]
+        return {
+            'model': _logistic_regression(meta['model_params'], arrays, 'model_', meta['model_feature_names']),
+            'scaler': _standard_scaler(meta['scaler_params'], arrays, 'scaler_', meta['scaler_feature_names']),
+            'encoder': _one_hot_encoder(meta['encoder_params'], meta['categorical_cols'], categories),
+            'numeric_cols': meta['numeric_cols'],
+            'categorical_cols': meta['categorical_cols'],
+            'model_columns_ordered': meta['model_columns_ordered'],
+        }
+
+    if kind == 'logistic_regression':
+        return _logistic_regression(meta['params'], arrays, '', meta['feature_names'])
+
+    if kind == 'standard_scaler':
+        return _standard_scaler(meta['params'], arrays, '', meta['feature_names'])
+
+    if kind == 'array_dict':
+        return {key: arrays[f'array_{i}'] for i, key in enumerate(meta['keys'])}
+
+    raise ValueError(f"Unknown artifact kind '{kind}' in {directory}")
+
+
+# --- pickle path <-> bundle ---------------------------------------------------------------------
+
+def bundle_path(path):
+    return os.path.splitext(path)[0] + BUNDLE_SUFFIX
+
+def _source_info(path):
+    stat = os.stat(path)
+    return {'file': os.path.basename(path), 'sha256': file_sha256(path), 'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns}
+
+_resolved = {}  # (path, pickle stat, manifest stat) -> resolve() result
+
+def _stat(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+def resolve(path):
+    # -> (path to load, loader kind): the bundle manifest when a bundle exported from the current
+    # pickle exists, otherwise the pickle itself (a pickle rewritten after the export wins).
+    # Called on every page run: the manifest is only parsed again when a file's size/mtime change.
+    manifest_path = os.path.join(bundle_path(path), MANIFEST)
+    key = (os.path.abspath(path), _stat(path), _stat(manifest_path))
+    result = _resolved.get(key)
+    if result is None:
+        if len(_resolved) >= 256:
+            _resolved.clear()
+        result = _resolved[key] = _resolve(path, manifest_path, key[1], key[2])
+    return result
+
+def _resolve(path, manifest_path, pickle_stat, manifest_stat):
+    if manifest_stat is None:
+        return path, 'pickle'
+    if pickle_stat is not None:
+        with open(manifest_path) as f:
+            source = json.load(f).get('source') or {}
+        if (source.get('size'), source.get('mtime_ns')) != pickle_stat:
+            warnings.warn(f"{path} changed after its bundle was exported; loading the pickle "
+                          f"(re-run `python shared/model_format.py {path}`)")
+            return path, 'pickle'
+    return manifest_path, 'bundle'
+
+def load_resolved(path):
+    # loader for the artifact registry: path is what resolve() returned
+    if os.path.basename(path) == MANIFEST:
+        return load_artifact(os.path.dirname(path))
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+def export_pickle(path, directory=None):
+    with open(path, 'rb') as f:
+        obj = pickle.load(f)
+    directory = directory or bundle_path(path)
+    export_artifact(obj, directory, source=_source_info(path))
+    return directory
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(f'usage: python {sys.argv[0]} <artifact.pkl> [<artifact.pkl> ...]')
+        sys.exit(1)
+    for path in sys.argv[1:]:
+        print(f'{path} -> {export_pickle(path)}')
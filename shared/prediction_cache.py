@@ -0,0 +1,137 @@
+# Bounded cache for single-row predictions.
+#
+# Keys are canonical feature tuples: numbers are snapped to a per-feature step (the resolution of
+# the inputs, e.g. a slider's step; 1e-6 for unlisted features) so that 100, 100.0 and 100.0000001
+# share one entry, and strings are kept as-is. A row whose stepped features are not on their grid
+# is computed without the cache, since snapping would merge it with a different input. Entries are evicted
+# least-recently-used first when the entry count or the byte budget is exceeded, and expire after
+# ttl seconds. The cache remembers the artifact version each model was last seen with; a new
+# version drops that model's entries, so a reloaded model never serves stale predictions.
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+MAX_ENTRIES = 10_000
+MAX_BYTES = 16 * 1024 * 1024
+TTL = 3600.0  # seconds
+DEFAULT_STEP = 1e-6
+
+
+def _sizeof(obj):
+    # approximate memory held by a key or value
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) + obj.nbytes
+    if isinstance(obj, (tuple, list)):
+        return sys.getsizeof(obj) + sum(_sizeof(x) for x in obj)
+    return sys.getsizeof(obj)
+
+def _quantize(value, step):
+    if isinstance(value, (bool, np.bool_)) or value is None:
+        return value
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        value = float(value)
+        if value != value:
+            return 'nan'
+        return round(round(value / step) * step, 9)
+    return str(value)
+
+
+class PredictionCache:
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES, ttl=TTL, steps=None):
+        # steps: {feature position: quantization step} (DEFAULT_STEP for unlisted numeric features)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.steps = steps or {}
+        self.entries = OrderedDict()  # key -> (value, expires_at, size)
+        self.versions = {}  # model name -> artifact version the entries belong to
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0,
+                         'bypassed': 0}
+
+    def key(self, model, version, row):
+        features = tuple(_quantize(v, self.steps.get(i, DEFAULT_STEP)) for i, v in enumerate(row))
+        return (model, version, features)
+
+    def on_grid(self, row):
+        # every stepped numeric feature is (within float error) a multiple of its step
+        for i, step in self.steps.items():
+            value = row[i]
+            if isinstance(value, (bool, np.bool_)) or not isinstance(value, (int, float, np.integer, np.floating)):
+                continue
+            value = float(value)
+            if value == value and abs(value - round(value / step) * step) > 1e-9 * max(1.0, abs(value)):
+                return False
+        return True
+
+    def _check_version(self, model, version):
+        # called with the lock held
+        if self.versions.get(model) not in (None, version):
+            stale = [k for k in self.entries if k[0] == model]
+            for k in stale:
+                self._remove(k)
+            self.counters['invalidations'] += len(stale)
+        self.versions[model] = version
+
+    def _remove(self, key):
+        _, _, size = self.entries.pop(key)
+        self.bytes -= size
+
+    def get(self, key, default=None):
+        with self.lock:
+            self._check_version(key[0], key[1])
+            entry = self.entries.get(key)
+            if entry is None:
+                self.counters['misses'] += 1
+                return default
+            if entry[1] < time.monotonic():
+                self._remove(key)
+                self.counters['expirations'] += 1
+                self.counters['misses'] += 1
+                return default
+            self.entries.move_to_end(key)
+            self.counters['hits'] += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = _sizeof(key) + _sizeof(value)
+        with self.lock:
+            self._check_version(key[0], key[1])
+            if key in self.entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+            self.entries[key] = (value, time.monotonic() + self.ttl, size)
+            self.bytes += size
+            while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+                self.counters['evictions'] += 1
+
+    def get_or_compute(self, model, version, row, compute):
+        if not self.on_grid(row):
+            with self.lock:
+                self.counters['bypassed'] += 1
+            return compute()
+        key = self.key(model, version, row)
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self.lock:
+            lookups = self.counters['hits'] + self.counters['misses']
+            return {**self.counters, 'entries': len(self.entries), 'bytes': self.bytes,
+                    'hit_rate': self.counters['hits'] / lookups if lookups else 0.0,
+                    'max_entries': self.max_entries, 'max_bytes': self.max_bytes, 'ttl': self.ttl}
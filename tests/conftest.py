@@ -0,0 +1,77 @@
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOAN_ARTIFACTS = os.path.join(REPO_ROOT, 'lab5', 'loan_app_artifacts.pkl')
+
+
+@pytest.fixture(scope='session')
+def loan_artifacts_path():
+    return LOAN_ARTIFACTS
+
+
+@pytest.fixture(scope='session')
+def loan_model_data():
+    with open(LOAN_ARTIFACTS, 'rb') as f:
+        return pickle.load(f)
+
+
+@pytest.fixture(scope='session')
+def cars():
+    # small AutoValuator-like listing table (raw labels, as the app's X_sample)
+    rng = np.random.default_rng(0)
+    n = 400
+    return pd.DataFrame({
+        'car': rng.choice(['BMW', 'Audi', 'Toyota', 'Other'], n),
+        'body': rng.choice(['sedan', 'van', 'crossover'], n),
+        'mileage': rng.integers(0, 400, n),
+        'engV': rng.choice([1.4, 1.6, 2.0, 3.0], n),
+        'engType': rng.choice(['Petrol', 'Diesel', 'Gas'], n),
+        'registration': rng.choice(['yes', 'no'], n),
+        'year': rng.integers(1990, 2016, n),
+        'drive': rng.choice(['front', 'full', 'rear'], n),
+    })
+
+
+@pytest.fixture(scope='session')
+def lab11_training(cars):
+    # ({'model': LGBMRegressor, 'le_car': ..., ...}, encoded X): the dict train.py saves, fitted on `cars`
+    import lightgbm as lgb
+    from sklearn.preprocessing import LabelEncoder
+
+    from shared.autovaluator_encoding import CATEGORICAL_ENCODERS, FEATURE_COLUMNS, YES_VALUES
+
+    data, X = {}, pd.DataFrame(index=cars.index)
+    for column in FEATURE_COLUMNS:
+        if column in CATEGORICAL_ENCODERS:
+            encoder = data[CATEGORICAL_ENCODERS[column]] = LabelEncoder()
+            X[column] = encoder.fit_transform(cars[column].astype(str))
+        elif column == 'registration':
+            X[column] = np.where(cars[column].isin(YES_VALUES), 1, 0)
+        else:
+            X[column] = cars[column]
+    price = 30_000 - 40 * cars['mileage'] + 800 * (cars['year'] - 1990) + 2_000 * cars['engV']
+    data['model'] = lgb.LGBMRegressor(n_estimators=20, num_leaves=7, min_child_samples=5, verbose=-1,
+                                      random_state=0).fit(X, price)
+    return data, X
+
+
+@pytest.fixture(scope='session')
+def lab11_artifact(lab11_training):
+    return lab11_training[0]
+
+
+@pytest.fixture(scope='session')
+def scored():
+    # (binary LogisticRegression, X, boolean y)
+    from sklearn.linear_model import LogisticRegression
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2_000, 3))
+    y = X @ [1.5, -1.0, 0.5] + rng.logistic(size=2_000) > 1.5
+    model = LogisticRegression().fit(X, y)
+    return model, X, y
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from aggregates import compute_filtered_summary, correlation_matrix, get_summary
+
+
+def _listings(cars):
+    df = cars.assign(price=30_000 - 40 * cars['mileage'] + 800 * (cars['year'] - 1990), model='x').astype(
+        {'mileage': float, 'engV': float})
+    df.loc[::7, 'engV'] = np.nan
+    df.loc[::11, 'price'] = np.nan
+    return df
+
+
+def _expected(view):
+    # the notebook's correlation: label-encode the categorical columns, then df.corr() (pairwise deletion)
+    encoded = view.drop(columns=['model', 'registration']).copy()
+    for col in ['car', 'body', 'engType', 'drive']:
+        encoded[col] = pd.Categorical(view[col], categories=sorted(view[col].unique())).codes
+    return encoded.corr()
+
+
+def test_correlation_uses_pairwise_complete_rows(cars):
+    df = _listings(cars)
+    mask = (df['year'] > 1995).to_numpy()
+    corr = correlation_matrix(compute_filtered_summary(df, mask))
+    expected = _expected(df[mask])
+    assert np.allclose(corr.loc[expected.index, expected.columns], expected)
+
+
+def test_appended_rows_are_merged(cars, tmp_path):
+    df = _listings(cars)
+    mask = np.ones(len(df), dtype=bool)
+    path = str(tmp_path / 'summary.pkl')
+    get_summary(df.iloc[:300], mask[:300], path)
+    merged = get_summary(df, mask, path)
+    assert merged['n_rows'] == len(df)
+    expected = _expected(df)
+    assert np.allclose(correlation_matrix(merged).loc[expected.index, expected.columns], expected)
@@ -0,0 +1,69 @@
+import hashlib
+import json
+import os
+
+import pytest
+
+from shared.artifacts import ArtifactRegistry, file_sha256
+
+
+@pytest.fixture
+def config(tmp_path):
+    path = tmp_path / 'config.json'
+    path.write_text(json.dumps({'cutoff': 0.5}))
+    return str(path)
+
+
+def _counting_loader(loads):
+    def load(path):
+        loads.append(path)
+        with open(path) as f:
+            return json.load(f)
+    return load
+
+
+def test_file_sha256(config):
+    with open(config, 'rb') as f:
+        assert file_sha256(config) == hashlib.sha256(f.read()).hexdigest()
+
+
+def test_loads_once_and_reloads_on_change(config):
+    registry, loads = ArtifactRegistry(check_interval=0), []
+    loader = _counting_loader(loads)
+    first = registry.get(config, loader)
+    assert registry.get(config, loader) is first and len(loads) == 1
+    assert registry.version(config) == file_sha256(config)
+
+    with open(config, 'w') as f:
+        json.dump({'cutoff': 0.75}, f)
+    assert registry.get(config, loader) == {'cutoff': 0.75} and len(loads) == 2
+
+
+def test_touched_file_is_not_reloaded(config):
+    registry, loads = ArtifactRegistry(check_interval=0), []
+    loader = _counting_loader(loads)
+    first = registry.get(config, loader)
+    stat = os.stat(config)
+    os.utime(config, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert registry.get(config, loader) is first and len(loads) == 1
+
+
+def test_failed_reload_keeps_the_loaded_version(config):
+    registry = ArtifactRegistry(check_interval=0)
+    first = registry.get(config)  # default loader picked from the extension
+    with open(config, 'w') as f:
+        f.write('{not json')
+    with pytest.warns(UserWarning, match='keeping the loaded version'):
+        assert registry.get(config) is first
+    assert registry.info()[0]['last_error'] is not None
+
+
+def test_removed_file(config, tmp_path):
+    registry = ArtifactRegistry(check_interval=0)
+    first = registry.get(config)
+    os.remove(config)
+    assert registry.get(config) is first  # keeps serving what it loaded
+    with pytest.raises(FileNotFoundError):
+        registry.get(str(tmp_path / 'missing.json'))
+    with pytest.raises(ValueError):
+        registry.get(str(tmp_path / 'model.bin'))
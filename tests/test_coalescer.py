@@ -0,0 +1,104 @@
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from shared.coalescer import Coalescer, get_coalescer
+
+
+def _submit_all(coalescer, rows):
+    # submits every row from its own thread -> {row: result or exception}
+    results = {}
+    barrier = threading.Barrier(len(rows))
+
+    def run(row):
+        barrier.wait()
+        try:
+            results[row] = coalescer.submit(row, timeout=5)
+        except Exception as e:
+            results[row] = e
+
+    threads = [threading.Thread(target=run, args=(row,)) for row in rows]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_batches_concurrent_rows():
+    calls = []
+    coalescer = Coalescer(lambda rows: calls.append(len(rows)) or [2 * r for r in rows], max_delay=0.05)
+    results = _submit_all(coalescer, list(range(8)))
+    coalescer.close()
+    assert results == {r: 2 * r for r in range(8)}
+    assert sum(calls) == 8 and len(calls) < 8
+    assert coalescer.metrics()['requests'] == 8
+
+
+def test_failing_row_only_fails_its_caller():
+    def predict(rows):
+        if 3 in rows:
+            raise ValueError('bad row')
+        return [2 * r for r in rows]
+
+    coalescer = Coalescer(predict, max_delay=0.05)
+    results = _submit_all(coalescer, list(range(6)))
+    coalescer.close()
+    assert isinstance(results.pop(3), ValueError)
+    assert results == {r: 2 * r for r in range(6) if r != 3}
+    assert coalescer.metrics()['errors'] >= 1
+
+
+def test_single_row_error_is_raised():
+    coalescer = Coalescer(lambda rows: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        coalescer.submit(1, timeout=5)
+    coalescer.close()
+
+
+def test_get_coalescer_replaces_predict_fn_and_old_versions():
+    first = get_coalescer(('test-model', 'v1'), lambda rows: [1 for _ in rows])
+    assert first.submit('x', timeout=5) == 1
+    assert get_coalescer(('test-model', 'v1'), lambda rows: [2 for _ in rows]) is first
+    assert first.submit('x', timeout=5) == 2
+    second = get_coalescer(('test-model', 'v2'), lambda rows: [3 for _ in rows])
+    assert second is not first and second.submit('x', timeout=5) == 3
+    first.thread.join(timeout=5)
+    assert not first.thread.is_alive()  # the previous version's coalescer was closed
+    second.close()
+
+
+def test_closed_coalescer_calls_predict_fn_directly():
+    coalescer = Coalescer(lambda rows: [2 * r for r in rows])
+    coalescer.close()
+    coalescer.thread.join(timeout=5)
+    assert coalescer.submit(21, timeout=5) == 42  # does not wait on the stopped thread
+
+
+def test_queued_requests_fail_when_the_thread_stops():
+    entered, release = threading.Event(), threading.Event()
+
+    def predict(rows):
+        entered.set()
+        release.wait()
+        return rows
+
+    coalescer = Coalescer(predict, max_delay=0)
+    first = threading.Thread(target=coalescer.submit, args=(1,))
+    first.start()
+    entered.wait(timeout=5)  # the first row is being predicted
+    future = Future()
+    coalescer.queue.put(None)  # the thread stops with a request still queued behind the sentinel
+    coalescer.queue.put((2, future, 0.0))
+    release.set()
+    first.join(timeout=5)
+    with pytest.raises(RuntimeError, match='closed'):
+        future.result(timeout=5)
+
+
+def test_result_count_mismatch_fails_every_row():
+    coalescer = Coalescer(lambda rows: rows + [0], max_delay=0.05)
+    results = _submit_all(coalescer, [1, 2, 3])
+    coalescer.close()
+    assert all(isinstance(result, ValueError) for result in results.values())
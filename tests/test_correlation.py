@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import correlation
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(3_000, 4)), columns=['a', 'b', 'c', 'Bankrupt?'])
+    df['b'] += df['a']
+    df['c'] = np.round(df['c'], 1)  # ties
+    df.loc[::7, 'a'] = np.nan
+    return df
+
+
+@pytest.fixture
+def csv(frame, tmp_path):
+    df = frame.astype(object)
+    df.loc[2_500, 'b'] = 'n/a'  # a non-numeric value after the rows used to pick the columns
+    df['name'] = 'company'
+    path = tmp_path / 'data.csv'
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def test_streaming_matches_pandas(frame):
+    chunks = [frame.iloc[i:i + 400] for i in range(0, len(frame), 400)]
+    result = correlation.compute(chunks, frame.columns, workers=2, n_rows_hint=500)  # hint too small: grows
+    assert result.n_rows == len(frame)
+    np.testing.assert_allclose(result.matrix('pearson'), frame.corr(), atol=1e-5)
+    np.testing.assert_allclose(result.matrix('spearman'), frame.corr('spearman'), atol=1e-3)  # see the module note on NaN
+
+
+def test_csv_skips_text_and_coerces_values(csv):
+    result = correlation.compute_csv(csv, chunk_rows=700, workers=1)
+    expected = pd.read_csv(csv).drop(columns='name').apply(pd.to_numeric, errors='coerce')
+    assert result.columns == list(expected.columns)
+    assert result.n_rows == len(expected) == correlation._count_rows(csv)
+    np.testing.assert_allclose(result.matrix('pearson'), expected.corr(), atol=1e-5)
+
+
+def test_top_k(frame):
+    result = correlation.compute([frame], frame.columns)
+    top = result.top_k('b', 2, absolute=True)
+    assert len(top) == 2 and top.index[0] == 'a' and 'b' not in top.index
+    assert list(result.matrix('pearson', ['a', 'b']).columns) == ['a', 'b']
+
+
+def test_persisted_status(csv, tmp_path):
+    directory = str(tmp_path / 'correlation.bundle')
+    assert correlation.status(csv, directory) == 'missing'
+    correlation.ensure(csv, directory)
+    assert correlation.status(csv, directory) == 'current'
+    loaded = correlation.load(directory)
+    assert loaded.n_rows == 3_000 and loaded.methods == ['pearson', 'spearman']
+
+    stat = os.stat(csv)
+    os.utime(csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert correlation.status(csv, directory) == 'stale'
+    correlation.ensure(csv, directory)
+    assert correlation.is_current(csv, directory)
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+from sklearn.metrics import average_precision_score, roc_auc_score, roc_curve
+
+from curves import Curves, compare
+
+
+def test_curves_match_sklearn(scored):
+    model, X, y = scored
+    proba = model.predict_proba(X)[:, 1]
+    curves = Curves(y, proba, max_points=100_000)
+    assert curves.roc_auc == pytest.approx(roc_auc_score(y, proba))
+    assert curves.average_precision == pytest.approx(average_precision_score(y, proba))
+    fpr, tpr, _ = roc_curve(y, proba, drop_intermediate=False)
+    np.testing.assert_allclose(curves.fpr, fpr)
+    np.testing.assert_allclose(curves.tpr, tpr)
+
+
+def test_curves_are_decimated_and_compared(scored):
+    model, X, y = scored
+    proba = model.predict_proba(X)[:, 1]
+    curves = compare({'model': proba, 'other length': proba[:10]}, y, max_points=50)
+    assert list(curves) == ['model']
+    assert len(curves['model'].fpr) <= 51 and curves['model'].fpr[-1] == 1.0
+    assert curves['model'].roc_auc == pytest.approx(roc_auc_score(y, proba))
@@ -0,0 +1,58 @@
+import os
+
+import pandas as pd
+import pytest
+
+import datastore
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    # a dataset without a registered transform, in the working directory like the app's CSVs
+    monkeypatch.chdir(tmp_path)
+    pd.DataFrame({'brand': ['a', 'b', 'a'], 'price': [1.0, 2.0, 3.0]}).to_csv('cars.csv', index=False)
+    return 'cars.csv'
+
+
+def _count_hashes(monkeypatch):
+    calls = []
+    real = datastore.file_sha256
+    monkeypatch.setattr(datastore, 'file_sha256', lambda path: calls.append(path) or real(path))
+    return calls
+
+
+def test_builds_cache_once(source):
+    assert not datastore.is_cache_fresh(source)
+    version, df = datastore.load_dataset(source)
+    assert os.path.exists(datastore.cache_path(source))
+    assert datastore.is_cache_fresh(source)
+    assert list(df['price']) == [1.0, 2.0, 3.0]
+    assert isinstance(df['brand'].dtype, pd.CategoricalDtype)
+    assert datastore.load_dataset(source)[0] == version == datastore.dataset_version(source)
+
+
+def test_changed_source_rebuilds(source):
+    version, _ = datastore.load_dataset(source)
+    pd.DataFrame({'brand': ['c'], 'price': [9.0]}).to_csv(source, index=False)
+    assert not datastore.is_cache_fresh(source)
+    new_version, df = datastore.load_dataset(source)
+    assert new_version != version and list(df['price']) == [9.0]
+
+
+def test_touched_source_is_hashed_once(source, monkeypatch):
+    version, _ = datastore.load_dataset(source)
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    calls = _count_hashes(monkeypatch)
+    assert datastore.is_cache_fresh(source)  # same content: the new mtime is recorded
+    assert datastore.is_cache_fresh(source)
+    assert calls == [source]
+    assert datastore.load_dataset(source)[0] == version
+
+
+def test_source_stat_tracks_the_file(source):
+    before = datastore.source_stat(source)
+    with open(source, 'a') as f:
+        f.write('a,4.0\n')
+    assert datastore.source_stat(source) != before
+    assert datastore.source_stat('missing.csv') == (None,)
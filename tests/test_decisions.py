@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from sklearn.metrics import confusion_matrix
+
+from decisions import ProbabilityIndex, decide
+
+
+@pytest.fixture(scope='module')
+def portfolio():
+    rng = np.random.default_rng(1)
+    proba = np.round(rng.random(1_000), 2)  # rounded: many ties, some exactly on a cutoff
+    labels = (rng.random(1_000) < proba).astype(int)
+    return proba, labels
+
+
+@pytest.mark.parametrize('cutoff', [0.0, 0.3, 0.5, 0.61, 1.0, 1.5])
+def test_matches_direct_decisions(portfolio, cutoff):
+    proba, labels = portfolio
+    index = ProbabilityIndex(proba, labels)
+    approved = decide(proba, cutoff)
+    assert index.n_approved(cutoff) == approved.sum()
+    assert index.approval_rate(cutoff) == approved.mean()
+    assert index.confusion(cutoff) == tuple(confusion_matrix(labels, approved, labels=[0, 1]).ravel())
+
+
+def test_sweep_matches_confusion(portfolio):
+    proba, labels = portfolio
+    index = ProbabilityIndex(proba, labels)
+    cutoffs = np.linspace(0, 1, 21)
+    sweep = index.sweep(cutoffs)
+    for i, cutoff in enumerate(cutoffs):
+        assert (sweep['tn'][i], sweep['fp'][i], sweep['fn'][i], sweep['tp'][i]) == index.confusion(cutoff)
+        assert sweep['approved'][i] == index.n_approved(cutoff)
+
+
+def test_metrics_without_labels_and_empty():
+    index = ProbabilityIndex([0.2, 0.7, 0.9])
+    assert index.metrics(0.5) == {'approved': 2, 'rejected': 1, 'approval_rate': 2 / 3}
+    assert 'tp' not in index.sweep([0.5])
+    assert ProbabilityIndex([]).approval_rate(0.5) == 0.0
+    with pytest.raises(ValueError, match='labels'):
+        index.confusion(0.5)
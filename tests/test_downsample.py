@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from downsample import MAX_POINTS, box_stats, downsample_scatter, lttb
+
+
+def test_small_scatter_is_sent_whole():
+    x, y = np.arange(100.0), np.arange(100.0) ** 2
+    x[3] = np.nan
+    payload = downsample_scatter(x, y)
+    assert payload['method'] == 'all' and payload['n_rows'] == 99 and len(payload['x']) == 99
+
+
+def test_large_scatter_is_bounded():
+    rng = np.random.default_rng(0)
+    x, y = rng.normal(size=50_000), rng.normal(size=50_000)
+    payload = downsample_scatter(x, y)
+    assert payload['method'] == 'lttb' and len(payload['x']) == MAX_POINTS and payload['n_rows'] == 50_000
+    assert payload['y'].max() == y.max() or payload['y'].min() == y.min()  # extremes survive LTTB
+    discrete = downsample_scatter(rng.integers(1990, 2016, 50_000), y)
+    assert discrete['method'] == 'random' and len(discrete['x']) == MAX_POINTS
+    density = downsample_scatter(x, y, density_min_rows=10_000)
+    assert density['kind'] == 'density' and np.nansum(density['z']) == 50_000
+
+
+def test_lttb_keeps_the_ends():
+    keep = lttb(np.arange(1000.0), np.sin(np.arange(1000.0)), 50)
+    assert len(keep) == 50 and keep[0] == 0 and keep[-1] == 999 and np.all(np.diff(keep) > 0)
+
+
+def test_box_stats_match_the_rows():
+    rng = np.random.default_rng(0)
+    x = rng.choice(['sedan', 'van', 'crossover'], 20_000)
+    y = rng.lognormal(10, 1, 20_000)
+    stats = box_stats(x, y, max_outliers=20)
+    frame = pd.DataFrame({'x': x, 'y': y})
+    assert stats['x'] == ['crossover', 'sedan', 'van']
+    for i, (key, values) in enumerate(frame.groupby('x')['y']):
+        q1, median, q3 = values.quantile([0.25, 0.5, 0.75])
+        assert np.allclose([stats['q1'][i], stats['median'][i], stats['q3'][i]], [q1, median, q3])
+        assert np.isclose(stats['mean'][i], values.mean()) and stats['n'][i] == len(values)
+        inside = values[values.between(q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1))]
+        assert (stats['lowerfence'][i], stats['upperfence'][i]) == (inside.min(), inside.max())
+        # at most 20 outliers per box, the most extreme ones
+        shown = np.array([v for k, v in zip(stats['outliers_x'], stats['outliers_y']) if k == key])
+        assert len(shown) == 20 and shown.max() == values.max()
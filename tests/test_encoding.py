@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from shared.autovaluator_encoding import FEATURE_COLUMNS, build_code_tables, encode_features
+
+
+def test_batch_matches_label_encoders(lab11_training, cars):
+    data, X = lab11_training
+    encoded = encode_features(build_code_tables(data), cars)
+    np.testing.assert_array_equal(encoded, X[FEATURE_COLUMNS].to_numpy(dtype=np.float64))
+
+
+def test_single_row_matches_batch(lab11_artifact, cars):
+    tables = build_code_tables(lab11_artifact)
+    batch = encode_features(tables, cars.head(20))
+    rows = np.vstack([encode_features(tables, cars.iloc[[i]]) for i in range(20)])
+    np.testing.assert_array_equal(rows, batch)
+
+
+def test_unseen_labels_are_rejected(lab11_artifact):
+    # like LabelEncoder.transform: a typo must not be priced as some other car
+    tables = build_code_tables(lab11_artifact)
+    row = ['BMW', 'limousine', 100, 2.0, 'Petrol', 'no', 2010, 'front']
+    for X in ([row], [row, row]):
+        with pytest.raises(ValueError, match="body.*'limousine'"):
+            encode_features(tables, np.array(X, dtype=object))
+    with pytest.raises(ValueError, match="car.*'Lada'"):
+        encode_features(tables, np.array([['Lada'] + row[1:]], dtype=object))
+
+
+def test_registration_and_numeric_columns(lab11_artifact):
+    tables = build_code_tables(lab11_artifact)
+    X = pd.DataFrame([['BMW', 'van', 120.7, 1.6, 'Gas', 'Yes', 2011.0, 'rear'],
+                      ['BMW', 'van', 99, 2.5, 'Gas', 'maybe', 2005, 'rear']], columns=FEATURE_COLUMNS)
+    encoded = encode_features(tables, X)
+    np.testing.assert_array_equal(encoded[:, [2, 3, 5, 6]], [[120, 1.6, 1, 2011], [99, 2.5, 0, 2005]])
+
+
+def test_rejects_wrong_shape(lab11_artifact):
+    with pytest.raises(ValueError):
+        encode_features(build_code_tables(lab11_artifact), np.zeros((2, 5), dtype=object))
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import classification_report, confusion_matrix
+
+from evaluation import Evaluation, evaluate, logit_profile
+
+
+@pytest.mark.parametrize('threshold', [0.1, 0.5, 0.9])
+def test_metrics_match_sklearn(scored, threshold):
+    model, X, y = scored
+    evaluation = evaluate(model, X, y)
+    y_pred = model.predict_proba(X)[:, 1] > threshold
+    np.testing.assert_array_equal(evaluation.predictions(threshold), y_pred)
+    np.testing.assert_array_equal(evaluation.confusion(threshold), confusion_matrix(y, y_pred))
+    expected = pd.DataFrame(classification_report(y, y_pred, output_dict=True, zero_division=0)).transpose()
+    pd.testing.assert_frame_equal(evaluation.report(threshold), expected, check_dtype=False)
+
+
+def test_default_threshold_is_model_predict(scored):
+    model, X, y = scored
+    np.testing.assert_array_equal(evaluate(model, X, y).predictions(), model.predict(X))
+
+
+def test_classes_come_from_y(scored):
+    model, X, y = scored
+    scores = model.decision_function(X)
+    labels = np.where(y, 'bankrupt', 'healthy')  # sorted: 'bankrupt' is the negative class here
+    evaluation = Evaluation(-scores, labels)
+    assert evaluation.classes == ['bankrupt', 'healthy']
+    assert list(evaluation.hist_counts) == ['bankrupt', 'healthy']
+    np.testing.assert_array_equal(evaluation.confusion(), confusion_matrix(labels, np.where(scores < 0, 'healthy', 'bankrupt')))
+    with pytest.raises(ValueError):
+        Evaluation(scores, np.ones(len(scores)))
+
+
+def test_logit_profile_is_bounded(scored):
+    model, X, y = scored
+    profile = logit_profile(model.decision_function(X), bins=30, curve_points=50)
+    assert sum(profile['counts']) == len(X) and len(profile['x']) == 50
+    assert profile['clipped'] > 0
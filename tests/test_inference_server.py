@@ -0,0 +1,78 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from tornado.httpclient import AsyncHTTPClient
+from tornado.httpserver import HTTPServer
+from tornado.testing import bind_unused_port
+
+from shared import inference_server
+from shared.inference_server import LoanTechModel, MicroBatcher
+
+ROW = dict(zip(LoanTechModel.FIELDS, LoanTechModel.WARMUP_ROW))
+
+
+@pytest.fixture(scope='module')
+def executor(loan_artifacts_path):
+    # the LoanTech model loaded by the worker initializer, in a thread instead of a process
+    with ThreadPoolExecutor(1, initializer=inference_server._init_worker,
+                            initargs=({'loantech': loan_artifacts_path},)) as pool:
+        pool.submit(inference_server._warmup_worker, None).result()
+        yield pool
+
+
+async def _gather(batcher, requests):
+    return await asyncio.gather(*(batcher.predict(rows) for rows in requests), return_exceptions=True)
+
+
+def test_requests_share_a_batch(executor):
+    batcher = MicroBatcher('loantech', executor, max_delay_ms=20)
+    row = LoanTechModel.parse(ROW)
+    results = asyncio.run(_gather(batcher, [[row], [row, row], [row]]))
+    assert [len(r) for r in results] == [1, 2, 1]
+    assert batcher.stats['batches'] == 1 and batcher.stats['rows'] == 4
+
+
+def test_failing_request_only_fails_itself(executor):
+    batcher = MicroBatcher('loantech', executor, max_delay_ms=20)
+    row = LoanTechModel.parse(ROW)
+    bad = row.copy()
+    bad[0] = 'not a number'  # bypasses parse(): fails inside the model
+    results = asyncio.run(_gather(batcher, [[row], [bad], [row, row]]))
+    assert isinstance(results[1], ValueError)
+    assert len(results[0]) == 1 and len(results[2]) == 2
+    assert batcher.stats['retried_batches'] == 1
+
+
+def test_parse_names_the_field():
+    with pytest.raises(KeyError, match='LoanAmount'):
+        LoanTechModel.parse({k: v for k, v in ROW.items() if k != 'LoanAmount'})
+    with pytest.raises(ValueError, match="'TotalIncome'"):
+        LoanTechModel.parse({**ROW, 'TotalIncome': 'lots'})
+    with pytest.raises(ValueError, match="'TotalIncome'"):
+        LoanTechModel.parse({**ROW, 'TotalIncome': float('inf')})
+    assert LoanTechModel.parse({**ROW, 'LoanAmount': None})[0] is None
+
+
+def test_empty_instances_is_a_bad_request(loan_artifacts_path):
+    app, service = inference_server.make_app({'loantech': loan_artifacts_path}, workers=0)
+
+    async def post(body):
+        sock, port = bind_unused_port()
+        server = HTTPServer(app)
+        server.add_sockets([sock])
+        try:
+            response = await AsyncHTTPClient().fetch(f'http://127.0.0.1:{port}/v1/loantech/predict', method='POST',
+                                                     body=json.dumps(body), raise_error=False)
+        finally:
+            server.stop()
+        return response.code, json.loads(response.body)
+
+    try:
+        assert asyncio.run(post({'instances': []}))[0] == 400
+        assert asyncio.run(post({'instances': {'LoanAmount': 1}}))[0] == 400
+        code, payload = asyncio.run(post({'instances': [ROW]}))
+        assert code == 200 and len(payload['probabilities']) == 1
+    finally:
+        service['executor'].shutdown()
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from shared.loantech_scorer import RAW_COLUMNS, LinearScorer
+
+from linear_scorer import pipeline_proba, verification_sample, verify
+
+
+@pytest.fixture(scope='module')
+def scorer(loan_model_data):
+    return LinearScorer.from_artifacts(loan_model_data)
+
+
+def test_matches_sklearn_predict_proba(scorer, loan_model_data):
+    batch = verification_sample(loan_model_data, n=2_000)
+    expected = pipeline_proba(loan_model_data, batch)
+    np.testing.assert_allclose(scorer.predict_proba_batch(batch), expected, atol=1e-12)
+    rows = batch.to_numpy(dtype=object).tolist()
+    np.testing.assert_allclose([scorer.predict_proba(row) for row in rows], expected, atol=1e-12)
+    assert verify(scorer, loan_model_data, n=1_000) < 1e-9
+
+
+def test_missing_and_string_numbers(scorer, loan_model_data):
+    row = verification_sample(loan_model_data, n=1)[RAW_COLUMNS].to_numpy(dtype=object)[0].tolist()
+    i = RAW_COLUMNS.index('LoanAmount')
+    mean = scorer.numeric['LoanAmount'][1]
+    with_mean = scorer.predict_proba(row[:i] + [mean] + row[i + 1:])
+    for missing in (None, float('nan'), '', '  '):
+        assert scorer.predict_proba(row[:i] + [missing] + row[i + 1:]) == pytest.approx(with_mean)
+    assert scorer.predict_proba(row[:i] + ['120'] + row[i + 1:]) == scorer.predict_proba(row[:i] + [120.0] + row[i + 1:])
+
+
+def test_json_round_trip(scorer, tmp_path):
+    path = tmp_path / 'scorer.json'
+    scorer.save(path)
+    loaded = LinearScorer.load(path)
+    assert loaded.to_dict() == scorer.to_dict()
+    data = scorer.to_dict()
+    data['format_version'] = 0
+    with pytest.raises(ValueError):
+        LinearScorer.from_dict(data)
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from linear_shap import LinearShap, LocalExplanations, explain
+
+
+@pytest.fixture(scope='module')
+def fitted():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(1_000, 20)), columns=[f'f{i}' for i in range(20)])
+    y = X['f0'] - X['f3'] + rng.logistic(size=1_000) > 1
+    return LogisticRegression().fit(X, y), X
+
+
+def test_values_add_up_to_the_decision_function(fitted):
+    model, X = fitted
+    explainer = LinearShap(model, X, chunk_rows=128)
+    values = explainer.shap_values(X)
+    np.testing.assert_allclose(values.sum(axis=1) + explainer.expected_value, model.decision_function(X), atol=1e-4)
+    np.testing.assert_allclose(explainer.logits(X), model.decision_function(X), atol=1e-5)  # float32 inputs
+    np.testing.assert_allclose(explainer.row(X.iloc[5]), values[5])
+
+
+def test_streamed_importance(fitted):
+    model, X = fitted
+    explainer = explain(model, X)
+    chunked = LinearShap(model, X, chunk_rows=64).fit_importance(X)
+    expected = np.abs(explainer.shap_values(X)).mean(axis=0)
+    np.testing.assert_allclose(explainer.mean_abs_shap(), expected, rtol=1e-5)
+    np.testing.assert_allclose(chunked.mean_abs_shap(), expected, rtol=1e-5)
+    assert chunked.n_seen == len(X)
+
+
+
+def test_waterfall(fitted):
+    model, X = fitted
+    local = LocalExplanations(explain(model, X), X, top_n=5, cache_size=2)
+    np.testing.assert_array_equal(local.risky_indices, np.flatnonzero(model.decision_function(X) > 0))
+    idx = local.risky_indices[0]
+    payload = local.waterfall(idx)
+    assert len(payload['names']) == 6 and payload['names'][-1] == 'Rest of features'
+    assert payload['final_prob'] == pytest.approx(model.predict_proba(X.iloc[[idx]])[0, 1], abs=1e-5)
+    assert local.waterfall(idx) is payload
+    for other in local.risky_indices[1:3]:
+        local.waterfall(other)
+    assert local.waterfall(idx) is not payload  # evicted (LRU of 2)
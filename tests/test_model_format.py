@@ -0,0 +1,79 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from shared.model_format import MANIFEST, export_pickle, load_artifact, load_resolved, resolve
+
+from linear_scorer import pipeline_proba, verification_sample
+
+
+def _pickle(obj, path):
+    with open(path, 'wb') as f:
+        pickle.dump(obj, f)
+    return str(path)
+
+
+def _round_trip(obj, tmp_path, name='artifact.pkl'):
+    path = _pickle(obj, tmp_path / name)
+    directory = export_pickle(path)
+    assert resolve(path) == (os.path.join(directory, MANIFEST), 'bundle')
+    return load_resolved(resolve(path)[0])
+
+
+def test_lab11_round_trip(lab11_training, tmp_path):
+    data, X = lab11_training
+    loaded = _round_trip(data, tmp_path)
+    np.testing.assert_allclose(loaded['model'].predict(X), data['model'].predict(X))
+    for key in ['le_car', 'le_body', 'le_engType', 'le_drive']:
+        np.testing.assert_array_equal(loaded[key].classes_, data[key].classes_)
+
+
+def test_lab5_round_trip(loan_model_data, tmp_path):
+    loaded = _round_trip(loan_model_data, tmp_path)
+    batch = verification_sample(loan_model_data, n=500)
+    np.testing.assert_allclose(pipeline_proba(loaded, batch), pipeline_proba(loan_model_data, batch))
+
+
+def test_final_project_round_trips(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 4))
+    y = X[:, 0] + rng.normal(size=200) > 0
+    model = LogisticRegression().fit(X, y)
+    scaler = StandardScaler().fit(X)
+    probas = {'Random Forest': rng.random(50), 'SVM': rng.random(50)}
+
+    np.testing.assert_allclose(_round_trip(model, tmp_path, 'model.pkl').predict_proba(X), model.predict_proba(X))
+    np.testing.assert_allclose(_round_trip(scaler, tmp_path, 'scaler.pkl').transform(X), scaler.transform(X))
+    loaded = _round_trip(probas, tmp_path, 'probas.pkl')
+    assert list(loaded) == list(probas)
+    for name in probas:
+        np.testing.assert_array_equal(loaded[name], probas[name])
+
+
+def test_rewritten_pickle_wins_over_bundle(tmp_path):
+    path = _pickle({'a': np.arange(3)}, tmp_path / 'probas.pkl')
+    export_pickle(path)
+    _pickle({'a': np.arange(5)}, path)
+    with pytest.warns(UserWarning, match='changed after its bundle'):
+        resolved = resolve(path)
+    assert resolved == (path, 'pickle')
+    assert len(load_resolved(resolved[0])['a']) == 5
+
+
+def test_corrupted_bundle_is_rejected(tmp_path):
+    path = _pickle({'a': np.arange(3)}, tmp_path / 'probas.pkl')
+    directory = export_pickle(path)
+    with open(os.path.join(directory, 'array_0.npy'), 'r+b') as f:
+        f.seek(-1, os.SEEK_END)
+        f.write(b'\x07')
+    with pytest.raises(ValueError, match='Checksum mismatch'):
+        load_artifact(directory)
+
+
+def test_unsupported_object(tmp_path):
+    with pytest.raises(TypeError):
+        _round_trip(object(), tmp_path)
@@ -0,0 +1,50 @@
+import numpy as np
+
+from shared.prediction_cache import PredictionCache
+
+
+def _row(mileage=100, engV=2.0, year=2010):
+    return np.array([3.0, 1.0, mileage, engV, 0.0, 1.0, year, 2.0])
+
+
+def test_hits_and_canonical_keys():
+    cache, calls = PredictionCache(), []
+    compute = lambda: calls.append(1) or 42.0
+    assert cache.get_or_compute('m', 'v1', _row(), compute) == 42.0
+    assert cache.get_or_compute('m', 'v1', _row(mileage=100.0000001), compute) == 42.0
+    assert cache.get_or_compute('m', 'v1', list(_row()), compute) == 42.0
+    assert len(calls) == 1
+    assert cache.stats()['hits'] == 2 and cache.stats()['misses'] == 1
+
+
+def test_new_version_invalidates():
+    cache = PredictionCache()
+    cache.get_or_compute('m', 'v1', _row(), lambda: 1.0)
+    assert cache.get_or_compute('m', 'v2', _row(), lambda: 2.0) == 2.0
+    assert cache.stats()['invalidations'] == 1 and cache.stats()['entries'] == 1
+
+
+def test_bounded_by_entries_and_ttl():
+    cache = PredictionCache(max_entries=3)
+    for mileage in range(5):
+        cache.get_or_compute('m', 'v', _row(mileage=mileage), lambda: 0.0)
+    assert cache.stats()['entries'] == 3 and cache.stats()['evictions'] == 2
+
+    expiring = PredictionCache(ttl=-1)
+    expiring.get_or_compute('m', 'v', _row(), lambda: 0.0)
+    expiring.get_or_compute('m', 'v', _row(), lambda: 0.0)
+    assert expiring.stats()['expirations'] == 1
+
+
+def test_steps_snap_on_grid_rows_and_bypass_others():
+    # the playground's slider steps: mileage 10, engV 0.1, year 1
+    cache, calls = PredictionCache(steps={2: 10, 3: 0.1, 6: 1}), []
+    compute = lambda: calls.append(1) or 1.0
+    cache.get_or_compute('m', 'v', _row(mileage=100, engV=1.8), compute)
+    cache.get_or_compute('m', 'v', _row(mileage=100.0, engV=0.6 + 1.2), compute)  # 1.7999999999999998
+    assert len(calls) == 1
+    # off the grid (e.g. a dataset row): computed, never merged with the neighbouring grid entry
+    cache.get_or_compute('m', 'v', _row(mileage=104, engV=1.85), compute)
+    cache.get_or_compute('m', 'v', _row(mileage=104, engV=1.85), compute)
+    assert len(calls) == 3
+    assert cache.stats()['bypassed'] == 2 and cache.stats()['entries'] == 1
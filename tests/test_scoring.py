@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from shared.loantech_scorer import CompiledTransform
+
+from linear_scorer import pipeline_proba, verification_sample
+from scoring import predict_proba_matrix, score_file
+
+
+def _applications(n=300):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'Loan_ID': [f'LP{i:06d}' for i in range(n)],
+        'LoanAmount': rng.normal(140, 60, n).round(),
+        'Loan_Amount_Term': rng.choice([180.0, 360.0], n),
+        'ApplicantIncome': rng.integers(1_000, 10_000, n).astype(float),
+        'CoapplicantIncome': rng.integers(0, 3_000, n).astype(float),
+        'Gender': rng.choice(['Male', 'Female'], n),
+        'Married': rng.choice(['Yes', 'No'], n),
+        'Dependents': rng.choice([0.0, 1.0, 2.0], n),  # numeric-typed, as parquet writers often leave it
+        'Education': rng.choice(['Graduate', 'Not Graduate'], n),
+        'Self_Employed': rng.choice(['Yes', 'No'], n),
+        'Credit_History': rng.choice([0.0, 1.0], n),
+        'Property_Area': rng.choice(['Urban', 'Rural', 'Semiurban'], n),
+    })
+
+
+def test_csv_and_parquet_score_alike(loan_model_data, tmp_path):
+    df = _applications()
+    df.loc[::10, 'LoanAmount'] = np.nan
+    df.assign(Dependents=df['Dependents'].astype(int)).to_csv(tmp_path / 'in.csv', index=False)
+    df.to_parquet(tmp_path / 'in.parquet', index=False)
+
+    csv = score_file(loan_model_data, str(tmp_path / 'in.csv'), str(tmp_path / 'out.csv'), chunk_size=64)
+    parquet = score_file(loan_model_data, str(tmp_path / 'in.parquet'), str(tmp_path / 'out.parquet'), chunk_size=64)
+    assert csv == parquet == (len(df), csv[1], 30)
+    scored_csv, scored_parquet = pd.read_csv(tmp_path / 'out.csv'), pd.read_parquet(tmp_path / 'out.parquet')
+    np.testing.assert_allclose(scored_csv['probability'], scored_parquet['probability'])
+
+
+def test_failed_run_leaves_no_partial_output(loan_model_data, tmp_path):
+    df = _applications().astype({'LoanAmount': object})
+    df.loc[200, 'LoanAmount'] = 'unknown'  # fails in the fourth chunk, after three were written
+    df.to_csv(tmp_path / 'in.csv', index=False)
+    with pytest.raises(ValueError):
+        score_file(loan_model_data, str(tmp_path / 'in.csv'), str(tmp_path / 'out.csv'), chunk_size=64)
+    assert list(tmp_path.iterdir()) == [tmp_path / 'in.csv']
+
+
+def test_compiled_transform_matches_pipeline(loan_model_data):
+    batch = verification_sample(loan_model_data, n=500)
+    transform = CompiledTransform(loan_model_data)
+    X = transform.transform(batch, np.empty((len(batch), transform.n_features), np.float32))
+    proba = predict_proba_matrix(loan_model_data['model'], X)
+    np.testing.assert_allclose(proba, pipeline_proba(loan_model_data, batch), atol=1e-5)
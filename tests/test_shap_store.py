@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+import pytest
+
+import shap_store
+
+pytest.importorskip('shap')
+
+
+@pytest.fixture
+def model_and_X(lab11_training):
+    data, X = lab11_training
+    return data['model'], X.head(60).astype(np.float64)
+
+
+def _explains(monkeypatch):
+    rows = []
+    real = shap_store._explain
+    monkeypatch.setattr(shap_store, '_explain', lambda model, X, interactions: rows.append(len(X)) or real(model, X, interactions))
+    return rows
+
+
+def test_build_and_load(tmp_path, model_and_X):
+    model, X = model_and_X
+    path = shap_store.build_shap_store(model, X, root=tmp_path, interactions=False)
+    manifest, arrays = shap_store.load_shap_store(model, X, root=tmp_path)
+    assert manifest['n_rows'] == len(X) and not manifest['interactions']
+    assert arrays['values'].shape == X.shape and 'interaction_values' not in arrays
+    # SHAP values add up to the model output
+    np.testing.assert_allclose(arrays['values'].sum(axis=1) + arrays['base_values'], model.predict(X), rtol=1e-4)
+    assert path == shap_store.store_dir(model, tmp_path)
+
+
+def test_reuses_and_appends(tmp_path, model_and_X, monkeypatch):
+    model, X = model_and_X
+    explained = _explains(monkeypatch)
+    shap_store.build_shap_store(model, X.head(40), root=tmp_path, interactions=False)
+    shap_store.build_shap_store(model, X.head(40), root=tmp_path, interactions=False)
+    shap_store.build_shap_store(model, X, root=tmp_path, interactions=False)
+    assert explained == [40, 20]  # unchanged rows are not explained again, appended rows only
+    _, arrays = shap_store.load_shap_store(model, X, root=tmp_path)
+    np.testing.assert_allclose(arrays['values'].sum(axis=1) + arrays['base_values'], model.predict(X), rtol=1e-4)
+
+
+def test_store_with_interactions_serves_a_build_without(tmp_path, model_and_X, monkeypatch):
+    model, X = model_and_X
+    path = shap_store.build_shap_store(model, X, root=tmp_path, interactions=True)
+    assert os.path.exists(os.path.join(path, 'interaction_values.npy'))
+    explained = _explains(monkeypatch)
+    shap_store.build_shap_store(model, X.head(30), root=tmp_path, interactions=False)
+    assert explained == [30]  # different rows: rebuilt, and the stale interaction values dropped
+    assert not os.path.exists(os.path.join(path, 'interaction_values.npy'))
+
+
+def test_up_to_date_store_rebuilt_without_interactions(tmp_path, model_and_X, monkeypatch):
+    # the page's build (and --no-interactions) after a full build: nothing to explain
+    model, X = model_and_X
+    path = shap_store.build_shap_store(model, X, root=tmp_path, interactions=True)
+    values = np.array(shap_store.load_arrays(path)['values'])
+    explained = _explains(monkeypatch)
+    shap_store.build_shap_store(model, X, root=tmp_path, interactions=False)
+    assert explained == []
+    assert not os.path.exists(os.path.join(path, 'interaction_values.npy'))
+    manifest, arrays = shap_store.load_shap_store(model, X, root=tmp_path)
+    assert not manifest['interactions'] and manifest['last_update']['rows_added'] == 0
+    np.testing.assert_array_equal(arrays['values'], values)
+    shap_store.build_shap_store(model, X, root=tmp_path, interactions=False)
+    assert explained == []
+
+
+def test_other_rows_are_not_served(tmp_path, model_and_X):
+    model, X = model_and_X
+    shap_store.build_shap_store(model, X, root=tmp_path, interactions=False)
+    changed = X.copy()
+    changed.iloc[0, 2] += 1
+    assert shap_store.load_shap_store(model, changed, root=tmp_path) is None
+    assert shap_store.load_shap_store(model, X.head(10), root=tmp_path) is None
+
+
+def test_row_check_is_cached_per_file_version(tmp_path, model_and_X, monkeypatch):
+    model, X = model_and_X
+    shap_store.build_shap_store(model, X, root=tmp_path, interactions=False)
+    X_path = tmp_path / 'X_test.csv'
+    X.to_csv(X_path, index=False)
+    hashes = []
+    real = shap_store.rows_sha256
+    monkeypatch.setattr(shap_store, 'rows_sha256', lambda rows: hashes.append(1) or real(rows))
+    for _ in range(3):
+        assert shap_store.load_shap_store(model, X, root=tmp_path, X_path=str(X_path)) is not None
+    assert len(hashes) == 1